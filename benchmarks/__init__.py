@@ -0,0 +1,39 @@
+"""
+Concurrency benchmarks for the wallet API.
+
+Seeds throwaway users (``bench-<run>-<n>@bench.invalid``), drives one
+workload through the real API views from a thread or process pool, and
+prints a JSON report. It runs against whatever DATABASE_URL points at,
+so use a local PostgreSQL or SQLite database, never a shared one:
+
+    DATABASE_URL=postgres://localhost/wallet_bench \\
+        python -m benchmarks transfer --users 1000 --ops 20000 \\
+        --concurrency 32 --distribution zipf --output transfer.json
+
+Workloads: transfer, credit, request_accept. See ``--help`` for the rest.
+"""
+import os
+
+
+WORKLOADS = ("transfer", "credit", "request_accept")
+DISTRIBUTIONS = ("uniform", "zipf")
+EXECUTORS = ("thread", "process")
+
+
+def configure():
+    """
+    Set Django up for a benchmark run; also the process-pool initializer,
+    so it must not need anything imported beforehand.
+    """
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+    import django
+    from django.conf import settings
+
+    django.setup()
+
+    # Seeding hashes one PIN per user; ops authenticate with PIN tokens, so
+    # the hasher never shows up in the measured latencies
+    settings.PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+    settings.PIN_TOKEN_TTL = 24 * 60 * 60
+    settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, "testserver"]
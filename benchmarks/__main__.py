@@ -0,0 +1,85 @@
+import argparse
+import json
+import os
+import random
+import sys
+import uuid
+
+from benchmarks import DISTRIBUTIONS, EXECUTORS, WORKLOADS, configure
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Run a concurrent workload against the wallet API and report JSON."
+    )
+    parser.add_argument("workload", choices=WORKLOADS)
+    parser.add_argument("--users", type=int, default=200, help="Wallets to seed (default 200)")
+    parser.add_argument("--ops", type=int, default=2000, help="Operations to run (default 2000)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Parallel workers (default 8)")
+    parser.add_argument("--executor", choices=EXECUTORS, default="thread")
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="uniform",
+                        help="How recipients are picked; zipf concentrates on a few hot wallets")
+    parser.add_argument("--zipf-s", type=float, default=1.1, help="Zipf exponent (default 1.1)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for amounts and recipients")
+    parser.add_argument("--initial-balance", type=int, default=10 ** 9,
+                        help="Starting balance per wallet, in paise")
+    parser.add_argument("--max-amount", type=int, default=500, help="Largest amount per op, in paise")
+    parser.add_argument("--database-url", help="Overrides DATABASE_URL")
+    parser.add_argument("--output", help="Also write the report to this file")
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded users afterwards")
+
+    args = parser.parse_args(argv)
+    if args.users < 2:
+        parser.error("--users must be at least 2")
+    if args.ops < 1 or args.concurrency < 1:
+        parser.error("--ops and --concurrency must be positive")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    configure()
+
+    from django.db import connection
+
+    from benchmarks import runner, workloads
+
+    rng = random.Random(args.seed)
+    run_id = uuid.uuid4().hex[:8]
+
+    try:
+        users = workloads.seed_users(run_id, args.users, args.initial_balance)
+        sampler = workloads.RecipientSampler(len(users), args.distribution, args.zipf_s, rng)
+        ops = workloads.build_ops(args.workload, users, args.ops, sampler, rng, args.max_amount)
+
+        elapsed, results = runner.execute(ops, args.concurrency, args.executor, configure)
+    finally:
+        if not args.keep:
+            workloads.cleanup(run_id)
+
+    report = {
+        "workload": args.workload,
+        "database": connection.vendor,
+        "executor": args.executor,
+        "concurrency": args.concurrency,
+        "users": args.users,
+        "distribution": args.distribution,
+        "zipf_s": args.zipf_s if args.distribution == "zipf" else None,
+        "seed": args.seed,
+        "run_id": run_id,
+        **runner.summarize(elapsed, results),
+    }
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as out:
+            out.write(output + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+import statistics
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from rest_framework.test import APIClient
+
+
+def classify_db_error(exc):
+    # psycopg 3 exposes sqlstate, psycopg2 pgcode; SQLite only has a message
+    cause = exc.__cause__ or exc
+    code = getattr(cause, "sqlstate", None) or getattr(cause, "pgcode", None)
+
+    if code == "40P01":
+        return "deadlock"
+    if code == "40001":
+        return "serialization_failure"
+    if "database is locked" in str(cause):
+        return "locked"
+    if code and code.startswith("23"):
+        return "integrity_error"
+    return "other"
+
+
+class _DBObserver:
+    # execute_wrapper: counts every query and classifies failed ones, which
+    # the API's exception handler would otherwise flatten into a 500
+
+    def __init__(self):
+        self.queries = 0
+        self.errors = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        try:
+            return execute(sql, params, many, context)
+        except Exception as exc:
+            self.errors[classify_db_error(exc)] += 1
+            raise
+
+
+def run_ops(ops):
+    """
+    Run ``ops`` one after another on this thread's connection. Returns
+    ``(latencies in seconds, status counts, db error counts, queries)``.
+    """
+    User = get_user_model()
+    client = APIClient()
+    observer = _DBObserver()
+    latencies = []
+    statuses = Counter()
+
+    try:
+        with connection.execute_wrapper(observer):
+            for user_id, path, payload in ops:
+                started = time.perf_counter()
+                # Loading the user is part of every real request
+                client.force_authenticate(User.objects.get(pk=user_id))
+                response = client.post(path, payload, format="json")
+                latencies.append(time.perf_counter() - started)
+                statuses[response.status_code] += 1
+    finally:
+        connection.close()
+
+    return latencies, statuses, observer.errors, observer.queries
+
+
+def execute(ops, concurrency, executor="thread", initializer=None):
+    """
+    Split ``ops`` over ``concurrency`` workers, each with its own
+    connection, and time the whole run.
+    """
+    slices = [ops[i::concurrency] for i in range(concurrency)]
+
+    if executor == "process":
+        # Workers open their own connections; a psycopg pool's sockets and
+        # thread survive close_all() and must not be copied into a fork
+        connections.close_all()
+        for conn in connections.all(initialized_only=True):
+            if conn.vendor == "postgresql":
+                conn.close_pool()
+        pool = ProcessPoolExecutor(
+            max_workers=concurrency,
+            initializer=initializer
+        )
+    else:
+        pool = ThreadPoolExecutor(max_workers=concurrency)
+
+    with pool:
+        started = time.perf_counter()
+        results = list(pool.map(run_ops, slices))
+        elapsed = time.perf_counter() - started
+
+    return elapsed, results
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 3)
+
+
+def summarize(elapsed, results):
+    latencies = sorted(l for r in results for l in r[0])
+    statuses = sum((r[1] for r in results), Counter())
+    errors = sum((r[2] for r in results), Counter())
+    queries = sum(r[3] for r in results)
+    ops = len(latencies)
+
+    report = {
+        "ops": ops,
+        "duration_s": round(elapsed, 3),
+        "throughput_ops_s": round(ops / elapsed, 1) if elapsed else None,
+        "latency_ms": None,
+        "statuses": {str(code): n for code, n in sorted(statuses.items())},
+        "db_errors": dict(errors),
+        "deadlocks": errors["deadlock"],
+        "serialization_failures": errors["serialization_failure"],
+        "queries_per_op": round(queries / ops, 2) if ops else None,
+    }
+
+    if ops:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive") if ops > 1 else latencies * 99
+        report["latency_ms"] = {
+            "mean": _ms(statistics.fmean(latencies)),
+            "p50": _ms(cuts[49]),
+            "p95": _ms(cuts[94]),
+            "p99": _ms(cuts[98]),
+            "max": _ms(latencies[-1]),
+        }
+    return report
@@ -0,0 +1,74 @@
+import random
+import unittest
+from collections import Counter
+
+from django.db import IntegrityError, OperationalError, connection
+from django.test import SimpleTestCase, TransactionTestCase
+
+from benchmarks import runner, workloads
+from users.models import User
+from wallets.models import Transaction
+from wallets.tests import test_settings
+
+
+class _Cause(Exception):
+    def __init__(self, sqlstate):
+        self.sqlstate = sqlstate
+
+
+def db_error(cls, sqlstate=None, message=""):
+    exc = cls(message)
+    exc.__cause__ = _Cause(sqlstate) if sqlstate else None
+    return exc
+
+
+class ReportTests(SimpleTestCase):
+    def test_db_errors_are_classified_by_sqlstate(self):
+        self.assertEqual(runner.classify_db_error(db_error(OperationalError, "40P01")), "deadlock")
+        self.assertEqual(runner.classify_db_error(db_error(OperationalError, "40001")), "serialization_failure")
+        self.assertEqual(runner.classify_db_error(db_error(IntegrityError, "23505")), "integrity_error")
+        self.assertEqual(runner.classify_db_error(db_error(OperationalError, message="database is locked")), "locked")
+        self.assertEqual(runner.classify_db_error(db_error(OperationalError)), "other")
+
+    def test_summary_adds_up_the_workers(self):
+        results = [
+            ([0.001, 0.003], Counter({201: 2}), Counter(), 10),
+            ([0.002, 0.004], Counter({201: 1, 500: 1}), Counter({"deadlock": 1}), 10),
+        ]
+
+        report = runner.summarize(2.0, results)
+
+        self.assertEqual(report["ops"], 4)
+        self.assertEqual(report["throughput_ops_s"], 2.0)
+        self.assertEqual(report["statuses"], {"201": 3, "500": 1})
+        self.assertEqual(report["deadlocks"], 1)
+        self.assertEqual(report["queries_per_op"], 5)
+        self.assertEqual(report["latency_ms"]["max"], 4.0)
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "concurrent workers need a server database")
+@test_settings
+class ExecuteTests(TransactionTestCase):
+    def setUp(self):
+        rng = random.Random(0)
+        self.users = workloads.seed_users("t", 4, 10 ** 6)
+        sampler = workloads.RecipientSampler(len(self.users), rng=rng)
+        self.ops = workloads.build_ops("transfer", self.users, 12, sampler, rng)
+
+    def assert_all_paid(self, results):
+        report = runner.summarize(1.0, results)
+        self.assertEqual(report["statuses"], {"201": 12})
+        self.assertEqual(Transaction.objects.count(), 24)
+
+    def test_thread_workers(self):
+        elapsed, results = runner.execute(self.ops, 3)
+
+        self.assertEqual(len(results), 3)
+        self.assert_all_paid(results)
+
+    def test_process_workers_leave_the_parent_connection_usable(self):
+        elapsed, results = runner.execute(self.ops, 3, "process")
+
+        self.assert_all_paid(results)
+        self.assertGreater(workloads.cleanup("t"), 0)
+        self.assertFalse(User.objects.exists())
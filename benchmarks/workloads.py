@@ -0,0 +1,137 @@
+import random
+import uuid
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from users.models import TransactionPin
+from users.utils import issue_pin_token
+from wallets import money_requests
+from wallets.models import Wallet
+from wallets.wallet_ids import create_wallets
+
+
+EMAIL_DOMAIN = "bench.invalid"
+PIN = "1234"
+
+
+class RecipientSampler:
+    """
+    Picks user indexes uniformly, or Zipf-distributed so that index 0 is
+    the hottest wallet, index 1 the next, and so on.
+    """
+
+    def __init__(self, n, distribution="uniform", zipf_s=1.1, rng=None):
+        self.n = n
+        self.rng = rng or random.Random()
+        self._cum_weights = None
+
+        if distribution == "zipf":
+            self._cum_weights = list(accumulate(1 / k ** zipf_s for k in range(1, n + 1)))
+
+    def sample(self, exclude=None):
+        while True:
+            if self._cum_weights is None:
+                index = self.rng.randrange(self.n)
+            else:
+                index = self.rng.choices(range(self.n), cum_weights=self._cum_weights)[0]
+            if index != exclude:
+                return index
+
+
+def seed_users(run_id, count, initial_balance):
+    """
+    Create ``count`` users with wallets and a PIN. Returns one dict per
+    user: user_id, wallet_id and the TransactionPin to issue tokens from.
+    """
+    User = get_user_model()
+    users = []
+
+    with transaction.atomic():
+        for i in range(count):
+            user = User(
+                email=f"bench-{run_id}-{i}@{EMAIL_DOMAIN}",
+                first_name="Bench",
+                last_name=str(i)
+            )
+            user.set_unusable_password()
+            users.append(user)
+        User.objects.bulk_create(users)
+        create_wallets(users)
+
+        pins = []
+        for user in users:
+            pin = TransactionPin(user=user)
+            pin.set_pin(PIN)
+            pins.append(pin)
+        TransactionPin.objects.bulk_create(pins)
+
+        Wallet.objects.filter(user__in=users).update(balance=initial_balance)
+
+    wallet_ids = dict(
+        Wallet.objects.filter(user__in=users).values_list("user_id", "wallet_id")
+    )
+    return [
+        {
+            "user_id": str(pin.user_id),
+            "wallet_id": wallet_ids[pin.user_id],
+            "pin": pin,
+        }
+        for pin in pins
+    ]
+
+
+def build_ops(workload, users, count, sampler, rng, max_amount=500):
+    """
+    Return ``count`` operations as ``(user_id, path, payload)``. Senders
+    and payers are uniform; recipients follow ``sampler``. Setup work
+    (creating money requests) happens here, outside the timed run.
+    """
+    ops = []
+    wallets = {}
+    if workload == "request_accept":
+        wallets = Wallet.objects.in_bulk([u["wallet_id"] for u in users], field_name="wallet_id")
+
+    for _ in range(count):
+        amount = rng.randint(1, max_amount)
+        key = f"bench-{uuid.uuid4().hex}"
+
+        if workload == "credit":
+            user = users[sampler.sample()]
+            ops.append((user["user_id"], "/api/wallets/credit/", {
+                "amount": amount,
+                "idempotency_key": key,
+            }))
+            continue
+
+        sender_index = rng.randrange(len(users))
+        sender = users[sender_index]
+        recipient = users[sampler.sample(exclude=sender_index)]
+
+        if workload == "transfer":
+            ops.append((sender["user_id"], "/api/wallets/transfer/", {
+                "to": recipient["wallet_id"],
+                "amount": amount,
+                "pin_token": issue_pin_token(sender["pin"]),
+                "idempotency_key": key,
+            }))
+        else:
+            # The recipient asks; the sender accepts and pays
+            req = money_requests.create(
+                wallets[recipient["wallet_id"]],
+                wallets[sender["wallet_id"]],
+                amount
+            )
+            ops.append((sender["user_id"], f"/api/wallets/request/{req.request_id}/respond/", {
+                "action": "ACCEPT",
+                "pin_token": issue_pin_token(sender["pin"]),
+            }))
+
+    return ops
+
+
+def cleanup(run_id):
+    """Delete every user (and, by cascade, wallet and ledger row) of a run."""
+    User = get_user_model()
+    return User.objects.filter(email__startswith=f"bench-{run_id}-").delete()[0]
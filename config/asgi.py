@@ -12,5 +12,11 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+os.environ.setdefault('ASYNC_READ_ENDPOINTS', '1')
 
 application = get_asgi_application()
+
+# Off the request path: the first search should not wait for it
+from users import search  # noqa: E402
+
+search.start_index()
@@ -0,0 +1,19 @@
+"""
+Gunicorn settings for the ASGI deployment profile.
+
+    gunicorn -c config/gunicorn_asgi.py config.asgi:application
+
+Each worker runs an event loop, so a single process holds many idle or
+lock-waiting connections; the async read views never block it, and sync
+DRF views run in Django's thread executor.
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+keepalive = 5
+timeout = 30
+graceful_timeout = 30
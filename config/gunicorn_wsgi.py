@@ -0,0 +1,19 @@
+"""
+Gunicorn settings for the WSGI deployment profile (the Procfile).
+
+    gunicorn -c config/gunicorn_wsgi.py config.wsgi
+
+Threaded workers: each process serves WEB_THREADS requests at a time from
+its own database pool, sized to match in config/settings.py.
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+worker_class = "gthread"
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+threads = int(os.environ.get("WEB_THREADS", "4"))
+keepalive = 5
+timeout = 30
+graceful_timeout = 30
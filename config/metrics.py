@@ -0,0 +1,319 @@
+"""
+Request metrics in Prometheus text format.
+
+MetricsMiddleware times every request and, through an execute wrapper on
+each database connection, counts its queries, their time, and the time
+spent in statements that take wallet row locks: SELECT ... FOR UPDATE and
+the ledger's UPDATEs of wallets and wallet shards (mostly waiting for
+those locks, under contention). TransactionPin records PIN hashing time itself, and the
+outbox relay its deliveries.
+
+Each process aggregates in memory. With METRICS_DIR set, every process
+also writes a snapshot to ``<METRICS_DIR>/metrics-<pid>.json`` at most
+every METRICS_FLUSH_SECONDS, and /metrics/ sums all of them, so a scrape
+sees every gunicorn worker. Clear the directory when deploying.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from rest_framework.permissions import IsAdminUser
+from rest_framework.views import APIView
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250)
+
+# name: (type, help, buckets)
+METRICS = {
+    "wallet_http_requests_total": (
+        "counter", "HTTP requests by view, method and status.", None),
+    "wallet_http_request_duration_seconds": (
+        "histogram", "Time to produce a response.", LATENCY_BUCKETS),
+    "wallet_db_queries_per_request": (
+        "histogram", "Database queries per request.", QUERY_BUCKETS),
+    "wallet_db_query_seconds_total": (
+        "counter", "Time spent in database queries.", None),
+    "wallet_db_lock_wait_seconds": (
+        "histogram",
+        "Time per request spent in SELECT ... FOR UPDATE and UPDATEs of wallet and shard rows.",
+        LATENCY_BUCKETS),
+    "wallet_pin_hash_seconds": (
+        "histogram", "Time to hash or check a transaction PIN.", LATENCY_BUCKETS),
+    "wallet_outbox_events_delivered_total": (
+        "counter", "Outbox events delivered by the relay, by sink.", None),
+    "wallet_outbox_delivery_failures_total": (
+        "counter", "Outbox batches a sink failed to take.", None),
+    "wallet_outbox_batch_seconds": (
+        "histogram", "Time for a sink to take one outbox batch.", LATENCY_BUCKETS),
+    "wallet_notifications_sent_total": (
+        "counter", "Notifications delivered, by endpoint.", None),
+    "wallet_notifications_dropped_total": (
+        "counter", "Notifications dropped: queue full or retries exhausted.", None),
+    "wallet_notification_batch_seconds": (
+        "histogram", "Time to POST one notification batch.", LATENCY_BUCKETS),
+}
+
+
+class Registry:
+    """
+    Counters are floats; histograms are a list of per-bucket counts (the
+    last one is +Inf) followed by the sum. Keys are ``(name, labels)``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}
+        self._flushed_at = 0.0
+
+    def inc(self, name, labels, amount=1):
+        key = (name, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        key = (name, labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(buckets) + 2)
+            series[bisect_left(buckets, value)] += 1
+            series[-1] += value
+
+    def snapshot(self):
+        with self._lock:
+            return [
+                [name, list(labels), list(value) if isinstance(value, list) else value]
+                for (name, labels), value in self._values.items()
+            ]
+
+    def flush(self):
+        directory = getattr(settings, "METRICS_DIR", None)
+        if not directory:
+            return
+
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"metrics-{os.getpid()}.json")
+        with open(f"{path}.tmp", "w") as out:
+            json.dump(self.snapshot(), out)
+        os.replace(f"{path}.tmp", path)
+        self._flushed_at = time.monotonic()
+
+    def maybe_flush(self):
+        interval = getattr(settings, "METRICS_FLUSH_SECONDS", 10)
+        if time.monotonic() - self._flushed_at >= interval:
+            self.flush()
+
+
+registry = Registry()
+
+
+def _snapshots():
+    # Every process's last snapshot, or just ours without METRICS_DIR
+    directory = getattr(settings, "METRICS_DIR", None)
+    if not directory:
+        return [registry.snapshot()]
+
+    registry.flush()
+    snapshots = []
+    for name in os.listdir(directory):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue  # a worker that just went away
+    return snapshots
+
+
+def collect():
+    merged = {}
+    for snapshot in _snapshots():
+        for name, labels, value in snapshot:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            if key not in merged:
+                merged[key] = value
+            elif isinstance(value, list):
+                merged[key] = [a + b for a, b in zip(merged[key], value)]
+            else:
+                merged[key] += value
+    return merged
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    inner = ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in pairs
+    )
+    return "{" + inner + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render():
+    merged = collect()
+    lines = []
+
+    for name, (kind, help_text, buckets) in METRICS.items():
+        series = sorted((labels, value) for (n, labels), value in merged.items() if n == name)
+        if not series:
+            continue
+
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+        for labels, value in series:
+            if kind == "counter":
+                lines.append(f"{name}{_labels(labels)} {_number(value)}")
+                continue
+
+            cumulative = 0
+            for bound, count in zip((*buckets, "+Inf"), value[:-1]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels((*labels, ('le', bound)))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(value[-1])}")
+            lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+
+    return "\n".join(lines) + "\n"
+
+
+def observe_pin_hash(operation, seconds):
+    registry.observe("wallet_pin_hash_seconds", (("operation", operation),), seconds)
+
+
+class _RequestStats:
+    __slots__ = ("queries", "db_time", "lock_wait")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.lock_wait = 0.0
+
+
+# The ledger's guarded balance UPDATEs lock their rows without a SELECT
+# ... FOR UPDATE first, so they count as lock waits too
+LOCKING_UPDATES = ('UPDATE "wallets_wallet" ', 'UPDATE "wallets_walletshard" ')
+
+# Copied into sync_to_async threads, so queries from async views count too
+_current = ContextVar("metrics_request", default=None)
+
+
+def _observe_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        stats.queries += 1
+        stats.db_time += elapsed
+        if " FOR UPDATE" in sql or sql.startswith(LOCKING_UPDATES):
+            stats.lock_wait += elapsed
+
+
+def _install(connection):
+    # At the front: connection.execute_wrapper() blocks pop from the end
+    if _observe_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _observe_query)
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    _install(connection)
+
+
+connection_created.connect(_on_connection_created)
+
+
+def _view_label(request):
+    # The route pattern, not the path, keeps the label set small
+    match = getattr(request, "resolver_match", None)
+    return match.route if match else "unmatched"
+
+
+def _record(request, response, stats, elapsed):
+    view = (("view", _view_label(request)),)
+
+    registry.inc(
+        "wallet_http_requests_total",
+        (*view, ("method", request.method), ("status", str(response.status_code)))
+    )
+    registry.observe("wallet_http_request_duration_seconds", view, elapsed)
+    registry.observe("wallet_db_queries_per_request", view, stats.queries)
+    if stats.db_time:
+        registry.inc("wallet_db_query_seconds_total", view, stats.db_time)
+    if stats.lock_wait:
+        registry.observe("wallet_db_lock_wait_seconds", view, stats.lock_wait)
+
+    registry.maybe_flush()
+
+
+class MetricsMiddleware:
+    # Streaming responses are timed up to their first byte; queries made
+    # while the body streams are not counted
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+        for connection in connections.all(initialized_only=True):
+            _install(connection)
+        if getattr(settings, "METRICS_DIR", None):
+            atexit.register(registry.flush)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        stats = _RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        _record(request, response, stats, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        stats = _RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        _record(request, response, stats, time.perf_counter() - started)
+        return response
+
+
+class MetricsAPIView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(render(), content_type=CONTENT_TYPE)
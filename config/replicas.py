@@ -0,0 +1,118 @@
+"""
+Read replicas with read-your-writes.
+
+ReplicaMiddleware picks one replica for each GET/HEAD/OPTIONS request and
+ReplicaRouter sends that request's reads there. Everything else reads
+from the primary:
+
+- writes and unsafe requests
+- reads inside transaction.atomic()
+- management commands and other work outside a request
+
+After an unsafe request the client gets a ``primary_until`` cookie, so
+its reads stay on the primary for REPLICA_STICKY_SECONDS. That should
+cover the replicas' lag and lets a user see their own writes.
+
+Replicas are the non-default entries of DATABASES; see
+DATABASE_REPLICA_URLS in settings.
+"""
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+COOKIE_NAME = "primary_until"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Copied into sync_to_async threads, like the metrics context
+_replica = ContextVar("db_replica", default=None)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias != DEFAULT_DB_ALIAS]
+
+
+def _sticky_seconds():
+    return getattr(settings, "REPLICA_STICKY_SECONDS", 10)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = _replica.get()
+        # A read inside a transaction must see that transaction's writes
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every alias holds the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def _pinned(request):
+    try:
+        until = float(request.COOKIES[COOKIE_NAME])
+    except (KeyError, ValueError):
+        return False
+    # Never honour more than one window ahead, whatever the client sends
+    now = time.time()
+    return now < until <= now + _sticky_seconds()
+
+
+class ReplicaMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.replicas = replica_aliases()
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def _choose(self, request):
+        if not self.replicas or request.method not in SAFE_METHODS or _pinned(request):
+            return None
+        return random.choice(self.replicas)
+
+    def _finish(self, request, response):
+        if request.method not in SAFE_METHODS:
+            seconds = _sticky_seconds()
+            response.set_cookie(
+                COOKIE_NAME,
+                f"{time.time() + seconds:.3f}",
+                max_age=seconds,
+                httponly=True,
+                samesite="Lax",
+                secure=request.is_secure()
+            )
+        return response
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        token = _replica.set(self._choose(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            _replica.reset(token)
+        return self._finish(request, response)
+
+    async def __acall__(self, request):
+        token = _replica.set(self._choose(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _replica.reset(token)
+        return self._finish(request, response)
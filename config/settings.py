@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 from pathlib import Path
 import os
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -46,6 +48,8 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'config.metrics.MetricsMiddleware',
+    'config.replicas.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -85,6 +89,65 @@ DATABASES = {
         default=os.environ.get("DATABASE_URL")
     )
 }
+
+# Read replicas for GET requests (config/replicas.py), as comma-separated
+# URLs. Pointing one at the primary's own SQLite file exercises the
+# routing locally.
+for _i, _url in enumerate(os.environ.get("DATABASE_REPLICA_URLS", "").split(","), 1):
+    if _url.strip():
+        DATABASES[f"replica_{_i}"] = {
+            **dj_database_url.parse(_url.strip()),
+            "TEST": {"MIRROR": "default"},
+        }
+DATABASE_ROUTERS = ["config.replicas.ReplicaRouter"]
+
+# Seconds a client's reads stay on the primary after it writes; keep it
+# above the replicas' usual lag
+REPLICA_STICKY_SECONDS = 10
+
+# Connection management, so no request pays for connection setup:
+#
+# - PostgreSQL, DB_POOL=1 (default): psycopg 3's pool, one per worker
+#   process. A process serves at most WEB_THREADS requests at once, each
+#   holding one connection, so the pool defaults to that many; keep
+#   workers x DB_POOL_MAX_SIZE (plus management commands) under the
+#   server's max_connections.
+# - PostgreSQL, DB_POOL=0: one persistent connection per thread, reused for
+#   DB_CONN_MAX_AGE seconds and checked before reuse after an error.
+# - SQLite (local runs): WAL journal so reads do not wait on the writer,
+#   and IMMEDIATE transactions so concurrent writers queue on busy_timeout
+#   instead of failing with "database is locked".
+WEB_THREADS = int(os.environ.get("WEB_THREADS", "4"))
+
+
+def _configure_connections(db):
+    if db.get("ENGINE") == "django.db.backends.postgresql":
+        if os.environ.get("DB_POOL", "1") == "1":
+            db.setdefault("OPTIONS", {})["pool"] = {
+                "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", "1")),
+                "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", str(WEB_THREADS))),
+                # Seconds a request waits for a free connection before erroring
+                "timeout": float(os.environ.get("DB_POOL_TIMEOUT", "10")),
+                # Idle connections above min_size are closed after this long
+                "max_idle": float(os.environ.get("DB_POOL_MAX_IDLE", "300")),
+                "max_lifetime": float(os.environ.get("DB_POOL_MAX_LIFETIME", "3600")),
+            }
+            db["CONN_MAX_AGE"] = 0  # the pool owns connection lifetime
+        else:
+            db["CONN_MAX_AGE"] = int(os.environ.get("DB_CONN_MAX_AGE", "600"))
+            db["CONN_HEALTH_CHECKS"] = True
+    elif db.get("ENGINE") == "django.db.backends.sqlite3":
+        db.setdefault("OPTIONS", {}).update({
+            "init_command": "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL",
+            "transaction_mode": "IMMEDIATE",
+            "timeout": 20,
+        })
+
+
+# Replicas get the same pool settings
+for _db in DATABASES.values():
+    _configure_connections(_db)
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -137,5 +200,166 @@ CSRF_COOKIE_SAMESITE = 'Lax'
 AUTH_USER_MODEL = "users.User"
 
 REST_FRAMEWORK = {
-    "EXCEPTION_HANDLER": "wallets.utils.custom_exception_handler"
+    "EXCEPTION_HANDLER": "wallets.utils.custom_exception_handler",
+    # Same output as JSONRenderer, encoded by orjson when it is installed
+    "DEFAULT_RENDERER_CLASSES": [
+        "config.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
 }
+
+# Idempotency keys: stored responses are replayed for this long, then swept
+# by `manage.py sweep_idempotency_keys`
+from datetime import timedelta
+
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+IDEMPOTENCY_CACHE_SIZE = 10000
+
+# Lifetime in seconds of verified-PIN tokens from /api/users/verify-pin/.
+# Each token pays for one idempotency key; `manage.py sweep_pin_tokens`
+# drops the records of spent tokens once they have expired
+PIN_TOKEN_TTL = 300
+
+# ASGI profile: serve balance/history/search/request-list (and verify-pin)
+# from native async views. config/asgi.py switches this on.
+ASYNC_READ_ENDPOINTS = os.environ.get("ASYNC_READ_ENDPOINTS", "0") == "1"
+
+# Threads available for PIN hashing in the async views
+PIN_HASH_WORKERS = int(os.environ.get("PIN_HASH_WORKERS", "4"))
+
+# Hosts serving the app, and the Redis server shared by them (the
+# "balances" and "auth" caches default to it when set). Django's RedisCache needs the redis package.
+WEB_HOSTS = int(os.environ.get("WEB_HOSTS", "1"))
+REDIS_URL = os.environ.get("REDIS_URL") or None
+
+# Balance snapshots for /api/users/balance/. Ledger writes refresh them
+# after commit, so every host must share this cache too (see WEB_HOSTS);
+# the file backend only covers the worker processes of one host. Point
+# BALANCE_CACHE_BACKEND at locmem for single-process runs.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "balances": {
+        "BACKEND": os.environ.get(
+            "BALANCE_CACHE_BACKEND",
+            "django.core.cache.backends.redis.RedisCache" if REDIS_URL
+            else "django.core.cache.backends.filebased.FileBasedCache"
+        ),
+        "LOCATION": os.environ.get(
+            "BALANCE_CACHE_LOCATION", REDIS_URL or "/tmp/digital_wallet_balances"
+        ),
+        "TIMEOUT": 300,
+    },
+    # Sessions and request principals. Logouts and PIN changes invalidate
+    # entries here, so every host serving requests must use the same
+    # cache: see WEB_HOSTS below
+    "auth": {
+        "BACKEND": os.environ.get(
+            "AUTH_CACHE_BACKEND",
+            "django.core.cache.backends.redis.RedisCache" if REDIS_URL
+            else "django.core.cache.backends.filebased.FileBasedCache"
+        ),
+        "LOCATION": os.environ.get(
+            "AUTH_CACHE_LOCATION", REDIS_URL or "/tmp/digital_wallet_auth"
+        ),
+        "TIMEOUT": 300,
+    },
+}
+for _alias in ("balances", "auth"):
+    if CACHES[_alias]["BACKEND"].endswith("FileBasedCache"):
+        CACHES[_alias]["OPTIONS"] = {"MAX_ENTRIES": 100000}
+
+# File and locmem caches live on one host, and an invalidation written
+# there never reaches the others. They are fine while a single host serves
+# the app (the default); with WEB_HOSTS > 1 the shared caches must be
+# Redis or Memcached, set through REDIS_URL or the *_CACHE_BACKEND and
+# *_CACHE_LOCATION variables.
+_HOST_LOCAL_CACHES = (
+    "django.core.cache.backends.filebased.FileBasedCache",
+    "django.core.cache.backends.locmem.LocMemCache",
+)
+if WEB_HOSTS > 1:
+    for _alias, _env in (("balances", "BALANCE"), ("auth", "AUTH")):
+        if CACHES[_alias]["BACKEND"] in _HOST_LOCAL_CACHES:
+            raise ImproperlyConfigured(
+                f"WEB_HOSTS is {WEB_HOSTS} but the {_alias!r} cache is host-local "
+                f"({CACHES[_alias]['BACKEND']}); set REDIS_URL or "
+                f"{_env}_CACHE_BACKEND to a shared backend"
+            )
+
+BALANCE_CACHE_ALIAS = "balances"
+BALANCE_CACHE_TIMEOUT = 300
+
+# Session reads come from the "auth" cache, falling back to django_session
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+SESSION_CACHE_ALIAS = "auth"
+
+# request.user comes with its wallet and PIN row from one joined query,
+# cached for PRINCIPAL_CACHE_TIMEOUT seconds (users.principal). ModelBackend
+# stays listed so sessions created before PrincipalBackend keep working.
+AUTHENTICATION_BACKENDS = [
+    "users.backends.PrincipalBackend",
+    "django.contrib.auth.backends.ModelBackend",
+]
+PRINCIPAL_CACHE_ALIAS = "auth"
+PRINCIPAL_CACHE_TIMEOUT = 30
+
+# Full rebuild interval for the in-memory user search index (non-Postgres)
+SEARCH_INDEX_REFRESH_SECONDS = 300
+
+# `manage.py reconcile` checkpoints the ledger up to now minus this lag, so
+# transactions still being committed are picked up by the next run
+RECONCILE_LAG = timedelta(minutes=5)
+
+# Transactions newer than this many months stay in the hot table;
+# `manage.py archive_transactions` moves older months to the archive and
+# writes them as gzipped CSV to TRANSACTION_ARCHIVE_DIR
+TRANSACTION_HOT_MONTHS = 12
+TRANSACTION_ARCHIVE_DIR = os.environ.get(
+    "TRANSACTION_ARCHIVE_DIR", os.path.join(BASE_DIR, "archive")
+)
+
+# Request metrics, served to staff at /metrics/. Set METRICS_DIR (one
+# directory per host, cleared on deploy) so every worker process's numbers
+# are summed; otherwise a scrape only sees the process that answers it.
+METRICS_DIR = os.environ.get("METRICS_DIR") or None
+METRICS_FLUSH_SECONDS = 10
+
+# Wallet IDs are a keyed permutation of a sequence (wallets.wallet_ids).
+# Set the key once and never change it; each process reserves sequence
+# numbers WALLET_ID_BLOCK_SIZE at a time.
+WALLET_ID_KEY = os.environ.get("WALLET_ID_KEY") or None
+WALLET_ID_BLOCK_SIZE = 100
+
+# Outbox relay (`manage.py run_outbox_relay`): where events go, and how
+# long delivered events are kept before the relay deletes them
+OUTBOX_FILE_PATH = os.environ.get(
+    "OUTBOX_FILE_PATH", os.path.join(BASE_DIR, "outbox", "events.jsonl")
+)
+OUTBOX_WEBHOOK_URL = os.environ.get("OUTBOX_WEBHOOK_URL")
+OUTBOX_WEBHOOK_SECRET = os.environ.get("OUTBOX_WEBHOOK_SECRET")
+OUTBOX_RETENTION = timedelta(days=7)
+
+# Webhooks told about incoming transfers and money requests, after commit
+# and off the request path (wallets.notifications). Each endpoint gets
+# "concurrency" sender threads and a queue of NOTIFICATION_QUEUE_SIZE;
+# events beyond that are dropped. The outbox is the durable feed.
+NOTIFICATION_ENDPOINTS = [
+    {
+        "url": url.strip(),
+        "secret": os.environ.get("NOTIFICATION_WEBHOOK_SECRET"),
+        "concurrency": int(os.environ.get("NOTIFICATION_CONCURRENCY", "4")),
+    }
+    for url in os.environ.get("NOTIFICATION_WEBHOOK_URLS", "").split(",")
+    if url.strip()
+]
+NOTIFICATION_QUEUE_SIZE = 10000
+NOTIFICATION_BATCH_SIZE = 50
+NOTIFICATION_BATCH_WAIT = 0.05  # seconds to wait for a batch to fill
+NOTIFICATION_MAX_RETRIES = 5
+
+# `manage.py rollup_wallet_summaries` folds transactions up to now minus
+# this lag into daily summaries; /api/wallets/summary/ reads newer ones
+# from the ledger
+SUMMARY_LAG = timedelta(minutes=5)
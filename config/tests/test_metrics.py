@@ -0,0 +1,99 @@
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from config import metrics
+from users.models import User
+from wallets.tests import make_user, test_settings
+
+
+def sample(text, line_start):
+    for line in text.splitlines():
+        if line.startswith(line_start):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"no sample {line_start!r} in:\n{text}")
+
+
+class RegistryTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(metrics, "registry", metrics.Registry())
+        self.registry = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_histograms_render_cumulative_buckets(self):
+        for seconds in (0.003, 0.02, 0.02, 30):
+            metrics.observe_pin_hash("verify", seconds)
+
+        text = metrics.render()
+
+        self.assertIn("# TYPE wallet_pin_hash_seconds histogram", text)
+        self.assertEqual(sample(text, 'wallet_pin_hash_seconds_bucket{operation="verify",le="0.005"}'), 1)
+        self.assertEqual(sample(text, 'wallet_pin_hash_seconds_bucket{operation="verify",le="0.025"}'), 3)
+        self.assertEqual(sample(text, 'wallet_pin_hash_seconds_bucket{operation="verify",le="10"}'), 3)
+        self.assertEqual(sample(text, 'wallet_pin_hash_seconds_bucket{operation="verify",le="+Inf"}'), 4)
+        self.assertEqual(sample(text, 'wallet_pin_hash_seconds_count{operation="verify"}'), 4)
+        self.assertAlmostEqual(sample(text, 'wallet_pin_hash_seconds_sum{operation="verify"}'), 30.043)
+
+    def test_label_values_are_escaped(self):
+        self.registry.inc("wallet_notifications_sent_total", (("endpoint", 'a"b\\c'),))
+
+        self.assertIn('wallet_notifications_sent_total{endpoint="a\\"b\\\\c"} 1', metrics.render())
+
+    def test_metrics_dir_sums_every_process(self):
+        labels = (("sink", "log"),)
+        self.registry.inc("wallet_outbox_events_delivered_total", labels, 2)
+
+        with tempfile.TemporaryDirectory() as tmp, override_settings(METRICS_DIR=tmp):
+            # Another worker's last snapshot, and one caught mid-write
+            with open(os.path.join(tmp, "metrics-1.json"), "w") as f:
+                json.dump([["wallet_outbox_events_delivered_total", [["sink", "log"]], 5]], f)
+            with open(os.path.join(tmp, "metrics-2.json"), "w") as f:
+                f.write("[[")
+
+            text = metrics.render()
+
+        self.assertEqual(sample(text, 'wallet_outbox_events_delivered_total{sink="log"}'), 7)
+
+
+@test_settings
+class MiddlewareTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(metrics, "registry", metrics.Registry())
+        self.registry = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.alice = make_user("alice@example.com", 1000)
+        make_user("bob@example.com")
+        self.client = APIClient()
+
+    def test_requests_are_counted_by_route(self):
+        self.client.force_authenticate(self.alice)
+        response = self.client.post(
+            "/api/wallets/transfer/",
+            {"to": "bob@example.com", "amount": 100, "pin": "1234", "idempotency_key": "t1"},
+            format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+
+        text = metrics.render()
+
+        route = 'view="api/wallets/transfer/"'
+        self.assertEqual(sample(text, f'wallet_http_requests_total{{{route},method="POST",status="201"}}'), 1)
+        self.assertGreater(sample(text, f"wallet_db_queries_per_request_sum{{{route}}}"), 0)
+        self.assertEqual(sample(text, f"wallet_db_lock_wait_seconds_count{{{route}}}"), 1)
+        self.assertEqual(sample(text, 'wallet_pin_hash_seconds_count{operation="verify"}'), 1)
+
+    def test_endpoint_is_for_staff(self):
+        self.client.force_authenticate(self.alice)
+        self.assertEqual(self.client.get("/metrics/").status_code, 403)
+
+        User.objects.filter(pk=self.alice.pk).update(is_staff=True)
+        self.client.force_authenticate(User.objects.get(pk=self.alice.pk))
+        response = self.client.get("/metrics/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], metrics.CONTENT_TYPE)
+        self.assertIn('wallet_http_requests_total{view="metrics/",method="GET",status="403"} 1', response.content.decode())
@@ -0,0 +1,48 @@
+import datetime
+import decimal
+import uuid
+from unittest import mock
+
+from django.test import SimpleTestCase
+from rest_framework.renderers import JSONRenderer
+
+from config import renderers
+
+
+PAYLOAD = {
+    "text": "héllo world ",
+    "none": None,
+    "int": 5,
+    "float": 1.5,
+    "decimal": decimal.Decimal("12.30"),
+    "uuid": uuid.UUID(int=5),
+    "datetime": datetime.datetime(2026, 10, 18, 1, 2, 3, 456789, tzinfo=datetime.timezone.utc),
+    "date": datetime.date(2026, 1, 2),
+    "nested": [1, {"ok": True}],
+    3: "int key",
+}
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def test_output_matches_the_standard_renderer_byte_for_byte(self):
+        self.assertIsNotNone(renderers.orjson)
+        self.assertEqual(
+            renderers.FastJSONRenderer().render(PAYLOAD),
+            JSONRenderer().render(PAYLOAD)
+        )
+
+    def test_indented_output_uses_the_standard_renderer(self):
+        context = {"indent": 4}
+
+        with mock.patch.object(renderers.orjson, "dumps") as dumps:
+            rendered = renderers.FastJSONRenderer().render(PAYLOAD, "application/json", context)
+
+        dumps.assert_not_called()
+        self.assertEqual(rendered, JSONRenderer().render(PAYLOAD, "application/json", context))
+
+    def test_works_without_orjson(self):
+        with mock.patch.object(renderers, "orjson", None):
+            rendered = renderers.FastJSONRenderer().render(PAYLOAD)
+
+        self.assertEqual(rendered, JSONRenderer().render(PAYLOAD))
+        self.assertEqual(renderers.FastJSONRenderer().render(None), b"")
@@ -0,0 +1,120 @@
+import time
+
+from asgiref.sync import async_to_sync
+from django.db import DEFAULT_DB_ALIAS, router, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase
+
+from config import replicas
+from users.models import User
+from wallets.tests import make_user, reset_process_state, test_settings
+
+
+class ReplicaRouterTests(TransactionTestCase):
+    def read_alias(self):
+        return router.db_for_read(User)
+
+    def test_reads_go_to_the_chosen_replica(self):
+        token = replicas._replica.set("replica_1")
+        try:
+            self.assertEqual(self.read_alias(), "replica_1")
+            self.assertEqual(router.db_for_write(User), DEFAULT_DB_ALIAS)
+        finally:
+            replicas._replica.reset(token)
+
+    def test_reads_inside_a_transaction_stay_on_the_primary(self):
+        token = replicas._replica.set("replica_1")
+        try:
+            with transaction.atomic():
+                self.assertEqual(self.read_alias(), DEFAULT_DB_ALIAS)
+        finally:
+            replicas._replica.reset(token)
+
+    def test_reads_outside_a_request_use_the_primary(self):
+        self.assertEqual(self.read_alias(), DEFAULT_DB_ALIAS)
+
+    def test_only_the_primary_is_migrated(self):
+        r = replicas.ReplicaRouter()
+        self.assertTrue(r.allow_migrate(DEFAULT_DB_ALIAS, "wallets"))
+        self.assertFalse(r.allow_migrate("replica_1", "wallets"))
+
+
+class ReplicaMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.seen = []
+
+    def middleware(self, replica_aliases=("replica_1",)):
+        def get_response(request):
+            self.seen.append(replicas._replica.get())
+            return HttpResponse()
+
+        middleware = replicas.ReplicaMiddleware(get_response)
+        middleware.replicas = list(replica_aliases)
+        return middleware
+
+    def test_safe_requests_use_a_replica(self):
+        response = self.middleware()(self.factory.get("/"))
+
+        self.assertEqual(self.seen, ["replica_1"])
+        self.assertNotIn(replicas.COOKIE_NAME, response.cookies)
+        self.assertIsNone(replicas._replica.get())
+
+    def test_no_replicas_means_the_primary(self):
+        self.middleware(replica_aliases=())(self.factory.get("/"))
+
+        self.assertEqual(self.seen, [None])
+
+    def test_unsafe_requests_pin_the_client_to_the_primary(self):
+        response = self.middleware()(self.factory.post("/"))
+
+        self.assertEqual(self.seen, [None])
+        cookie = response.cookies[replicas.COOKIE_NAME]
+        self.assertTrue(cookie["httponly"])
+        self.assertAlmostEqual(float(cookie.value), time.time() + 10, delta=2)
+
+    def test_pinned_client_reads_from_the_primary(self):
+        request = self.factory.get("/")
+        request.COOKIES[replicas.COOKIE_NAME] = str(time.time() + 5)
+
+        self.middleware()(request)
+
+        self.assertEqual(self.seen, [None])
+
+    def test_pin_is_capped_at_one_window(self):
+        for until in (time.time() - 1, time.time() + 3600, "nonsense"):
+            request = self.factory.get("/")
+            request.COOKIES[replicas.COOKIE_NAME] = str(until)
+            self.middleware()(request)
+
+        self.assertEqual(self.seen, ["replica_1"] * 3)
+
+    def test_async_requests_use_a_replica(self):
+        async def get_response(request):
+            self.seen.append(replicas._replica.get())
+            return HttpResponse()
+
+        middleware = replicas.ReplicaMiddleware(get_response)
+        middleware.replicas = ["replica_1"]
+
+        async_to_sync(middleware)(self.factory.get("/"))
+        response = async_to_sync(middleware)(self.factory.post("/"))
+
+        self.assertEqual(self.seen, ["replica_1", None])
+        self.assertIn(replicas.COOKIE_NAME, response.cookies)
+
+
+@test_settings
+class StickyCookieTests(TestCase):
+    def setUp(self):
+        reset_process_state()
+        self.client.force_login(make_user("alice@example.com", 1000))
+
+    def test_a_write_sets_the_cookie(self):
+        response = self.client.post(
+            "/api/wallets/credit/", {"amount": 100, "idempotency_key": "c1"}, content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertIn(replicas.COOKIE_NAME, response.cookies)
+        self.assertNotIn(replicas.COOKIE_NAME, self.client.get("/api/users/balance/").cookies)
@@ -0,0 +1,59 @@
+import os
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from config import settings
+
+
+POSTGRES = "django.db.backends.postgresql"
+SQLITE = "django.db.backends.sqlite3"
+
+
+class ConnectionSettingsTests(SimpleTestCase):
+    def configure(self, engine, **env):
+        db = {"ENGINE": engine, "OPTIONS": {"sslmode": "require"}}
+        # Only the variables this test sets, not whatever the shell has
+        environ = {k: v for k, v in os.environ.items() if not k.startswith("DB_")}
+        with mock.patch.dict(os.environ, {**environ, **env}, clear=True):
+            settings._configure_connections(db)
+        return db
+
+    def test_postgres_is_pooled_by_default(self):
+        db = self.configure(POSTGRES)
+
+        self.assertEqual(db["CONN_MAX_AGE"], 0)
+        self.assertEqual(db["OPTIONS"]["sslmode"], "require")
+        self.assertEqual(db["OPTIONS"]["pool"], {
+            "min_size": 1,
+            "max_size": settings.WEB_THREADS,
+            "timeout": 10.0,
+            "max_idle": 300.0,
+            "max_lifetime": 3600.0,
+        })
+
+    def test_pool_size_comes_from_the_environment(self):
+        db = self.configure(POSTGRES, DB_POOL_MAX_SIZE="12", DB_POOL_TIMEOUT="2.5")
+
+        self.assertEqual(db["OPTIONS"]["pool"]["max_size"], 12)
+        self.assertEqual(db["OPTIONS"]["pool"]["timeout"], 2.5)
+
+    def test_unpooled_postgres_keeps_persistent_connections(self):
+        db = self.configure(POSTGRES, DB_POOL="0", DB_CONN_MAX_AGE="60")
+
+        self.assertNotIn("pool", db["OPTIONS"])
+        self.assertEqual(db["CONN_MAX_AGE"], 60)
+        self.assertTrue(db["CONN_HEALTH_CHECKS"])
+
+    def test_sqlite_runs_in_wal_mode_with_immediate_transactions(self):
+        db = self.configure(SQLITE)
+
+        self.assertIn("journal_mode=WAL", db["OPTIONS"]["init_command"])
+        self.assertEqual(db["OPTIONS"]["transaction_mode"], "IMMEDIATE")
+        self.assertEqual(db["OPTIONS"]["timeout"], 20)
+        self.assertNotIn("CONN_MAX_AGE", db)
+
+    def test_other_engines_are_left_alone(self):
+        db = self.configure("django.db.backends.mysql")
+
+        self.assertEqual(db, {"ENGINE": "django.db.backends.mysql", "OPTIONS": {"sslmode": "require"}})
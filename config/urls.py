@@ -18,10 +18,13 @@ from django.contrib import admin
 from django.urls import path,include
 from django.views.generic import TemplateView
 
+from config.metrics import MetricsAPIView
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path("", TemplateView.as_view(template_name="index.html"), name="home"),
     path("api/users/", include("users.urls")),
     path("api/wallets/", include("wallets.urls")),
+    path("metrics/", MetricsAPIView.as_view()),
 ]
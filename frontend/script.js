@@ -3,6 +3,8 @@
 ===================== */
 let hasPin = false;
 let isSignup = false;
+let pinToken = null;
+let pinTokenExpiry = 0;
 
 /* =====================
    AUTH TOGGLE
@@ -137,6 +139,9 @@ function hideApp() {
 
 function resetAppState() {
 
+  pinToken = null;
+  pinTokenExpiry = 0;
+
   /* =========================
      1️⃣ Reset Landing Forms
   ========================== */
@@ -423,7 +428,13 @@ async function transferMoney() {
   const pin = document.getElementById("transfer-pin").value;
   const msg = document.getElementById("transfer-message");
 
-  if (!to || isNaN(amount)  || !pin) return;
+  if (!to || isNaN(amount)) return;
+
+  const auth = await getPinAuth(pin);
+  if (!auth || auth.error) {
+    msg.innerText = auth ? auth.error : "Enter your transaction PIN";
+    return;
+  }
 
   const res = await fetch("/api/wallets/transfer/", {
     method: "POST",
@@ -435,7 +446,7 @@ async function transferMoney() {
     body: JSON.stringify({
       to,
       amount: amount * 100,
-      pin,
+      ...auth,
       idempotency_key: `transfer-${Date.now()}`
     })
   });
@@ -593,10 +604,15 @@ function renderList(id, list, actionable) {
 }
 
 async function respondRequest(id, action) {
-  const payload = { action };
+  let payload = { action };
   if (action === "ACCEPT") {
-    payload.pin = prompt("Enter PIN");
-    if (!payload.pin) return;
+    const auth = await getPinAuth(pinToken && Date.now() < pinTokenExpiry ? "" : prompt("Enter PIN"));
+    if (!auth) return;
+    if (auth.error) {
+      alert(auth.error);
+      return;
+    }
+    payload = { ...payload, ...auth };
   }
 
   const res=await fetch(`/api/wallets/request/${id}/respond/`, {
@@ -619,6 +635,33 @@ async function respondRequest(id, action) {
 /* =====================
    UTIL
 ===================== */
+
+// Swap a typed PIN for a short-lived token so later payments skip the PIN
+async function getPinAuth(pin) {
+  if (pin) {
+    const res = await fetch("/api/users/verify-pin/", {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+        "X-CSRFToken": getCsrfToken()
+      },
+      credentials: "same-origin",
+      body: JSON.stringify({ pin })
+    });
+
+    const data = await res.json().catch(() => ({}));
+    if (!res.ok) return { error: data.detail || "PIN verification failed" };
+
+    pinToken = data.pin_token;
+    pinTokenExpiry = Date.now() + (data.expires_in - 10) * 1000;
+  }
+
+  if (pinToken && Date.now() < pinTokenExpiry) {
+    return { pin_token: pinToken };
+  }
+  return null;
+}
+
 function getCsrfToken() {
   return document.cookie
     .split(";")
@@ -632,11 +675,19 @@ window.addEventListener("DOMContentLoaded", () => {
 });
 
 
-async function loadTransactions() {
+async function loadTransactions(cursor = null) {
   const listEl = document.getElementById("history-list");
-  listEl.innerHTML = "<li>Loading...</li>";
 
-  const res = await fetch("/api/wallets/transactions/", {
+  if (!cursor) {
+    listEl.innerHTML = "<li>Loading...</li>";
+  }
+  document.getElementById("history-more")?.remove();
+
+  const url = cursor
+    ? `/api/wallets/transactions/?cursor=${encodeURIComponent(cursor)}`
+    : "/api/wallets/transactions/";
+
+  const res = await fetch(url, {
     credentials: "same-origin",
   });
 
@@ -646,20 +697,34 @@ async function loadTransactions() {
   }
 
   const data = await res.json();
-  listEl.innerHTML = "";
+  const txns = Array.isArray(data) ? data : (data.results || []);
 
-  if (!Array.isArray(data) || data.length === 0) {
+  if (!cursor) {
+    listEl.innerHTML = "";
+  }
+
+  if (!cursor && txns.length === 0) {
     listEl.innerHTML = "<li>No transactions</li>";
     return;
   }
 
-  data.forEach(tx => {
+  txns.forEach(tx => {
     const li = document.createElement("li");
     const direction = tx.type.toUpperCase() === "CREDIT" ? "Received from" : "Sent to";
     li.innerText = `${tx.timestamp} | ${tx.type.toUpperCase()} | ₹${tx.amount} | ${direction}: ${tx.counterparty_email} | Txn ID: ${tx.reference}`;
 
     listEl.appendChild(li);
   });
+
+  if (data.next) {
+    const li = document.createElement("li");
+    li.id = "history-more";
+    const btn = document.createElement("button");
+    btn.innerText = "Load more";
+    btn.onclick = () => loadTransactions(data.next);
+    li.appendChild(btn);
+    listEl.appendChild(li);
+  }
 }
 async function loadBalance() {
   const el = document.getElementById("balance-display");
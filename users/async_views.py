@@ -0,0 +1,106 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET, require_POST
+
+from users import search
+from users.hashing import averify_pin
+from users.models import TransactionPin
+from users.utils import issue_pin_token, get_pin_token_ttl, PIN_TOKEN_SCOPES
+from wallets import balance_cache
+
+User = get_user_model()
+
+
+# Async twins of the read endpoints in users/views.py, mounted in place of
+# them when ASYNC_READ_ENDPOINTS is on (the ASGI profile). Responses match
+# the DRF views field for field.
+
+def _not_authenticated():
+    return JsonResponse(
+        {"detail": "Authentication credentials were not provided."},
+        status=403
+    )
+
+
+@require_GET
+async def check_balance(request):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return _not_authenticated()
+
+    snapshot = await balance_cache.aget_snapshot(user)
+    return JsonResponse({**snapshot, "balance": f"{snapshot['balance']/100:.2f}"})
+
+
+@require_GET
+async def search_users(request):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return _not_authenticated()
+
+    q = request.GET.get("q", "").strip()
+    if not q:
+        return JsonResponse([], safe=False)
+
+    try:
+        limit = int(request.GET.get("limit", search.DEFAULT_LIMIT))
+    except ValueError:
+        limit = search.DEFAULT_LIMIT
+
+    results = await sync_to_async(search.search_users)(q, user.pk, limit)
+    return JsonResponse(results, safe=False)
+
+
+@require_POST
+async def verify_pin(request):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return _not_authenticated()
+
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        return JsonResponse({"detail": "Invalid JSON"}, status=400)
+
+    raw_pin = str(data.get("pin") or "")
+    scopes = data.get("scope") or list(PIN_TOKEN_SCOPES)
+    if not 4 <= len(raw_pin) <= 6:
+        return JsonResponse({"pin": ["PIN must be 4 to 6 characters."]}, status=400)
+    if not isinstance(scopes, list) or not set(scopes) <= set(PIN_TOKEN_SCOPES):
+        return JsonResponse({"scope": ["Invalid scope."]}, status=400)
+
+    try:
+        tx_pin = await TransactionPin.objects.aget(user_id=user.pk)
+    except TransactionPin.DoesNotExist:
+        return JsonResponse({"detail": "Transaction PIN not set"}, status=400)
+
+    if tx_pin.is_locked():
+        return JsonResponse(
+            {"detail": "Transaction PIN locked. Try again after 10 minutes."},
+            status=403
+        )
+
+    # PBKDF2 runs in the bounded hashing pool, not on the event loop
+    if not await averify_pin(tx_pin, raw_pin):
+        await sync_to_async(tx_pin.register_failure)()
+        return JsonResponse(
+            {
+                "detail": "Invalid PIN",
+                "remaining_attempts": max(0, 3 - tx_pin.failed_attempts)
+            },
+            status=400
+        )
+
+    await sync_to_async(tx_pin.reset_failures)()
+
+    return JsonResponse(
+        {
+            "pin_token": issue_pin_token(tx_pin, scopes),
+            "expires_in": get_pin_token_ttl(),
+            "scope": scopes,
+        },
+        status=201
+    )
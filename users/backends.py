@@ -0,0 +1,21 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.backends import ModelBackend
+
+from users import principal
+
+
+class PrincipalBackend(ModelBackend):
+    """
+    ModelBackend whose get_user() serves the cached principal, so
+    AuthenticationMiddleware resolves request.user, request.user.wallet
+    and request.user.transaction_pin without a query on a cache hit.
+    """
+
+    def get_user(self, user_id):
+        user = principal.get(user_id)
+        return user if user is not None and self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        # ModelBackend's own aget_user queries every time; request.auser()
+        # in the async views comes here
+        return await sync_to_async(self.get_user)(user_id)
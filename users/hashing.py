@@ -0,0 +1,17 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+
+# PBKDF2 is CPU-bound; a small dedicated pool keeps it off the event loop
+# and caps how many cores PIN checks can take at once.
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, "PIN_HASH_WORKERS", 4),
+    thread_name_prefix="pin-hash"
+)
+
+
+async def averify_pin(tx_pin, raw_pin):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, tx_pin.verify_pin, raw_pin)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from users.utils import sweep_pin_token_uses
+
+
+class Command(BaseCommand):
+    help = "Delete the use records of verified-PIN tokens that have expired."
+
+    def handle(self, *args, **options):
+        removed = sweep_pin_token_uses()
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} spent PIN tokens"))
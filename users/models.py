@@ -54,6 +54,9 @@ class User(AbstractBaseUser, PermissionsMixin):
 from django.contrib.auth.hashers import make_password, check_password
 from django.utils import timezone
 from datetime import timedelta
+import time
+
+from config import metrics
 
 class TransactionPin(models.Model):
     user = models.OneToOneField(
@@ -68,10 +71,16 @@ class TransactionPin(models.Model):
     locked_until = models.DateTimeField(null=True, blank=True)
 
     def set_pin(self, raw_pin):
+        started = time.perf_counter()
         self.pin_hash = make_password(raw_pin)
+        metrics.observe_pin_hash("set", time.perf_counter() - started)
 
     def verify_pin(self, raw_pin):
-        return check_password(raw_pin, self.pin_hash)
+        started = time.perf_counter()
+        try:
+            return check_password(raw_pin, self.pin_hash)
+        finally:
+            metrics.observe_pin_hash("verify", time.perf_counter() - started)
 
     def __str__(self):
         return f"Transaction PIN for {self.user.email}"  
@@ -91,10 +100,27 @@ class TransactionPin(models.Model):
 
 
     def reset_failures(self):
+        if not self.failed_attempts and not self.locked_until:
+            return
         self.failed_attempts = 0
         self.locked_until = None
         self.save(update_fields=["failed_attempts", "locked_until"])
 
 
+class PinTokenUse(models.Model):
+    """
+    The first use of a verified-PIN token. A token pays for one
+    idempotency key: retries of that key pass, any other request fails.
+    """
+    jti = models.CharField(max_length=32, primary_key=True)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+"
+    )
+    idempotency_key = models.CharField(max_length=100)
+    # No later than the token's own expiry; swept after that
+    expires_at = models.DateTimeField(db_index=True)
 
-    
+    def __str__(self):
+        return f"{self.jti} ({self.idempotency_key})"
@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+
+# The request principal: the user with their wallet and transaction PIN,
+# loaded in one joined query and cached for PRINCIPAL_CACHE_TIMEOUT
+# seconds. Only fields that change through save() are cached, and saves
+# invalidate the entry (users.signals) in the "auth" cache, which is why
+# that cache must be shared by every host (WEB_HOSTS in settings). Counters the ledger moves with
+# UPDATE ... F() and the PIN hash/lock state stay deferred, so reading
+# them always goes to the database.
+
+VOLATILE_FIELDS = (
+    "wallet__balance",
+    "wallet__version",
+    "wallet__pending_incoming_requests",
+    "wallet__pending_outgoing_requests",
+    "transaction_pin__pin_hash",
+    "transaction_pin__failed_attempts",
+    "transaction_pin__locked_until",
+)
+
+
+def _cache():
+    return caches[getattr(settings, "PRINCIPAL_CACHE_ALIAS", "default")]
+
+
+def _key(user_id):
+    return f"principal:{user_id}"
+
+
+def load(user_id):
+    # From the primary: a lagging replica's copy would be cached as current
+    return (
+        get_user_model().objects.db_manager(DEFAULT_DB_ALIAS)
+        .select_related("wallet", "transaction_pin")
+        .defer(*VOLATILE_FIELDS)
+        .get(pk=user_id)
+    )
+
+
+def get(user_id):
+    """The principal for ``user_id``, or None if there is no such user."""
+    user = _cache().get(_key(user_id))
+    if user is None:
+        try:
+            user = load(user_id)
+        except get_user_model().DoesNotExist:
+            return None
+        _cache().set(_key(user_id), user, getattr(settings, "PRINCIPAL_CACHE_TIMEOUT", 30))
+    return user
+
+
+def invalidate_on_commit(user_id):
+    transaction.on_commit(lambda: _cache().delete(_key(user_id)))
@@ -0,0 +1,180 @@
+import bisect
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connection, connections
+from django.db.models import Q
+from django.db.models.functions import Length
+
+from wallets.models import Wallet
+from wallets.wallet_ids import PREFIX
+
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+logger = logging.getLogger(__name__)
+
+
+class PrefixIndex:
+    """
+    Sorted in-memory prefix index over email and wallet_id.
+
+    Used where trigram indexes are unavailable (SQLite). Kept current in
+    this process by post_save/post_delete signals and fully rebuilt, by a
+    background thread, every SEARCH_INDEX_REFRESH_SECONDS to pick up
+    writes from other workers. Requests never build it: until the first
+    build finishes, search() returns None.
+    """
+
+    def __init__(self):
+        self._keys = []      # sorted (search key, user_id)
+        self._entries = {}   # user_id -> (email, wallet_id)
+        self._built_at = None
+        self._lock = threading.Lock()
+        self._refresher_pid = None
+
+    @staticmethod
+    def _search_keys(email, wallet_id):
+        keys = {email.lower(), wallet_id.lower()}
+        # Let people type the random part of the wallet id without "WLT-"
+        if "-" in wallet_id:
+            keys.add(wallet_id.split("-", 1)[1].lower())
+        return keys
+
+    def start(self):
+        """
+        Start the rebuild thread, if this process has none yet. Called at
+        startup (config.wsgi/asgi); nothing else builds the index.
+        """
+        with self._lock:
+            if self._refresher_pid == os.getpid():
+                return
+            self._refresher_pid = os.getpid()
+        threading.Thread(target=self._refresh, name="search-index", daemon=True).start()
+
+    def _refresh(self):
+        while True:
+            try:
+                self.rebuild()
+            except DatabaseError as exc:
+                # e.g. tables not migrated yet; the next round retries
+                logger.warning("Search index rebuild failed: %s", exc)
+            finally:
+                # Do not hold a connection (or a pool slot) between rounds
+                connections[DEFAULT_DB_ALIAS].close()
+            time.sleep(getattr(settings, "SEARCH_INDEX_REFRESH_SECONDS", 300))
+
+    def rebuild(self):
+        # From the primary: a lagging replica would drop wallets upserted
+        # since its snapshot until the next rebuild
+        rows = Wallet.objects.using(DEFAULT_DB_ALIAS).values_list("user_id", "user__email", "wallet_id")
+
+        keys = []
+        entries = {}
+        for user_id, email, wallet_id in rows.iterator(chunk_size=5000):
+            entries[user_id] = (email, wallet_id)
+            keys.extend((k, user_id) for k in self._search_keys(email, wallet_id))
+        keys.sort()
+
+        with self._lock:
+            self._keys = keys
+            self._entries = entries
+            self._built_at = time.monotonic()
+
+    def upsert(self, user_id, email, wallet_id):
+        with self._lock:
+            if self._built_at is None:
+                return
+            self._discard(user_id)
+            self._entries[user_id] = (email, wallet_id)
+            for k in self._search_keys(email, wallet_id):
+                bisect.insort(self._keys, (k, user_id))
+
+    def rename(self, user_id, email):
+        entry = self._entries.get(user_id)
+        if entry and entry[0] != email:
+            self.upsert(user_id, email, entry[1])
+
+    def remove(self, user_id):
+        with self._lock:
+            self._discard(user_id)
+
+    def _discard(self, user_id):
+        old = self._entries.pop(user_id, None)
+        if old is None:
+            return
+        for k in self._search_keys(*old):
+            i = bisect.bisect_left(self._keys, (k, user_id))
+            if i < len(self._keys) and self._keys[i] == (k, user_id):
+                del self._keys[i]
+
+    def search(self, q, exclude_user_id, limit):
+        # Threads do not survive a fork: a preloaded app's worker starts its own
+        if self._refresher_pid not in (None, os.getpid()):
+            self.start()
+        if self._built_at is None:
+            return None
+
+        q = q.lower()
+        matches = {}
+
+        with self._lock:
+            i = bisect.bisect_left(self._keys, (q,))
+            while i < len(self._keys) and len(matches) < limit * 4:
+                key, user_id = self._keys[i]
+                if not key.startswith(q):
+                    break
+                if user_id != exclude_user_id:
+                    # exact hits first, then shortest completion
+                    rank = (key != q, len(key))
+                    matches[user_id] = min(rank, matches.get(user_id, rank))
+                i += 1
+
+            ranked = sorted(matches, key=lambda uid: (matches[uid], self._entries[uid]))
+            return [
+                {"email": self._entries[uid][0], "wallet_id": self._entries[uid][1]}
+                for uid in ranked[:limit]
+            ]
+
+
+prefix_index = PrefixIndex()
+
+
+def _search_db(q, exclude_user_id, limit):
+    # The index's matches straight from the tables: prefixes of the email
+    # or the wallet id, with or without "WLT-". Serves Postgres, where the
+    # UPPER(...) gin_trgm_ops indexes back istartswith, and SQLite while
+    # the prefix index is still being built
+    wallets = (
+        Wallet.objects
+        .filter(
+            Q(user__email__istartswith=q)
+            | Q(wallet_id__istartswith=q)
+            | Q(wallet_id__istartswith=PREFIX + q)
+        )
+        .exclude(user_id=exclude_user_id)
+        # Shortest completion first, like the index
+        .order_by(Length("user__email"), "user__email")
+        .values_list("user__email", "wallet_id")[:limit]
+    )
+    return [{"email": email, "wallet_id": wallet_id} for email, wallet_id in wallets]
+
+
+def search_users(q, exclude_user_id, limit=DEFAULT_LIMIT):
+    limit = max(1, min(limit, MAX_LIMIT))
+
+    if connection.vendor != "postgresql":
+        results = prefix_index.search(q, exclude_user_id, limit)
+        if results is not None:
+            return results
+    return _search_db(q, exclude_user_id, limit)
+
+
+def start_index():
+    """Build the prefix index in the background where search uses it."""
+    if connection.vendor != "postgresql":
+        prefix_index.start()
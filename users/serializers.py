@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from users.models import User
 from users.models import TransactionPin
+from users.utils import PIN_TOKEN_SCOPES
 
 
 
@@ -37,6 +38,15 @@ class SetPinSerializer(serializers.Serializer):
 
 
 
+class VerifyPinSerializer(serializers.Serializer):
+    pin = serializers.CharField(write_only=True, min_length=4, max_length=6)
+    scope = serializers.ListField(
+        child=serializers.ChoiceField(choices=PIN_TOKEN_SCOPES),
+        allow_empty=False,
+        required=False
+    )
+
+
 from django.contrib.auth import authenticate
 
 class LoginSerializer(serializers.Serializer):
@@ -68,7 +78,7 @@ class WalletBalanceSerializer(serializers.ModelSerializer):
 
     def get_balance(self, obj):
         # convert paise to rupees with 2 decimal points
-        return f"{obj.balance/100:.2f}"
+        return f"{obj.total_balance/100:.2f}"
     def get_has_pin(self, obj):
         return hasattr(obj.user, "transaction_pin")
 
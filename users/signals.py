@@ -0,0 +1,39 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.conf import settings
+
+from users import principal
+from users.models import TransactionPin
+from users.search import prefix_index
+from wallets.models import Wallet
+
+
+@receiver(post_save, sender=Wallet)
+def index_wallet(sender, instance, **kwargs):
+    prefix_index.upsert(instance.user_id, instance.user.email, instance.wallet_id)
+
+
+@receiver(post_delete, sender=Wallet)
+def unindex_wallet(sender, instance, **kwargs):
+    prefix_index.remove(instance.user_id)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def reindex_user_email(sender, instance, created, **kwargs):
+    if not created:
+        prefix_index.rename(instance.pk, instance.email)
+
+
+# Cached principals carry the user, wallet and PIN rows
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_principal(sender, instance, **kwargs):
+    principal.invalidate_on_commit(instance.pk)
+
+
+@receiver(post_save, sender=Wallet)
+@receiver(post_delete, sender=Wallet)
+@receiver(post_save, sender=TransactionPin)
+@receiver(post_delete, sender=TransactionPin)
+def invalidate_principal_of_owner(sender, instance, **kwargs):
+    principal.invalidate_on_commit(instance.user_id)
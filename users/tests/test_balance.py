@@ -0,0 +1,61 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from wallets import balance_cache, ledger
+from wallets.tests import make_user, test_settings, wallet_of
+
+
+@test_settings
+class BalanceTests(TestCase):
+    def setUp(self):
+        self.alice = make_user("alice@example.com", 1000)
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+
+    def balance(self):
+        return self.client.get("/api/users/balance/").data["balance"]
+
+    def cached(self):
+        return balance_cache._cache().get(balance_cache._key(self.alice.pk))
+
+    def test_balance_follows_ledger_writes(self):
+        self.assertEqual(self.balance(), "10.00")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ledger.credit(wallet_of(self.alice), 250, "c1")
+
+        self.assertEqual(self.balance(), "12.50")
+
+    def test_shard_credits_refresh_the_snapshot(self):
+        ledger.set_shard_count(wallet_of(self.alice), 4)
+        self.assertEqual(self.balance(), "10.00")
+
+        for i in range(3):
+            with self.captureOnCommitCallbacks(execute=True):
+                ledger.credit(wallet_of(self.alice), 100, f"c{i}")
+            self.assertEqual(self.balance(), f"{11 + i}.00")
+
+    def test_stale_snapshot_never_replaces_a_fresh_one(self):
+        ledger.set_shard_count(wallet_of(self.alice), 2)
+        stale = balance_cache._build(wallet_of(self.alice))
+        with self.captureOnCommitCallbacks(execute=True):
+            ledger.credit(wallet_of(self.alice), 500, "c1")
+        self.assertEqual(self.cached()["balance"], 1500)
+
+        # A refresh that read the rows before the credit lands last
+        balance_cache._store(wallet_of(self.alice), stale)
+
+        self.assertIsNone(self.cached())
+        self.assertEqual(self.balance(), "15.00")
+
+    def test_folding_shards_never_moves_the_version_back(self):
+        ledger.set_shard_count(wallet_of(self.alice), 2)
+        for i in range(4):
+            ledger.credit(wallet_of(self.alice), 100, f"c{i}")
+        before = balance_cache._build(wallet_of(self.alice))
+
+        ledger.set_shard_count(wallet_of(self.alice), 0)
+        after = balance_cache._build(wallet_of(self.alice))
+
+        self.assertEqual(after["balance"], before["balance"])
+        self.assertGreater(after["version"], before["version"])
@@ -0,0 +1,97 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from users.models import PinTokenUse, TransactionPin, User
+from wallets.tests import make_user, reset_process_state, test_settings, wallet_of
+
+
+@test_settings
+class PinTests(TestCase):
+    def setUp(self):
+        reset_process_state()
+        self.alice = make_user("alice@example.com", 1000)
+        self.bob = make_user("bob@example.com")
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+
+    def transfer(self, key="t1", amount=100, **auth):
+        return self.client.post(
+            "/api/wallets/transfer/",
+            {"to": "bob@example.com", "amount": amount, "idempotency_key": key, **auth},
+            format="json"
+        )
+
+    def pin_token(self, **data):
+        response = self.client.post("/api/users/verify-pin/", {"pin": "1234", **data}, format="json")
+        self.assertEqual(response.status_code, 201)
+        return response.data["pin_token"]
+
+    def test_three_wrong_pins_lock_the_pin(self):
+        for remaining in (2, 1, 0):
+            response = self.transfer(pin="9999")
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.data["remaining_attempts"], remaining)
+
+        # Locked: even the right PIN is refused
+        self.assertEqual(self.transfer(pin="1234").status_code, 403)
+        self.assertIsNotNone(TransactionPin.objects.get(user=self.alice).locked_until)
+        self.assertEqual(wallet_of(self.alice).balance, 1000)
+
+    def test_verified_pin_token_authorizes_a_transfer(self):
+        response = self.transfer(pin_token=self.pin_token(scope=["transfer"]))
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(wallet_of(self.alice).balance, 900)
+
+    def test_token_scope_is_enforced(self):
+        response = self.transfer(pin_token=self.pin_token(scope=["money_request"]))
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(wallet_of(self.alice).balance, 1000)
+
+    def test_token_pays_for_one_idempotency_key(self):
+        token = self.pin_token()
+        self.assertEqual(self.transfer("t1", pin_token=token).status_code, 201)
+
+        # A retry of the same request still replays...
+        retried = self.transfer("t1", pin_token=token)
+        self.assertEqual(retried.status_code, 201)
+        self.assertEqual(retried["Idempotent-Replayed"], "true")
+
+        # ...but the token cannot pay for anything else
+        reused = self.transfer("t2", pin_token=token)
+        self.assertEqual(reused.status_code, 403)
+        self.assertEqual(wallet_of(self.alice).balance, 900)
+        self.assertEqual(PinTokenUse.objects.get().idempotency_key, "t1")
+
+    def test_failed_transfer_keeps_the_token_for_its_retry(self):
+        token = self.pin_token()
+        self.assertEqual(self.transfer("t1", amount=5000, pin_token=token).status_code, 400)
+
+        # Different amount, same key: the idempotency layer decides, not the token
+        self.assertEqual(self.transfer("t1", amount=50, pin_token=token).status_code, 201)
+        self.assertEqual(self.transfer("t2", amount=50, pin_token=token).status_code, 403)
+
+    def test_changing_the_pin_revokes_its_tokens(self):
+        token = self.pin_token()
+        self.client.post("/api/users/set-pin/", {"pin": "5678"}, format="json")
+        # As the next request would: a fresh user, not the one with the old PIN cached
+        self.client.force_authenticate(User.objects.get(pk=self.alice.pk))
+
+        self.assertEqual(self.transfer(pin_token=token).status_code, 403)
+
+    def test_sweep_drops_expired_uses(self):
+        self.transfer("t1", pin_token=self.pin_token())
+        self.transfer("t2", pin_token=self.pin_token())
+        PinTokenUse.objects.filter(idempotency_key="t1").update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        out = StringIO()
+        call_command("sweep_pin_tokens", stdout=out)
+
+        self.assertIn("Removed 1 spent", out.getvalue())
+        self.assertEqual(list(PinTokenUse.objects.values_list("idempotency_key", flat=True)), ["t2"])
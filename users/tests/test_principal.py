@@ -0,0 +1,66 @@
+from asgiref.sync import async_to_sync
+from django.test import TestCase, override_settings
+from django.urls import include, path
+from rest_framework.test import APIClient
+
+from users import async_views
+from users.models import User
+from wallets.tests import make_user, reset_process_state, test_settings
+
+
+urlpatterns = [
+    path("async/users/balance/", async_views.check_balance),
+    path("", include("config.urls")),
+]
+
+
+@test_settings
+class LoginTests(TestCase):
+    def test_login_sets_a_session(self):
+        make_user("alice@example.com")
+        client = APIClient()
+
+        response = client.post("/api/users/login/", {"email": "alice@example.com", "password": "pw"}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(client.get("/api/users/balance/").status_code, 200)
+
+    def test_login_with_wrong_password_fails(self):
+        make_user("alice@example.com")
+
+        response = APIClient().post("/api/users/login/", {"email": "alice@example.com", "password": "nope"}, format="json")
+
+        self.assertEqual(response.status_code, 400)
+
+
+@test_settings
+@override_settings(ROOT_URLCONF=__name__)
+class PrincipalTests(TestCase):
+    def setUp(self):
+        reset_process_state()
+        self.alice = make_user("alice@example.com", 1000)
+
+    def test_async_view_resolves_the_user_from_the_cache(self):
+        # Driven from here, so the view's queries run on this thread's
+        # connection, where assertNumQueries counts them
+        async_to_sync(self.async_client.aforce_login)(self.alice)
+        get = async_to_sync(self.async_client.get)
+        # Warms the principal and the balance snapshot
+        self.assertEqual(get("/async/users/balance/").status_code, 200)
+
+        with self.assertNumQueries(0):
+            response = get("/async/users/balance/")
+
+        self.assertEqual(response.json()["balance"], "10.00")
+
+    def test_saving_the_user_drops_the_cached_principal(self):
+        client = APIClient()
+        client.force_login(self.alice)
+        client.get("/api/users/balance/")
+
+        user = User.objects.get(pk=self.alice.pk)
+        user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+
+        self.assertEqual(client.get("/api/users/balance/").status_code, 403)
@@ -0,0 +1,52 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from users import search
+from users.models import User
+from wallets.tests import make_user, test_settings, wallet_of
+
+
+@test_settings
+class SearchTests(TestCase):
+    def setUp(self):
+        self.alice = make_user("alice@example.com")
+        self.bob = make_user("bob@example.com")
+        make_user("bobby@example.com")
+
+    def emails(self, q, caller=None):
+        results = search.search_users(q, exclude_user_id=(caller or self.alice).pk)
+        return [r["email"] for r in results]
+
+    def test_prefix_matches_shortest_first_without_the_caller(self):
+        self.assertEqual(self.emails("bob", caller=self.bob), ["bobby@example.com"])
+        self.assertEqual(self.emails("b"), ["bob@example.com", "bobby@example.com"])
+
+    def test_substrings_do_not_match(self):
+        self.assertEqual(self.emails("ice", caller=self.bob), [])
+        self.assertEqual(self.emails("example"), [])
+
+    def test_wallet_id_matches_with_or_without_prefix(self):
+        wallet_id = wallet_of(self.bob).wallet_id
+
+        for q in (wallet_id, wallet_id[4:], wallet_id[4:7].lower()):
+            results = search.search_users(q, exclude_user_id=self.alice.pk)
+            self.assertIn({"email": "bob@example.com", "wallet_id": wallet_id}, results)
+
+    def test_index_and_tables_return_the_same_matches(self):
+        index = search.PrefixIndex()
+        index.rebuild()
+        wallet_id = wallet_of(self.bob).wallet_id
+
+        for q in ("b", "bob", "bobby@", "ice", "example", "WLT-", wallet_id[4:6]):
+            self.assertCountEqual(
+                index.search(q.lower(), self.alice.pk, 10),
+                search._search_db(q, self.alice.pk, 10),
+                q
+            )
+
+    def test_search_endpoint_requires_a_query(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.get(pk=self.alice.pk))
+
+        self.assertEqual(client.get("/api/users/search-users/").data, [])
+        self.assertEqual(len(client.get("/api/users/search-users/", {"q": "bob"}).data), 2)
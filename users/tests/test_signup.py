@@ -0,0 +1,29 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from wallets.models import Wallet
+from wallets.tests import test_settings
+
+
+@test_settings
+class SignupTests(TestCase):
+    def signup(self, email):
+        return APIClient().post(
+            "/api/users/signup/",
+            {"email": email, "first_name": "New", "last_name": "User", "password": "s3cret-pass"},
+            format="json"
+        )
+
+    def test_signup_creates_a_wallet(self):
+        response = self.signup("new@example.com")
+
+        self.assertEqual(response.status_code, 201)
+        wallet = Wallet.objects.get(user__email="new@example.com")
+        self.assertRegex(wallet.wallet_id, r"^WLT-[0-9A-Z]{6}$")
+        self.assertEqual(wallet.balance, 0)
+
+    def test_every_signup_gets_its_own_wallet_id(self):
+        for i in range(5):
+            self.assertEqual(self.signup(f"new{i}@example.com").status_code, 201)
+
+        self.assertEqual(len(set(Wallet.objects.values_list("wallet_id", flat=True))), 5)
@@ -1,14 +1,24 @@
+from django.conf import settings
 from django.urls import path
-from users.views import SignupAPIView, SetPinAPIView, LoginAPIView, LogoutAPIView, CheckBalanceAPIView, SearchUsersAPIView
+from users.views import SignupAPIView, SetPinAPIView, VerifyPinAPIView, LoginAPIView, LogoutAPIView, CheckBalanceAPIView, SearchUsersAPIView
 
 
 urlpatterns = [
     path("signup/", SignupAPIView.as_view(), name="signup"),
     path("set-pin/", SetPinAPIView.as_view(), name="set-pin"),
+    path("verify-pin/", VerifyPinAPIView.as_view(), name="verify-pin"),
     path("login/", LoginAPIView.as_view(), name="login"),
     path("logout/", LogoutAPIView.as_view(), name="logout"),
     path("balance/", CheckBalanceAPIView.as_view(), name="check-balance"),
     path("search-users/", SearchUsersAPIView.as_view(), name="search-users"),
 ]
 
+if settings.ASYNC_READ_ENDPOINTS:
+    from users import async_views
 
+    # Listed first so they win over the sync views on the same paths
+    urlpatterns = [
+        path("verify-pin/", async_views.verify_pin),
+        path("balance/", async_views.check_balance),
+        path("search-users/", async_views.search_users),
+    ] + urlpatterns
@@ -1,8 +1,78 @@
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
 from rest_framework.response import Response
 from rest_framework import status
 
+from users.models import PinTokenUse
+
+
+PIN_TOKEN_SALT = "users.pin-token"
+PIN_TOKEN_SCOPES = ("transfer", "money_request")
+PIN_STATE_FIELDS = ("pin_hash", "failed_attempts", "locked_until")
+
+
+def _pin_fingerprint(tx_pin):
+    # Changing the PIN changes pin_hash, which invalidates outstanding tokens
+    return salted_hmac(PIN_TOKEN_SALT, tx_pin.pin_hash).hexdigest()[:16]
+
 
-def validate_transaction_pin(user, raw_pin):
+def get_pin_token_ttl():
+    return getattr(settings, "PIN_TOKEN_TTL", 300)
+
+
+def issue_pin_token(tx_pin, scopes=PIN_TOKEN_SCOPES):
+    return signing.dumps(
+        {
+            "u": str(tx_pin.user_id),
+            "s": list(scopes),
+            "p": _pin_fingerprint(tx_pin),
+            "j": uuid.uuid4().hex,
+        },
+        salt=PIN_TOKEN_SALT
+    )
+
+
+def _pin_token_valid(user, tx_pin, token, scope):
+    """Return the token's id if it is good for ``scope``, else None."""
+    try:
+        payload = signing.loads(token, salt=PIN_TOKEN_SALT, max_age=get_pin_token_ttl())
+    except signing.BadSignature:
+        return None
+
+    if (
+        payload.get("u") == str(user.pk)
+        and scope in payload.get("s", [])
+        and payload.get("p") == _pin_fingerprint(tx_pin)
+    ):
+        return payload.get("j")
+    return None
+
+
+def _spend_pin_token(user, jti, idempotency_key):
+    # The first use binds the token to its idempotency key; the primary
+    # key on jti settles concurrent first uses
+    use, _ = PinTokenUse.objects.get_or_create(
+        jti=jti,
+        defaults={
+            "user": user,
+            "idempotency_key": idempotency_key,
+            "expires_at": timezone.now() + timedelta(seconds=get_pin_token_ttl()),
+        }
+    )
+    return use.idempotency_key == idempotency_key
+
+
+def sweep_pin_token_uses():
+    """Delete the use records of tokens that have expired anyway."""
+    return PinTokenUse.objects.filter(expires_at__lte=timezone.now()).delete()[0]
+
+
+def validate_transaction_pin(user, raw_pin, pin_token=None, scope=None, idempotency_key=None):
     try:
         tx_pin = user.transaction_pin
     except Exception:
@@ -11,6 +81,11 @@ def validate_transaction_pin(user, raw_pin):
             status=status.HTTP_400_BAD_REQUEST
         )
 
+    # The cached principal (users.principal) leaves these deferred; load
+    # them together, fresh, rather than one lazy query each
+    if tx_pin.get_deferred_fields():
+        tx_pin.refresh_from_db(fields=PIN_STATE_FIELDS)
+
     # Check lock
     if tx_pin.is_locked():
         return Response(
@@ -18,6 +93,22 @@ def validate_transaction_pin(user, raw_pin):
             status=status.HTTP_403_FORBIDDEN
         )
 
+    # Verified-PIN token: signature check only, no PIN hashing. Good for
+    # one idempotency key, so retries of that request still pass
+    if pin_token:
+        jti = _pin_token_valid(user, tx_pin, pin_token, scope)
+        if not jti:
+            return Response(
+                {"detail": "Invalid or expired PIN token"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        if not idempotency_key or not _spend_pin_token(user, jti, idempotency_key):
+            return Response(
+                {"detail": "PIN token already used"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        return None
+
     # Validate pin
     if not raw_pin or not tx_pin.verify_pin(raw_pin):
         tx_pin.register_failure()
@@ -9,7 +9,10 @@ from users.models import User
 from users.serializers import SignupSerializer
 from users.serializers import SetPinSerializer
 from users.serializers import LoginSerializer
-from users.serializers import WalletBalanceSerializer
+from users.serializers import VerifyPinSerializer
+from wallets import balance_cache
+from users import search
+from users.utils import validate_transaction_pin, issue_pin_token, get_pin_token_ttl, PIN_TOKEN_SCOPES
 
 class SignupAPIView(APIView):
     def post(self, request):
@@ -38,6 +41,27 @@ class SetPinAPIView(APIView):
             return Response({"message": "Transaction PIN set successfully"}, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class VerifyPinAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = VerifyPinSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        pin_error = validate_transaction_pin(request.user, serializer.validated_data["pin"])
+        if pin_error:
+            return pin_error
+
+        scopes = serializer.validated_data.get("scope", PIN_TOKEN_SCOPES)
+        return Response(
+            {
+                "pin_token": issue_pin_token(request.user.transaction_pin, scopes),
+                "expires_in": get_pin_token_ttl(),
+                "scope": list(scopes),
+            },
+            status=status.HTTP_201_CREATED
+        )
+
 class LoginAPIView(APIView):
     def post(self, request):
         serializer = LoginSerializer(data=request.data)
@@ -56,9 +80,9 @@ class CheckBalanceAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        wallet = request.user.wallet  
-        serializer = WalletBalanceSerializer(wallet)
-        return Response(serializer.data)
+        # Write-through snapshot: no queries unless the cache is cold
+        snapshot = balance_cache.get_snapshot(request.user)
+        return Response({**snapshot, "balance": f"{snapshot['balance']/100:.2f}"})
 
 
 from django.contrib.auth import get_user_model
@@ -66,8 +90,6 @@ from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from wallets.models import Wallet  # <-- this is your wallets/models.py Wallet class
-
 User = get_user_model()
 
 class SearchUsersAPIView(APIView):
@@ -78,29 +100,9 @@ class SearchUsersAPIView(APIView):
         if not q:
             return Response([])
 
-        results = []
-        # search by email
-        users_by_email = User.objects.filter(email__icontains=q).exclude(id=request.user.id).select_related("wallet")
-        for u in users_by_email:
-            results.append({
-                "email": u.email,
-                "wallet_id": u.wallet.wallet_id if hasattr(u, "wallet") else None
-            })
-
-        # search by wallet_id
-        wallets_by_id = Wallet.objects.filter(wallet_id__icontains=q).exclude(user=request.user).select_related("user")
-        for w in wallets_by_id:
-            results.append({
-                "email": w.user.email,
-                "wallet_id": w.wallet_id
-            })
-
-        # deduplicate if someone matches both
-        seen = set()
-        final_results = []
-        for r in results:
-            if r["wallet_id"] not in seen:
-                seen.add(r["wallet_id"])
-                final_results.append(r)
-
-        return Response(final_results)
+        try:
+            limit = int(request.query_params.get("limit", search.DEFAULT_LIMIT))
+        except ValueError:
+            limit = search.DEFAULT_LIMIT
+
+        return Response(search.search_users(q, request.user.pk, limit))
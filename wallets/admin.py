@@ -1,7 +1,87 @@
-from django.contrib import admin
-from .models import Wallet
+import io
+
+from django import forms
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from wallets import bulk_credit
+from .models import Wallet, WalletShard
+
+
+class WalletShardInline(admin.TabularInline):
+    model = WalletShard
+    extra = 0
+    max_num = 0
+    readonly_fields = ("index", "balance")
+    can_delete = False
+
+
+class BulkCreditForm(forms.Form):
+    file = forms.FileField(help_text="CSV with a header row, or JSONL: wallet_id, amount (paise), idempotency_key")
+    format = forms.ChoiceField(choices=[(f, f.upper()) for f in bulk_credit.FORMATS])
+    key_prefix = forms.CharField(
+        required=False,
+        max_length=80,
+        help_text="Derive '<prefix>-<line>' keys for lines without an idempotency_key"
+    )
+
 
 @admin.register(Wallet)
 class WalletAdmin(admin.ModelAdmin):
-    list_display = ("wallet_id", "user", "balance", "created_at")
+    list_display = ("wallet_id", "user", "balance", "shard_count", "created_at")
+    readonly_fields = ("shard_count",)
+    inlines = [WalletShardInline]
     search_fields = ("wallet_id", "user__email")
+    change_list_template = "admin/wallets/wallet/change_list.html"
+
+    def get_urls(self):
+        return [
+            path(
+                "bulk-credit/",
+                self.admin_site.admin_view(self.bulk_credit_view),
+                name="wallets_wallet_bulk_credit"
+            ),
+            *super().get_urls(),
+        ]
+
+    def bulk_credit_view(self, request):
+        if not self.has_change_permission(request):
+            raise PermissionDenied
+
+        form = BulkCreditForm(request.POST or None, request.FILES or None)
+        if request.method == "POST" and form.is_valid():
+            upload = form.cleaned_data["file"]
+            failures = io.StringIO()
+
+            # Read the upload as a text stream instead of loading it whole
+            result = bulk_credit.ingest(
+                io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline=""),
+                form.cleaned_data["format"],
+                key_prefix=form.cleaned_data["key_prefix"] or None,
+                on_failure=bulk_credit.failure_writer(failures)
+            )
+
+            messages.info(
+                request,
+                f"Credited {result.credited} lines ({result.amount / 100:.2f}), "
+                f"{result.duplicates} already applied, {result.failed} failed"
+            )
+
+            if result.failed:
+                response = HttpResponse(failures.getvalue(), content_type="text/csv")
+                response["Content-Disposition"] = (
+                    f'attachment; filename="{upload.name}.failures.csv"'
+                )
+                return response
+            return redirect("admin:wallets_wallet_changelist")
+
+        return TemplateResponse(request, "admin/wallets/wallet/bulk_credit.html", {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Bulk credit wallets",
+            "form": form,
+        })
@@ -0,0 +1,218 @@
+import csv
+import gzip
+import os
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from wallets.models import Transaction, TransactionArchive
+
+
+# Monthly partitions of wallets_transaction and the archive of cold months.
+# On PostgreSQL (after migration 0012) months are partitions, and archiving
+# one is a DETACH from the hot table plus an ATTACH to the archive table.
+# Elsewhere both are plain tables and archiving moves the rows.
+
+HOT_TABLE = Transaction._meta.db_table
+ARCHIVE_TABLE = TransactionArchive._meta.db_table
+DEFAULT_PARTITION = f"{HOT_TABLE}_default"
+
+_COLUMNS = [f.column for f in Transaction._meta.concrete_fields]
+
+
+def month_start(value):
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(month):
+    return f"{HOT_TABLE}_y{month:%Y}m{month:%m}"
+
+
+def archive_floor():
+    """
+    Start of the oldest month guaranteed to still be in the hot table.
+
+    archive_transactions never moves anything newer, so a wallet created
+    after this cannot have archived rows and reads can skip the archive.
+    """
+    months = getattr(settings, "TRANSACTION_HOT_MONTHS", 12)
+    return add_months(month_start(timezone.now()), -months)
+
+
+def archived_history(since, **filters):
+    """
+    Archived rows matching ``filters``, or None when their owner (created
+    at ``since``) is too new to have any.
+    """
+    if since >= archive_floor():
+        return None
+    return TransactionArchive.objects.filter(**filters)
+
+
+def is_partitioned():
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)",
+            [HOT_TABLE]
+        )
+        return cursor.fetchone() is not None
+
+
+def _q(name):
+    return connection.ops.quote_name(name)
+
+
+def _partitions():
+    # {month: partition name} currently attached to the hot table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(%s)",
+            [HOT_TABLE]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    prefix = f"{HOT_TABLE}_y"
+    months = {}
+    for name in names:
+        if name.startswith(prefix):
+            year, month = name[len(prefix):].split("m")
+            months[datetime(int(year), int(month), 1, tzinfo=dt_timezone.utc)] = name
+    return months
+
+
+def ensure_partitions(months_ahead=3):
+    """
+    Create the partitions for this month and ``months_ahead`` after it.
+    Returns the names created; a no-op unless the table is partitioned.
+    """
+    if not is_partitioned():
+        return []
+
+    existing = _partitions()
+    this_month = month_start(timezone.now())
+    created = []
+
+    for i in range(months_ahead + 1):
+        month = add_months(this_month, i)
+        if month not in existing:
+            _create_partition(month)
+            created.append(partition_name(month))
+    return created
+
+
+def _create_partition(month):
+    name = partition_name(month)
+    bounds = [month, add_months(month, 1)]
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE {_q(name)} "
+            f"(LIKE {_q(HOT_TABLE)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+        # Rows that fell into the default partition meanwhile move across,
+        # otherwise the ATTACH would fail
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {_q(DEFAULT_PARTITION)} "
+            f"WHERE created_at >= %s AND created_at < %s RETURNING *) "
+            f"INSERT INTO {_q(name)} SELECT * FROM moved",
+            bounds
+        )
+        cursor.execute(
+            f"ALTER TABLE {_q(HOT_TABLE)} ATTACH PARTITION {_q(name)} "
+            f"FOR VALUES FROM (%s) TO (%s)",
+            bounds
+        )
+
+
+def archive_before(cutoff):
+    """
+    Move every month before ``cutoff`` (a month start) to the archive.
+    Returns the months moved, oldest first.
+    """
+    if is_partitioned():
+        return _archive_partitions(cutoff)
+    return _archive_rows(cutoff)
+
+
+def _archive_partitions(cutoff):
+    moved = []
+    for month, name in sorted(_partitions().items()):
+        if month >= cutoff:
+            break
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {_q(HOT_TABLE)} DETACH PARTITION {_q(name)}")
+            # A detached partition keeps the hot table's foreign keys; the
+            # archive has none (TransactionArchive), so wallets with
+            # archived rows can still be deleted
+            cursor.execute(
+                "SELECT conname FROM pg_constraint "
+                "WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+                [name]
+            )
+            for (constraint,) in cursor.fetchall():
+                cursor.execute(f"ALTER TABLE {_q(name)} DROP CONSTRAINT {_q(constraint)}")
+            cursor.execute(
+                f"ALTER TABLE {_q(ARCHIVE_TABLE)} ATTACH PARTITION {_q(name)} "
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [month, add_months(month, 1)]
+            )
+        moved.append(month)
+    return moved
+
+
+def _archive_rows(cutoff):
+    months = list(
+        Transaction.objects
+        .filter(created_at__lt=cutoff)
+        .datetimes("created_at", "month", tzinfo=dt_timezone.utc)
+    )
+    if not months:
+        return []
+
+    columns = ", ".join(_q(c) for c in _COLUMNS)
+    param = [connection.ops.adapt_datetimefield_value(cutoff)]
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {_q(ARCHIVE_TABLE)} ({columns}) "
+            f"SELECT {columns} FROM {_q(HOT_TABLE)} WHERE created_at < %s",
+            param
+        )
+        cursor.execute(f"DELETE FROM {_q(HOT_TABLE)} WHERE created_at < %s", param)
+    return months
+
+
+def export_month(month, directory):
+    """
+    Write the archived rows of ``month`` to
+    ``<directory>/transactions-YYYY-MM.csv.gz``. Returns the path.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"transactions-{month:%Y-%m}.csv.gz")
+
+    fields = [f.attname for f in TransactionArchive._meta.concrete_fields]
+    rows = (
+        TransactionArchive.objects
+        .filter(created_at__gte=month, created_at__lt=add_months(month, 1))
+        .order_by("created_at", "id")
+        .values_list(*fields)
+    )
+
+    # Written aside and renamed, so a crash never leaves half a file
+    with gzip.open(f"{path}.tmp", "wt", newline="") as out:
+        writer = csv.writer(out)
+        writer.writerow(fields)
+        writer.writerows(rows.iterator(chunk_size=5000))
+    os.replace(f"{path}.tmp", path)
+    return path
@@ -0,0 +1,100 @@
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import NotFound
+
+from wallets import archive, export, money_requests
+from wallets.models import Wallet, Transaction
+from wallets.pagination import KeysetCursorPagination
+from wallets.serializers import HISTORY_VALUES, history_items
+
+
+# Async twins of the read endpoints in wallets/views.py, mounted in place
+# of them when ASYNC_READ_ENDPOINTS is on (the ASGI profile).
+
+def _not_authenticated():
+    return JsonResponse(
+        {"detail": "Authentication credentials were not provided."},
+        status=403
+    )
+
+
+@require_GET
+async def transaction_history(request):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return _not_authenticated()
+
+    transactions = (
+        Transaction.objects
+        .filter(wallet__user_id=user.pk)
+        .values(*HISTORY_VALUES)
+    )
+
+    # The wallet is created with the user, so user.created_at bounds it
+    archived = archive.archived_history(user.created_at, wallet__user_id=user.pk)
+    if archived is not None:
+        archived = archived.values(*HISTORY_VALUES)
+
+    paginator = KeysetCursorPagination()
+    try:
+        page = await paginator.apaginate_queryset(transactions, request, fallback=archived)
+    except NotFound as exc:
+        return JsonResponse({"detail": str(exc.detail)}, status=404)
+
+    return JsonResponse({
+        "next": paginator.next_cursor,
+        "results": history_items(page),
+    })
+
+
+@require_GET
+async def export_transactions(request):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return _not_authenticated()
+
+    try:
+        params = export.ExportParams(request.GET)
+    except ValueError as exc:
+        return JsonResponse({"detail": str(exc)}, status=400)
+
+    wallet = await Wallet.objects.only("id", "wallet_id", "created_at").aget(user_id=user.pk)
+
+    # An async iterator, so ASGI streams it instead of buffering it whole
+    rows = export.statement_rows(wallet, params)
+    return export.response(export.astream(rows, params), wallet.wallet_id, params)
+
+
+@require_GET
+async def list_money_requests(request):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return _not_authenticated()
+
+    wallet = await Wallet.objects.aget(user_id=user.pk)
+
+    incoming_pager = KeysetCursorPagination()
+    incoming_pager.cursor_query_param = "incoming_cursor"
+    outgoing_pager = KeysetCursorPagination()
+    outgoing_pager.cursor_query_param = "outgoing_cursor"
+
+    try:
+        incoming = await incoming_pager.apaginate_queryset(
+            money_requests.pending_incoming(wallet), request
+        )
+        outgoing = await outgoing_pager.apaginate_queryset(
+            money_requests.pending_outgoing(wallet), request
+        )
+    except NotFound as exc:
+        return JsonResponse({"detail": str(exc.detail)}, status=404)
+
+    return JsonResponse({
+        "incoming": [money_requests.incoming_item(r) for r in incoming],
+        "outgoing": [money_requests.outgoing_item(r) for r in outgoing],
+        "incoming_next": incoming_pager.next_cursor,
+        "outgoing_next": outgoing_pager.next_cursor,
+        "pending_counts": {
+            "incoming": wallet.pending_incoming_requests,
+            "outgoing": wallet.pending_outgoing_requests,
+        },
+    })
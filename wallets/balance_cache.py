@@ -0,0 +1,105 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+
+from wallets.models import Wallet
+
+
+# Balance/profile snapshots for /api/users/balance/, one per wallet (keyed
+# by its owner's id so a read needs nothing beyond request.user). Ledger
+# writes refresh them after commit. ``version`` is Wallet.version plus the
+# versions of its shards at read time: every balance write moves that sum,
+# folding shards back included, so a snapshot whose version no longer
+# matches the rows is stale.
+
+def _cache():
+    return caches[getattr(settings, "BALANCE_CACHE_ALIAS", "balances")]
+
+
+def _key(user_id):
+    return f"wallet-snapshot:{user_id}"
+
+
+def _build(wallet):
+    balance, version = wallet.balance, wallet.version
+    if wallet.shard_count:
+        # Read after the main row: a fold in between shows up as a version
+        # below the rows', never as a wrong balance under the right one
+        shards = wallet.shards.aggregate(balance=Sum("balance"), version=Sum("version"))
+        balance += shards["balance"] or 0
+        version += shards["version"] or 0
+
+    return {
+        "walletId": wallet.wallet_id,
+        "balance": balance,  # paise
+        "first_name": wallet.user.first_name,
+        "email": wallet.user.email,
+        "has_pin": hasattr(wallet.user, "transaction_pin"),
+        "pending_counts": {
+            "incoming": wallet.pending_incoming_requests,
+            "outgoing": wallet.pending_outgoing_requests,
+        },
+        "version": version,
+    }
+
+
+def _wallets():
+    # From the primary: a lagging replica's copy put into an empty cache
+    # would be served until the wallet's next write
+    return Wallet.objects.db_manager(DEFAULT_DB_ALIAS).select_related("user", "user__transaction_pin")
+
+
+def _version(wallet_id):
+    return (
+        Wallet.objects.db_manager(DEFAULT_DB_ALIAS)
+        .filter(id=wallet_id)
+        .annotate(shard_version=Coalesce(Sum("shards__version"), 0))
+        .values_list("version", "shard_version")
+        .first()
+    )
+
+
+def _store(wallet, snapshot):
+    # No lock, so any cache backend will do and nothing waits: write, then
+    # check the rows. A writer whose snapshot went stale in the meantime
+    # sees a newer version and drops the entry; the newer writer's own
+    # refresh runs after its commit, so it lands after ours.
+    key = _key(wallet.user_id)
+    _cache().set(key, snapshot, getattr(settings, "BALANCE_CACHE_TIMEOUT", 300))
+
+    current = _version(wallet.id)
+    if current is None or sum(current) != snapshot["version"]:
+        _cache().delete(key)
+
+
+def get_snapshot(user):
+    snapshot = _cache().get(_key(user.pk))
+    if snapshot is None:
+        wallet = _wallets().get(user_id=user.pk)
+        snapshot = _build(wallet)
+        _store(wallet, snapshot)
+    return snapshot
+
+
+async def aget_snapshot(user):
+    snapshot = await _cache().aget(_key(user.pk))
+    if snapshot is None:
+        snapshot = await sync_to_async(get_snapshot)(user)
+    return snapshot
+
+
+def refresh(wallet_ids):
+    for wallet in _wallets().filter(id__in=wallet_ids):
+        _store(wallet, _build(wallet))
+
+
+def refresh_on_commit(wallet_ids):
+    wallet_ids = list(wallet_ids)
+    transaction.on_commit(lambda: refresh(wallet_ids))
+
+
+def invalidate_on_commit(user_id):
+    transaction.on_commit(lambda: _cache().delete(_key(user_id)))
@@ -0,0 +1,192 @@
+import csv
+import json
+from itertools import islice
+
+from django.db import IntegrityError
+
+from wallets import ledger
+from wallets.models import Wallet, Transaction, TransactionArchive
+
+
+DEFAULT_CHUNK_SIZE = 5000
+FORMATS = ("csv", "jsonl")
+FAILURE_FIELDS = ("line", "wallet_id", "amount", "idempotency_key", "error")
+
+
+class BulkCreditResult:
+    def __init__(self):
+        self.credited = 0
+        self.amount = 0        # paise
+        self.duplicates = 0    # already applied, by an earlier run or line
+        self.failed = 0
+
+
+def read_records(lines, fmt):
+    """
+    Yield ``(line_no, record)`` from an iterable of text lines.
+
+    ``record`` is a dict for CSV (header row required) and JSONL, or an
+    error string for a JSONL line that does not parse.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, record
+        return
+
+    for line_no, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield line_no, "invalid JSON"
+            continue
+        if not isinstance(record, dict):
+            yield line_no, "expected a JSON object"
+            continue
+        yield line_no, record
+
+
+def _parse(record, line_no, key_prefix):
+    if isinstance(record, str):
+        return None, record
+
+    wallet_id = str(record.get("wallet_id") or "").strip()
+    if not wallet_id:
+        return None, "wallet_id is required"
+
+    amount = record.get("amount")
+    if isinstance(amount, str):
+        amount = amount.strip()
+        amount = int(amount) if amount.isdigit() else None
+    if type(amount) is not int or amount < 1:
+        return None, "amount must be a positive whole number of paise"
+
+    key = str(record.get("idempotency_key") or "").strip()
+    if not key and key_prefix:
+        key = f"{key_prefix}-{line_no}"
+    if not key:
+        return None, "idempotency_key is required"
+    if len(key) > 100:
+        return None, "idempotency_key is longer than 100 characters"
+
+    return (wallet_id, amount, key), None
+
+
+def _apply_chunk(chunk, result, key_prefix, on_failure):
+    parsed = []
+    rejected = []
+    for line_no, record in chunk:
+        values, error = _parse(record, line_no, key_prefix)
+        if error:
+            rejected.append((line_no, record, error))
+        else:
+            parsed.append((line_no, record, *values))
+
+    # One query resolves every wallet_id in the chunk
+    wallets = {
+        w.wallet_id: w
+        for w in (
+            Wallet.objects
+            .filter(wallet_id__in={p[2] for p in parsed})
+            .only("id", "wallet_id", "shard_count")
+        )
+    }
+
+    for attempt in range(2):
+        # Keys already on the ledger, from an earlier run or the API,
+        # including months moved to the archive
+        applied = {}
+        for model in (TransactionArchive, Transaction):
+            applied.update(
+                ((wallet_id, key), amount)
+                for wallet_id, key, amount in (
+                    model.objects
+                    .filter(
+                        wallet_id__in={w.id for w in wallets.values()},
+                        idempotency_key__in={p[4] for p in parsed}
+                    )
+                    .values_list("wallet_id", "idempotency_key", "amount")
+                )
+            )
+
+        entries = []
+        failures = []
+        duplicates = 0
+        for line_no, record, wallet_id, amount, key in parsed:
+            wallet = wallets.get(wallet_id)
+            if wallet is None:
+                failures.append((line_no, record, "wallet not found"))
+                continue
+
+            seen = applied.get((wallet.id, key))
+            if seen is None:
+                applied[(wallet.id, key)] = amount
+                entries.append((wallet, amount, key))
+            elif seen == amount:
+                duplicates += 1
+            else:
+                failures.append(
+                    (line_no, record, "idempotency_key already used with a different amount")
+                )
+
+        try:
+            if entries:
+                ledger.bulk_credit(entries)
+            break
+        except IntegrityError:
+            # A concurrent credit claimed one of the keys; re-check once
+            if attempt:
+                raise
+
+    failures = sorted(rejected + failures, key=lambda f: f[0])
+    if on_failure:
+        for failure in failures:
+            on_failure(*failure)
+    result.failed += len(failures)
+    result.duplicates += duplicates
+    result.credited += len(entries)
+    result.amount += sum(amount for _, amount, _ in entries)
+
+
+def ingest(lines, fmt, chunk_size=DEFAULT_CHUNK_SIZE, key_prefix=None, on_failure=None):
+    """
+    Stream credits from ``lines`` (CSV or JSONL) onto the ledger.
+
+    Each record needs wallet_id, amount (paise) and idempotency_key;
+    with ``key_prefix`` a missing key becomes "<prefix>-<line>". Every
+    chunk is one transaction, so a rerun of the same file only skips
+    lines whose keys are already applied. Bad lines are passed to
+    ``on_failure(line_no, record, error)`` and never stop the run.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}")
+
+    result = BulkCreditResult()
+    records = read_records(lines, fmt)
+
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return result
+        _apply_chunk(chunk, result, key_prefix, on_failure)
+
+
+def failure_writer(fileobj):
+    """Return an ``on_failure`` callback writing CSV rows to ``fileobj``."""
+    writer = csv.writer(fileobj)
+    writer.writerow(FAILURE_FIELDS)
+
+    def on_failure(line_no, record, error):
+        if not isinstance(record, dict):
+            record = {}
+        writer.writerow([
+            line_no,
+            record.get("wallet_id", ""),
+            record.get("amount", ""),
+            record.get("idempotency_key", ""),
+            error,
+        ])
+
+    return on_failure
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from wallets.models import IdempotencyKey
+
+
+class _LRUCache:
+    # Entries are immutable once committed, so per-process copies never go stale;
+    # expiry is checked against expires_at on every hit.
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_cache = _LRUCache(getattr(settings, "IDEMPOTENCY_CACHE_SIZE", 10000))
+
+
+def get_ttl():
+    return getattr(settings, "IDEMPOTENCY_KEY_TTL", timedelta(hours=24))
+
+
+def fingerprint(scope, data):
+    raw = json.dumps({"scope": scope, "data": data}, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def replay(user, key, request_fingerprint):
+    """
+    Return the stored Response for ``key``, or None if it is unused or expired.
+
+    Reusing a key for a different request gets a 422 instead.
+    """
+    now = timezone.now()
+    entry = _cache.get((user.pk, key))
+
+    if entry is None or entry[3] <= now:
+        row = (
+            IdempotencyKey.objects
+            .filter(user=user, key=key)
+            .only("fingerprint", "status_code", "response_body", "expires_at")
+            .first()
+        )
+        if row is None:
+            _cache.delete((user.pk, key))
+            return None
+        if row.expires_at <= now:
+            row.delete()
+            _cache.delete((user.pk, key))
+            return None
+
+        entry = (row.fingerprint, row.status_code, row.response_body, row.expires_at)
+        _cache.set((user.pk, key), entry)
+
+    stored_fingerprint, status_code, body, _ = entry
+
+    if stored_fingerprint != request_fingerprint:
+        return Response(
+            {"detail": "Idempotency key already used for a different request"},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+
+    return Response(body, status=status_code, headers={"Idempotent-Replayed": "true"})
+
+
+def remember(user, key, request_fingerprint, status_code, body):
+    """
+    Store the response for ``key``. Call inside the same atomic block as
+    the ledger write; a concurrent duplicate then fails on the unique
+    (user, key) constraint and rolls its ledger write back.
+    """
+    expires_at = timezone.now() + get_ttl()
+
+    IdempotencyKey.objects.create(
+        user=user,
+        key=key,
+        fingerprint=request_fingerprint,
+        status_code=status_code,
+        response_body=body,
+        expires_at=expires_at
+    )
+
+    transaction.on_commit(lambda: _cache.set(
+        (user.pk, key),
+        (request_fingerprint, status_code, body, expires_at)
+    ))
+
+
+def sweep(batch_size=1000):
+    """Delete expired keys in batches. Returns the number of rows removed."""
+    removed = 0
+    now = timezone.now()
+
+    while True:
+        ids = list(
+            IdempotencyKey.objects
+            .filter(expires_at__lte=now)
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return removed
+        removed += IdempotencyKey.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,350 @@
+import random
+import uuid
+
+from django.db import transaction
+from django.db.models import F, Case, When, Value, BigIntegerField
+from django.utils import timezone
+
+from wallets.models import Wallet, WalletShard, Transaction
+from wallets.utils import generate_transaction_id
+from users import principal
+from wallets import balance_cache, notifications, outbox
+
+
+class LedgerError(Exception):
+    pass
+
+
+class InsufficientBalance(LedgerError):
+    pass
+
+
+def _debit(wallet, amount):
+    # Guarded single-statement debit: the WHERE clause is the balance check
+    updated = (
+        Wallet.objects
+        .filter(id=wallet.id, balance__gte=amount)
+        .update(balance=F("balance") - amount, version=F("version") + 1)
+    )
+    if updated:
+        return
+
+    # Hot wallet: try one random shard before sweeping them all. A stale
+    # shard_count (0 or too high) only costs the sweep, which locks and
+    # reads the real rows before deciding
+    if wallet.shard_count:
+        updated = (
+            WalletShard.objects
+            .filter(
+                wallet_id=wallet.id,
+                index=random.randrange(wallet.shard_count),
+                balance__gte=amount
+            )
+            .update(balance=F("balance") - amount, version=F("version") + 1)
+        )
+    if not updated:
+        _sweep_debit(wallet, amount)
+
+
+def _sweep_debit(wallet, amount):
+    # Main row first, then shards by index: same lock order as every writer
+    main = Wallet.objects.select_for_update().get(id=wallet.id)
+    shards = list(
+        WalletShard.objects
+        .select_for_update()
+        .filter(wallet_id=wallet.id)
+        .order_by("index")
+    )
+
+    if main.balance + sum(s.balance for s in shards) < amount:
+        raise InsufficientBalance()
+
+    remaining = amount
+    for row in [main, *shards]:
+        take = min(row.balance, remaining)
+        if take:
+            type(row).objects.filter(pk=row.pk).update(balance=F("balance") - take)
+            remaining -= take
+        if not remaining:
+            break
+
+    Wallet.objects.filter(id=wallet.id).update(version=F("version") + 1)
+
+
+def _credit(wallet, amount):
+    if wallet.shard_count:
+        # Hot wallet: land on a random shard instead of the main row
+        updated = WalletShard.objects.filter(
+            wallet_id=wallet.id,
+            index=random.randrange(wallet.shard_count)
+        ).update(balance=F("balance") + amount, version=F("version") + 1)
+        if updated:
+            return
+        # shard_count was stale (the shards were removed or resized since
+        # the wallet was read): the main row always exists
+
+    Wallet.objects.filter(id=wallet.id).update(
+        balance=F("balance") + amount,
+        version=F("version") + 1
+    )
+
+
+def _apply_credits(locked, credits):
+    # Hot wallets take their credit on a shard; the rest in one UPDATE
+    plain = {}
+    for wid, amt in credits.items():
+        if locked[wid].shard_count:
+            _credit(locked[wid], amt)
+        else:
+            plain[wid] = amt
+
+    if plain:
+        Wallet.objects.filter(id__in=plain).update(
+            balance=F("balance") + Case(
+                *[When(id=wid, then=Value(amt)) for wid, amt in plain.items()],
+                output_field=BigIntegerField(),
+            ),
+            version=F("version") + 1
+        )
+
+
+def _lock_wallets(wallet_ids):
+    return {
+        w.id: w
+        for w in (
+            Wallet.objects
+            .select_for_update()
+            .filter(id__in=wallet_ids)
+            .order_by("id")
+        )
+    }
+
+
+def _leg(wallet, amount, type, reference_id, idempotency_key, counterparty=None):
+    # bulk_create bypasses Transaction.save, so fill transaction_id here
+    return Transaction(
+        transaction_id=generate_transaction_id(),
+        wallet=wallet,
+        amount=amount,
+        type=type,
+        reference_id=reference_id,
+        idempotency_key=idempotency_key,
+        counterparty=counterparty,
+    )
+
+
+def _insert_legs(rows):
+    connection = transaction.get_connection()
+
+    with connection.cursor() as cursor:
+        # COPY needs psycopg 3; psycopg2 and other backends use bulk_create
+        if connection.vendor != "postgresql" or not hasattr(cursor.cursor, "copy"):
+            Transaction.objects.bulk_create(rows)
+            return
+
+        now = timezone.now()
+        fields = Transaction._meta.concrete_fields
+        sql = "COPY {} ({}) FROM STDIN".format(
+            connection.ops.quote_name(Transaction._meta.db_table),
+            ", ".join(connection.ops.quote_name(f.column) for f in fields)
+        )
+        with connection.wrap_database_errors, cursor.cursor.copy(sql) as copy:
+            for row in rows:
+                row.created_at = now
+                copy.write_row([getattr(row, f.attname) for f in fields])
+
+
+def credit(wallet, amount, idempotency_key):
+    """
+    Add ``amount`` paise to ``wallet`` and record a CREDIT leg.
+
+    Returns the created Transaction. ``wallet.balance`` is refreshed
+    from the database before returning; for hot wallets use
+    ``wallet.total_balance`` to include the shards.
+    """
+    with transaction.atomic():
+        _credit(wallet, amount)
+        txn = _leg(
+            wallet,
+            amount,
+            Transaction.TransactionType.CREDIT,
+            None,
+            idempotency_key,
+        )
+        txn.save()
+        outbox.publish_legs([txn])
+        wallet.refresh_from_db(fields=["balance", "version"])
+        balance_cache.refresh_on_commit([wallet.id])
+
+    return txn
+
+
+def transfer(sender_wallet, receiver_wallet, amount, idempotency_key):
+    """
+    Move ``amount`` paise from ``sender_wallet`` to ``receiver_wallet``.
+
+    Row locks are taken by the two UPDATE statements themselves, in
+    wallet id order so concurrent opposite transfers cannot deadlock.
+    Raises InsufficientBalance (rolling back) if the sender cannot
+    cover the amount. Returns the shared reference_id of both legs.
+    """
+    # Random, not time-ordered: the user-facing REF-XXXXXXXX is its first
+    # 8 hex digits, which a UUIDv7 shares with every key of the same minute
+    reference_id = uuid.uuid4()
+
+    with transaction.atomic():
+        if sender_wallet.id < receiver_wallet.id:
+            _debit(sender_wallet, amount)
+            _credit(receiver_wallet, amount)
+        else:
+            _credit(receiver_wallet, amount)
+            _debit(sender_wallet, amount)
+
+        legs = Transaction.objects.bulk_create([
+            _leg(
+                sender_wallet,
+                amount,
+                Transaction.TransactionType.DEBIT,
+                reference_id,
+                idempotency_key,
+                counterparty=receiver_wallet,
+            ),
+            _leg(
+                receiver_wallet,
+                amount,
+                Transaction.TransactionType.CREDIT,
+                reference_id,
+                idempotency_key,
+                counterparty=sender_wallet,
+            ),
+        ])
+        outbox.publish_legs(legs)
+        notifications.transfer_received(sender_wallet, receiver_wallet, amount, reference_id)
+        balance_cache.refresh_on_commit([sender_wallet.id, receiver_wallet.id])
+
+    return reference_id
+
+
+def batch_transfer(sender_wallet, legs, all_or_nothing=True):
+    """
+    Pay out many recipients from ``sender_wallet`` in one atomic block.
+
+    ``legs`` is a list of ``(receiver_wallet, amount, idempotency_key)``.
+    All involved wallets are locked once, in id order, and each balance
+    is written with a single UPDATE no matter how many legs touch it.
+
+    With ``all_or_nothing`` an uncoverable total raises
+    InsufficientBalance. Otherwise legs are applied in order while the
+    balance lasts. Returns one reference_id per leg, or None for a leg
+    that was skipped.
+    """
+    with transaction.atomic():
+        wallet_ids = sorted(
+            {sender_wallet.id} | {receiver.id for receiver, _, _ in legs}
+        )
+        locked = _lock_wallets(wallet_ids)
+
+        available = locked[sender_wallet.id].total_balance
+        credits = {}
+        rows = []
+        results = []
+
+        for receiver, amount, idempotency_key in legs:
+            if amount > available:
+                if all_or_nothing:
+                    raise InsufficientBalance()
+                results.append(None)
+                continue
+
+            available -= amount
+            credits[receiver.id] = credits.get(receiver.id, 0) + amount
+
+            reference_id = uuid.uuid4()
+            results.append(reference_id)
+            rows.append(_leg(
+                sender_wallet,
+                amount,
+                Transaction.TransactionType.DEBIT,
+                reference_id,
+                idempotency_key,
+                counterparty=receiver,
+            ))
+            rows.append(_leg(
+                receiver,
+                amount,
+                Transaction.TransactionType.CREDIT,
+                reference_id,
+                idempotency_key,
+                counterparty=sender_wallet,
+            ))
+
+        if rows:
+            total = sum(credits.values())
+            _debit(locked[sender_wallet.id], total)
+            _apply_credits(locked, credits)
+            Transaction.objects.bulk_create(rows)
+            outbox.publish_legs(rows)
+            for leg in rows[1::2]:  # the recipients' CREDIT legs
+                notifications.transfer_received(sender_wallet, leg.wallet, leg.amount, leg.reference_id)
+            balance_cache.refresh_on_commit([sender_wallet.id, *credits])
+
+    return results
+
+
+def bulk_credit(entries):
+    """
+    Credit many wallets in one atomic block.
+
+    ``entries`` is a list of ``(wallet, amount, idempotency_key)``.
+    Wallets are locked once, in id order, each balance gets a single
+    UPDATE however many entries hit it, and the CREDIT legs are written
+    with COPY on PostgreSQL. A key already used on its wallet raises
+    IntegrityError and rolls the whole block back.
+    """
+    credits = {}
+    for wallet, amount, _ in entries:
+        credits[wallet.id] = credits.get(wallet.id, 0) + amount
+
+    with transaction.atomic():
+        locked = _lock_wallets(sorted(credits))
+        _apply_credits(locked, credits)
+        legs = [
+            _leg(wallet, amount, Transaction.TransactionType.CREDIT, None, key)
+            for wallet, amount, key in entries
+        ]
+        _insert_legs(legs)
+        outbox.publish_legs(legs)
+        balance_cache.refresh_on_commit(credits)
+
+
+def set_shard_count(wallet, shard_count):
+    """
+    Switch ``wallet`` in or out of hot-wallet mode.
+
+    Shard balances are folded back into the main row first, so the
+    total is unchanged and the new shards start empty.
+    """
+    with transaction.atomic():
+        Wallet.objects.select_for_update().get(id=wallet.id)
+        shards = WalletShard.objects.select_for_update().filter(wallet_id=wallet.id)
+
+        folded = sum(s.balance for s in shards)
+        # The shards' versions move to the main row with their balances,
+        # so the wallet's total version never goes backwards
+        folded_version = sum(s.version for s in shards)
+        shards.delete()
+
+        WalletShard.objects.bulk_create([
+            WalletShard(wallet_id=wallet.id, index=i)
+            for i in range(shard_count)
+        ])
+        Wallet.objects.filter(id=wallet.id).update(
+            balance=F("balance") + folded,
+            shard_count=shard_count,
+            version=F("version") + folded_version + 1
+        )
+        balance_cache.refresh_on_commit([wallet.id])
+        # Cached principals carry shard_count
+        principal.invalidate_on_commit(wallet.user_id)
+
+    wallet.refresh_from_db(fields=["balance", "shard_count"])
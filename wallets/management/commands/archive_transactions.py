@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from wallets import archive
+
+
+class Command(BaseCommand):
+    help = (
+        "Move transaction months older than --older-than months to the archive "
+        "and export each to a gzipped CSV. Also creates upcoming partitions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            default=settings.TRANSACTION_HOT_MONTHS,
+            help="Months to keep hot (at least TRANSACTION_HOT_MONTHS)"
+        )
+        parser.add_argument("--output-dir", default=settings.TRANSACTION_ARCHIVE_DIR)
+        parser.add_argument("--months-ahead", type=int, default=3)
+
+    def handle(self, *args, **options):
+        # History reads rely on nothing newer than TRANSACTION_HOT_MONTHS
+        # being archived (see archive.archive_floor)
+        if options["older_than"] < settings.TRANSACTION_HOT_MONTHS:
+            raise CommandError(
+                f"--older-than must be at least TRANSACTION_HOT_MONTHS "
+                f"({settings.TRANSACTION_HOT_MONTHS})"
+            )
+
+        for name in archive.ensure_partitions(options["months_ahead"]):
+            self.stdout.write(f"Created partition {name}")
+
+        cutoff = archive.add_months(
+            archive.month_start(timezone.now()), -options["older_than"]
+        )
+        months = archive.archive_before(cutoff)
+
+        for month in months:
+            path = archive.export_month(month, options["output_dir"])
+            self.stdout.write(f"Archived {month:%Y-%m} -> {path}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(months)} months archived; hot table starts {cutoff:%Y-%m}"
+        ))
@@ -0,0 +1,55 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from wallets import bulk_credit
+
+
+class Command(BaseCommand):
+    help = (
+        "Credit wallets from a CSV or JSONL file (wallet_id, amount in paise, "
+        "idempotency_key). Safe to rerun: applied keys are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=bulk_credit.FORMATS)
+        parser.add_argument("--chunk-size", type=int, default=bulk_credit.DEFAULT_CHUNK_SIZE)
+        parser.add_argument(
+            "--key-prefix",
+            help="Derive '<prefix>-<line>' keys for lines without an idempotency_key"
+        )
+        parser.add_argument(
+            "--failures",
+            help="Where to write rejected lines (default: <path>.failures.csv)"
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+        failures_path = options["failures"] or f"{path}.failures.csv"
+
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be positive")
+        if not os.path.exists(path):
+            raise CommandError(f"{path} not found")
+
+        with open(path, newline="", encoding="utf-8-sig") as source, \
+                open(failures_path, "w", newline="") as failures:
+            result = bulk_credit.ingest(
+                source,
+                fmt,
+                chunk_size=options["chunk_size"],
+                key_prefix=options["key_prefix"],
+                on_failure=bulk_credit.failure_writer(failures)
+            )
+
+        if not result.failed:
+            os.remove(failures_path)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Credited {result.credited} lines ({result.amount / 100:.2f}), "
+            f"{result.duplicates} already applied, {result.failed} failed"
+        ))
+        if result.failed:
+            self.stdout.write(self.style.WARNING(f"Failed lines written to {failures_path}"))
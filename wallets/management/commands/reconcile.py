@@ -0,0 +1,55 @@
+import csv
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from wallets import reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        "Check every wallet balance against its CREDIT/DEBIT ledger, summing "
+        "only transactions since the last checkpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+        parser.add_argument("--chunk-size", type=int, default=reconcile.DEFAULT_CHUNK_SIZE)
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Ignore existing checkpoints and re-sum the whole ledger"
+        )
+        parser.add_argument(
+            "--report",
+            help="Mismatch report path (default: reconcile-<timestamp>.csv)"
+        )
+
+    def handle(self, *args, **options):
+        if options["workers"] < 1 or options["chunk_size"] < 1:
+            raise CommandError("--workers and --chunk-size must be positive")
+
+        watermark = reconcile.default_watermark()
+        checked, mismatches = reconcile.run(
+            watermark,
+            workers=options["workers"],
+            chunk_size=options["chunk_size"],
+            full=options["full"]
+        )
+
+        self.stdout.write(
+            f"Checked {checked} wallets up to {timezone.localtime(watermark):%Y-%m-%d %H:%M:%S}"
+        )
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS("All balances match the ledger"))
+            return
+
+        path = options["report"] or f"reconcile-{timezone.now():%Y%m%d-%H%M%S}.csv"
+        with open(path, "w", newline="") as report:
+            writer = csv.DictWriter(report, fieldnames=reconcile.REPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(sorted(mismatches, key=lambda m: m["wallet_id"]))
+
+        # Non-zero exit so a scheduled run alerts
+        raise CommandError(f"{len(mismatches)} wallets do not match the ledger; see {path}")
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from wallets import rekey
+
+
+class Command(BaseCommand):
+    help = (
+        "Rewrite uuid4 primary keys of existing wallets, money requests and "
+        "transactions as time-ordered UUIDv7 keys. Run with writes stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "models",
+            nargs="*",
+            default=list(rekey.MODELS),
+            help=f"Any of {', '.join(rekey.MODELS)} (default: all)"
+        )
+        parser.add_argument("--batch-size", type=int, default=rekey.DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        unknown = set(options["models"]) - set(rekey.MODELS)
+        if unknown:
+            raise CommandError(f"Unknown model(s): {', '.join(sorted(unknown))}")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive")
+
+        for name in options["models"]:
+            rewritten = rekey.rekey(rekey.MODELS[name], options["batch_size"])
+            self.stdout.write(self.style.SUCCESS(f"{name}: {rewritten} keys rewritten"))
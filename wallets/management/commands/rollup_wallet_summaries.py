@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from wallets import summaries
+
+
+class Command(BaseCommand):
+    help = (
+        "Fold SUCCESS transactions since the last run into per-wallet daily "
+        "summaries. Safe to run on a schedule; overlapping runs queue up."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Drop existing summaries and recompute them from the whole ledger"
+        )
+
+    def handle(self, *args, **options):
+        watermark = summaries.default_watermark()
+        if options["rebuild"]:
+            written = summaries.rebuild(watermark)
+        else:
+            written = summaries.rollup(watermark)
+
+        self.stdout.write(
+            f"Updated {written} wallet-days up to {timezone.localtime(watermark):%Y-%m-%d %H:%M:%S}"
+        )
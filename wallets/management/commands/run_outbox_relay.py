@@ -0,0 +1,95 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.utils import timezone
+
+from wallets import outbox
+
+
+MAX_BACKOFF = 60
+PURGE_EVERY = 3600  # seconds
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver outbox events to a sink (JSONL file or webhook), at least once "
+        "and in order per wallet. Several relays can run side by side."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sink", choices=["file", "webhook"], default="file")
+        parser.add_argument("--path", default=settings.OUTBOX_FILE_PATH, help="File sink path")
+        parser.add_argument("--url", default=settings.OUTBOX_WEBHOOK_URL, help="Webhook sink URL")
+        parser.add_argument("--batch-size", type=int, default=outbox.DEFAULT_BATCH_SIZE)
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait when there is nothing to deliver"
+        )
+        parser.add_argument(
+            "--report-every",
+            type=float,
+            default=60,
+            help="Seconds between throughput lines"
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Deliver what is pending now, then exit"
+        )
+
+    def _sink(self, options):
+        if options["sink"] == "webhook":
+            if not options["url"]:
+                raise CommandError("--url (or OUTBOX_WEBHOOK_URL) is required for the webhook sink")
+            return outbox.WebhookSink(options["url"], secret=settings.OUTBOX_WEBHOOK_SECRET)
+        return outbox.FileSink(options["path"])
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive")
+
+        sink = self._sink(options)
+        backoff = 0
+        delivered = 0
+        total = 0
+        lag = None
+        reported_at = purged_at = time.monotonic()
+
+        while True:
+            # Long-running: drop connections that broke or outlived CONN_MAX_AGE
+            close_old_connections()
+            try:
+                events = outbox.relay_batch(sink, options["batch_size"])
+            except outbox.DeliveryFailed as exc:
+                backoff = min(MAX_BACKOFF, (backoff or 0.5) * 2)
+                self.stderr.write(f"Delivery failed, retrying in {backoff:.0f}s: {exc}")
+                time.sleep(backoff)
+                continue
+
+            backoff = 0
+            if events:
+                delivered += len(events)
+                lag = (timezone.now() - max(e.created_at for e in events)).total_seconds()
+
+            now = time.monotonic()
+            if now - reported_at >= options["report_every"] or (options["once"] and not events):
+                total += delivered
+                rate = delivered / (now - reported_at) if now > reported_at else 0
+                self.stdout.write(
+                    f"Delivered {delivered} events ({rate:.1f}/s, {total} total)"
+                    + (f", lag {lag:.1f}s" if lag is not None else "")
+                )
+                delivered, reported_at = 0, now
+
+            if now - purged_at >= PURGE_EVERY:
+                outbox.purge_delivered(timezone.now() - settings.OUTBOX_RETENTION)
+                purged_at = now
+
+            if not events:
+                if options["once"]:
+                    return
+                time.sleep(options["poll_interval"])
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from wallets import ledger
+from wallets.models import Wallet
+
+
+class Command(BaseCommand):
+    help = "Put a wallet in hot-wallet mode with N balance shards (0 turns it off)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("wallet_id")
+        parser.add_argument("--shards", type=int, required=True)
+
+    def handle(self, *args, **options):
+        shards = options["shards"]
+        if not 0 <= shards <= 256:
+            raise CommandError("--shards must be between 0 and 256")
+
+        try:
+            wallet = Wallet.objects.get(wallet_id=options["wallet_id"])
+        except Wallet.DoesNotExist:
+            raise CommandError(f"Wallet {options['wallet_id']} not found")
+
+        ledger.set_shard_count(wallet, shards)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{wallet.wallet_id}: {wallet.shard_count} shards, "
+            f"balance {wallet.total_balance / 100:.2f}"
+        ))
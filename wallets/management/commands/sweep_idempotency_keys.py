@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from wallets import idempotency
+
+
+class Command(BaseCommand):
+    help = "Delete idempotency keys whose TTL has passed."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        removed = idempotency.sweep(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} expired idempotency keys"))
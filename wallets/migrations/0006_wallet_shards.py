@@ -0,0 +1,32 @@
+# Generated by Django 6.0.2 on 2026-10-18 07:25
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0005_wallet_balance_non_negative'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wallet',
+            name='shard_count',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='WalletShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveSmallIntegerField()),
+                ('balance', models.BigIntegerField(default=0, validators=[django.core.validators.MinValueValidator(0)])),
+                ('wallet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shards', to='wallets.wallet')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('wallet', 'index'), name='unique_wallet_shard_index'), models.CheckConstraint(condition=models.Q(('balance__gte', 0)), name='shard_balance_non_negative')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations
+
+
+# Trigram index backing wallet_id icontains/istartswith in users.search.
+# Only Postgres has pg_trgm; other backends use the in-memory prefix index.
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS wallets_wallet_wallet_id_trgm "
+        "ON wallets_wallet USING gin ((UPPER(wallet_id::text)) gin_trgm_ops)"
+    )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS wallets_wallet_wallet_id_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0008_wallet_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 6.0.2 on 2026-10-18 08:40
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_counters(apps, schema_editor):
+    Wallet = apps.get_model('wallets', 'Wallet')
+    MoneyRequest = apps.get_model('wallets', 'MoneyRequest')
+    pending = MoneyRequest.objects.filter(status='PENDING')
+
+    for wallet_id, count in pending.values_list('to_wallet').annotate(n=Count('id')):
+        Wallet.objects.filter(id=wallet_id).update(pending_incoming_requests=count)
+    for wallet_id, count in pending.values_list('from_wallet').annotate(n=Count('id')):
+        Wallet.objects.filter(id=wallet_id).update(pending_outgoing_requests=count)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0009_wallet_id_trgm'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wallet',
+            name='pending_incoming_requests',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='wallet',
+            name='pending_outgoing_requests',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='moneyrequest',
+            index=models.Index(condition=models.Q(('status', 'PENDING')), fields=['to_wallet', '-created_at'], name='moneyrequest_in_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='moneyrequest',
+            index=models.Index(condition=models.Q(('status', 'PENDING')), fields=['from_wallet', '-created_at'], name='moneyrequest_out_pending_idx'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-18 07:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0010_pending_request_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceCheckpoint',
+            fields=[
+                ('wallet', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='checkpoint', serialize=False, to='wallets.wallet')),
+                ('balance', models.BigIntegerField()),
+                ('watermark', models.DateTimeField()),
+                ('verified_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
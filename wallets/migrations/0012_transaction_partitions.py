@@ -0,0 +1,211 @@
+# Generated by Django 6.0.2 on 2026-10-18 07:46
+
+import django.db.models.deletion
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+# PostgreSQL only: wallets_transaction becomes a table range-partitioned by
+# month on created_at (plus a DEFAULT partition as a safety net), and
+# wallets_transactionarchive a partitioned table that archived months are
+# attached to. Other backends keep both as plain tables.
+#
+# Unique constraints on a partitioned table must include the partition key,
+# so on every backend (wallet, idempotency_key) and transaction_id move to
+# wallets_transaction_key (TransactionKey), filled by an insert trigger. On
+# SQLite a later migration that rebuilds wallets_transaction drops that
+# trigger and must create it again.
+
+HOT = "wallets_transaction"
+ARCHIVE = "wallets_transactionarchive"
+KEYS = "wallets_transaction_key"
+MONTHS_AHEAD = 3
+
+COLUMNS = (
+    "id, transaction_id, counterparty_id, wallet_id, amount, type, status, "
+    "reference_id, idempotency_key, created_at"
+)
+
+
+def _month(value):
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def _add_months(month, n):
+    index = month.year * 12 + month.month - 1 + n
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _add_indexes_and_fks(schema_editor, model):
+    for statement in schema_editor._model_indexes_sql(model):
+        schema_editor.execute(statement)
+    for field in model._meta.local_fields:
+        if field.remote_field and field.db_constraint:
+            schema_editor.execute(
+                schema_editor._create_fk_sql(model, field, "_fk_%(to_table)s_%(to_column)s")
+            )
+
+
+# A clash raises unique_violation, i.e. IntegrityError, as before
+CLAIM_TRIGGER = {
+    "postgresql": [
+        # An UPDATE of created_at moves the row to another partition as a
+        # delete and an insert; its key is already claimed then
+        f"CREATE FUNCTION {KEYS}_claim() RETURNS trigger AS $$ BEGIN "
+        f"IF NOT EXISTS (SELECT 1 FROM {KEYS} WHERE transaction_id = NEW.transaction_id "
+        f"AND wallet_id = NEW.wallet_id AND idempotency_key = NEW.idempotency_key) THEN "
+        f"INSERT INTO {KEYS} (transaction_id, wallet_id, idempotency_key) "
+        f"VALUES (NEW.transaction_id, NEW.wallet_id, NEW.idempotency_key); END IF; "
+        f"RETURN NULL; END $$ LANGUAGE plpgsql",
+        f"CREATE TRIGGER {KEYS}_claim AFTER INSERT ON {HOT} "
+        f"FOR EACH ROW EXECUTE FUNCTION {KEYS}_claim()",
+    ],
+    "sqlite": [
+        f"CREATE TRIGGER {KEYS}_claim AFTER INSERT ON {HOT} FOR EACH ROW BEGIN "
+        f"INSERT INTO {KEYS} (transaction_id, wallet_id, idempotency_key) "
+        f"VALUES (NEW.transaction_id, NEW.wallet_id, NEW.idempotency_key); END",
+    ],
+}
+DROP_CLAIM_TRIGGER = {
+    "postgresql": [f"DROP TRIGGER {KEYS}_claim ON {HOT}", f"DROP FUNCTION {KEYS}_claim()"],
+    "sqlite": [f"DROP TRIGGER {KEYS}_claim"],
+}
+
+
+def claim_keys(apps, schema_editor):
+    schema_editor.execute(
+        f"INSERT INTO {KEYS} (transaction_id, wallet_id, idempotency_key) "
+        f"SELECT transaction_id, wallet_id, idempotency_key FROM {HOT}"
+    )
+    if schema_editor.connection.vendor == "postgresql":
+        partition_tables(apps, schema_editor)
+    for statement in CLAIM_TRIGGER[schema_editor.connection.vendor]:
+        schema_editor.execute(statement)
+
+
+def unclaim_keys(apps, schema_editor):
+    for statement in DROP_CLAIM_TRIGGER[schema_editor.connection.vendor]:
+        schema_editor.execute(statement)
+    if schema_editor.connection.vendor == "postgresql":
+        unpartition_tables(apps, schema_editor)
+
+
+def partition_tables(apps, schema_editor):
+    execute = schema_editor.execute
+
+    # CreateModel queues the archive's indexes until the end of the
+    # migration; run them now, before that table is rebuilt below
+    for statement in schema_editor.deferred_sql:
+        execute(statement)
+    schema_editor.deferred_sql.clear()
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"SELECT min(created_at) FROM {HOT}")
+        oldest = cursor.fetchone()[0]
+
+    this_month = _month(timezone.now())
+    month = _month(oldest) if oldest else this_month
+
+    execute(
+        f"CREATE TABLE {HOT}_p (LIKE {HOT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+        f"PARTITION BY RANGE (created_at)"
+    )
+    while month <= _add_months(this_month, MONTHS_AHEAD):
+        upper = _add_months(month, 1)
+        execute(
+            f"CREATE TABLE {HOT}_y{month:%Y}m{month:%m} PARTITION OF {HOT}_p "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+        month = upper
+    execute(f"CREATE TABLE {HOT}_default PARTITION OF {HOT}_p DEFAULT")
+
+    execute(f"INSERT INTO {HOT}_p ({COLUMNS}) SELECT {COLUMNS} FROM {HOT}")
+
+    execute(f"DROP TABLE {HOT}")
+    execute(f"ALTER TABLE {HOT}_p RENAME TO {HOT}")
+    execute(f"ALTER TABLE {HOT} ADD PRIMARY KEY (id, created_at)")
+    _add_indexes_and_fks(schema_editor, apps.get_model("wallets", "Transaction"))
+
+    execute(f"DROP TABLE {ARCHIVE}")
+    execute(
+        f"CREATE TABLE {ARCHIVE} (LIKE {HOT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+        f"PARTITION BY RANGE (created_at)"
+    )
+    execute(f"ALTER TABLE {ARCHIVE} ADD PRIMARY KEY (id, created_at)")
+    _add_indexes_and_fks(schema_editor, apps.get_model("wallets", "TransactionArchive"))
+
+
+def unpartition_tables(apps, schema_editor):
+    Transaction = apps.get_model("wallets", "Transaction")
+    execute = schema_editor.execute
+
+    # Archived rows go back into the plain table
+    execute(f"CREATE TABLE {HOT}_plain (LIKE {HOT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    execute(f"INSERT INTO {HOT}_plain ({COLUMNS}) SELECT {COLUMNS} FROM {HOT}")
+    # except those of wallets deleted since, which no foreign key held back
+    live = "SELECT 1 FROM wallets_wallet w WHERE w.id = {}"
+    archived = COLUMNS.replace(
+        "counterparty_id",
+        f"CASE WHEN EXISTS ({live.format('a.counterparty_id')}) THEN a.counterparty_id END"
+    )
+    execute(
+        f"INSERT INTO {HOT}_plain ({COLUMNS}) SELECT {archived} FROM {ARCHIVE} a "
+        f"WHERE EXISTS ({live.format('a.wallet_id')})"
+    )
+
+    execute(f"DROP TABLE {HOT}")
+    execute(f"ALTER TABLE {HOT}_plain RENAME TO {HOT}")
+    execute(f"ALTER TABLE {HOT} ADD PRIMARY KEY (id)")
+    _add_indexes_and_fks(schema_editor, Transaction)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0011_balance_checkpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransactionArchive',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('transaction_id', models.CharField(editable=False, max_length=20)),
+                ('amount', models.BigIntegerField()),
+                ('type', models.CharField(choices=[('CREDIT', 'Credit'), ('DEBIT', 'Debit'), ('TRANSFER', 'Transfer')], max_length=10)),
+                ('status', models.CharField(choices=[('SUCCESS', 'Success'), ('FAILED', 'Failed')], max_length=10)),
+                ('reference_id', models.UUIDField(blank=True, null=True)),
+                ('idempotency_key', models.CharField(max_length=100)),
+                ('created_at', models.DateTimeField()),
+                ('counterparty', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='wallets.wallet')),
+                ('wallet', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='archived_transactions', to='wallets.wallet')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['wallet', '-created_at'], name='wallets_tra_wallet__ca9a19_idx')],
+            },
+        ),
+        migrations.RemoveConstraint(
+            model_name='transaction',
+            name='unique_wallet_idempotency',
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='transaction_id',
+            field=models.CharField(editable=False, max_length=20),
+        ),
+        migrations.CreateModel(
+            name='TransactionKey',
+            fields=[
+                ('transaction_id', models.CharField(max_length=20, primary_key=True, serialize=False)),
+                ('idempotency_key', models.CharField(max_length=100)),
+                ('wallet', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='wallets.wallet')),
+            ],
+            options={
+                'db_table': 'wallets_transaction_key',
+                'constraints': [models.UniqueConstraint(fields=('wallet', 'idempotency_key'), name='unique_wallet_idempotency_key')],
+            },
+        ),
+        migrations.RunPython(claim_keys, unclaim_keys),
+    ]
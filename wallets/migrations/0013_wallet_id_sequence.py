@@ -0,0 +1,36 @@
+# Generated by Django 6.0.2 on 2026-10-18 09:20
+
+from django.db import migrations, models
+
+
+# PostgreSQL reserves wallet ID numbers from a sequence (nextval is not
+# rolled back with the signup); other backends use the counter table.
+
+def create_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE SEQUENCE IF NOT EXISTS wallets_wallet_id_seq AS bigint")
+
+
+def drop_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP SEQUENCE IF EXISTS wallets_wallet_id_seq")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0012_transaction_partitions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WalletIdSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('next_value', models.BigIntegerField(default=1)),
+            ],
+        ),
+        migrations.RunPython(create_sequence, drop_sequence),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.0.2 on 2026-10-18 09:50
+
+from django.db import migrations, models
+
+import wallets.utils
+
+
+# Only the Python-side default changes. State-only, so no backend rebuilds
+# wallets_transaction for it (SQLite would; on PostgreSQL it is partitioned).
+# Existing rows keep their uuid4 keys; `manage.py rekey_time_ordered_ids`
+# rewrites them from created_at.
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0013_wallet_id_sequence'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='moneyrequest',
+                    name='id',
+                    field=models.UUIDField(default=wallets.utils.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='transaction',
+                    name='id',
+                    field=models.UUIDField(default=wallets.utils.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='wallet',
+                    name='id',
+                    field=models.UUIDField(default=wallets.utils.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+            ],
+        ),
+    ]
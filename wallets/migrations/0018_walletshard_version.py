@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 08:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0017_outbox_claimed_until'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='walletshard',
+            name='version',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 6.0.2 on 2026-10-18 19:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def number_events(apps, schema_editor):
+    # Existing events in id order, the best guess at their commit order
+    OutboxEvent = apps.get_model('wallets', 'OutboxEvent')
+    OutboxSequence = apps.get_model('wallets', 'OutboxSequence')
+    last = {}
+    batch = []
+
+    for event in OutboxEvent.objects.order_by('wallet_id', 'id').only('id', 'wallet_id').iterator(chunk_size=2000):
+        last[event.wallet_id] = event.seq = last.get(event.wallet_id, 0) + 1
+        batch.append(event)
+        if len(batch) == 2000:
+            OutboxEvent.objects.bulk_update(batch, ['seq'])
+            batch = []
+    OutboxEvent.objects.bulk_update(batch, ['seq'])
+
+    OutboxSequence.objects.bulk_create(
+        [OutboxSequence(wallet_id=wallet_id, last_seq=seq) for wallet_id, seq in last.items()],
+        batch_size=2000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0018_walletshard_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxSequence',
+            fields=[
+                ('wallet', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='wallets.wallet')),
+                ('last_seq', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='outboxevent',
+            name='seq',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.RunPython(number_events, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='outboxevent',
+            name='seq',
+            field=models.BigIntegerField(),
+        ),
+        migrations.RemoveIndex(
+            model_name='outboxevent',
+            name='outbox_wallet_undelivered_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='outboxevent',
+            constraint=models.UniqueConstraint(fields=('wallet', 'seq'), name='unique_outbox_wallet_seq'),
+        ),
+    ]
@@ -1,14 +1,15 @@
-import uuid
 from django.db import models
 from django.conf import settings
 
-from django.db.models import Q,CheckConstraint
+from django.db.models import Q,CheckConstraint,Sum
 
 from django.core.validators import MinValueValidator
 
+from wallets.utils import generate_request_id, generate_transaction_id, uuid7
+
 
 class Wallet(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
 
     user = models.OneToOneField(
         settings.AUTH_USER_MODEL,
@@ -20,6 +21,17 @@ class Wallet(models.Model):
     balance = models.BigIntegerField(default=0,
         validators=[MinValueValidator(0)])  # stored in paise
 
+    # Hot-wallet mode: >0 spreads credits over this many WalletShard rows
+    shard_count = models.PositiveSmallIntegerField(default=0)
+
+    # Bumped by every ledger write to this row; with the shards' versions it
+    # tags cached balance snapshots (wallets.balance_cache)
+    version = models.BigIntegerField(default=0)
+
+    # Denormalized PENDING MoneyRequest counts, maintained by wallets.money_requests
+    pending_incoming_requests = models.PositiveIntegerField(default=0)
+    pending_outgoing_requests = models.PositiveIntegerField(default=0)
+
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -31,6 +43,54 @@ class Wallet(models.Model):
     def __str__(self):
         return f"{self.wallet_id} - {self.user.email}"
 
+    @property
+    def total_balance(self):
+        # Main row plus every shard; no extra query for unsharded wallets
+        if not self.shard_count:
+            return self.balance
+        shards = self.shards.aggregate(total=Sum("balance"))["total"] or 0
+        return self.balance + shards
+
+    async def aget_total_balance(self):
+        if not self.shard_count:
+            return self.balance
+        shards = (await self.shards.aaggregate(total=Sum("balance")))["total"] or 0
+        return self.balance + shards
+
+
+class WalletIdSequence(models.Model):
+    # Single-row counter behind wallets.wallet_ids on backends without
+    # sequences; PostgreSQL uses wallets_wallet_id_seq instead
+    next_value = models.BigIntegerField(default=1)
+
+
+class WalletShard(models.Model):
+    wallet = models.ForeignKey(
+        Wallet,
+        on_delete=models.CASCADE,
+        related_name="shards"
+    )
+
+    index = models.PositiveSmallIntegerField()
+    balance = models.BigIntegerField(default=0,
+        validators=[MinValueValidator(0)])  # stored in paise
+
+    # Bumped by every write to this shard, so shard credits leave the main
+    # row (and its version) alone
+    version = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["wallet", "index"],
+                name="unique_wallet_shard_index"
+            ),
+            CheckConstraint(condition=Q(balance__gte=0), name="shard_balance_non_negative")
+        ]
+
+    def __str__(self):
+        return f"{self.wallet.wallet_id} shard {self.index}"
+
 
 class Transaction(models.Model):
     class TransactionType(models.TextChoices):
@@ -42,11 +102,11 @@ class Transaction(models.Model):
         SUCCESS = "SUCCESS", "Success"
         FAILED = "FAILED", "Failed"
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
 
+    # Unique, like (wallet, idempotency_key): TransactionKey enforces both
     transaction_id = models.CharField(
         max_length=20,
-        unique=True,
         editable=False
     )
 
@@ -93,10 +153,6 @@ class Transaction(models.Model):
 
     class Meta:
         constraints = [
-            models.UniqueConstraint(
-                fields=["wallet", "idempotency_key"],
-                name="unique_wallet_idempotency"
-            ),
             models.CheckConstraint(
                 condition=Q(amount__gt=0),
                 name="amount_must_be_positive"
@@ -108,17 +164,143 @@ class Transaction(models.Model):
         ]
     def save(self, *args, **kwargs):
         if not self.transaction_id:
-            self.transaction_id = f"TXN{uuid.uuid4().hex[:12].upper()}"
+            self.transaction_id = generate_transaction_id()
         super().save(*args, **kwargs)
 
 
+class TransactionKey(models.Model):
+    # The keys of every ledger row ever written, hot or archived, filled by
+    # a database trigger on wallets_transaction (migration 0012). Unique
+    # constraints on the partitioned table would have to include
+    # created_at, so they live here; a clash raises IntegrityError from
+    # the INSERT into wallets_transaction as before.
+    transaction_id = models.CharField(max_length=20, primary_key=True)
+
+    wallet = models.ForeignKey(
+        "wallets.Wallet",
+        on_delete=models.CASCADE,
+        db_index=False,  # led by the unique constraint below
+        related_name="+"
+    )
+
+    idempotency_key = models.CharField(max_length=100)
+
+    class Meta:
+        db_table = "wallets_transaction_key"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["wallet", "idempotency_key"],
+                name="unique_wallet_idempotency_key"
+            )
+        ]
+
+
+class TransactionArchive(models.Model):
+    # Transactions older than TRANSACTION_HOT_MONTHS, moved out of the hot
+    # table by `manage.py archive_transactions` (see wallets.archive). Same
+    # columns as Transaction; rows are immutable once here.
+    id = models.UUIDField(primary_key=True, editable=False)
+
+    transaction_id = models.CharField(max_length=20, editable=False)
+
+    counterparty = models.ForeignKey(
+        "wallets.Wallet",
+        null=True,
+        blank=True,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+        related_name="+"
+    )
+
+    wallet = models.ForeignKey(
+        "wallets.Wallet",
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+        related_name="archived_transactions"
+    )
+
+    amount = models.BigIntegerField()  # paise
+    type = models.CharField(max_length=10, choices=Transaction.TransactionType.choices)
+    status = models.CharField(max_length=10, choices=Transaction.TransactionStatus.choices)
+    reference_id = models.UUIDField(null=True, blank=True)
+    idempotency_key = models.CharField(max_length=100)
+
+    created_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["wallet", "-created_at"])
+        ]
+
+
+class BalanceCheckpoint(models.Model):
+    # Ledger balance (CREDIT minus DEBIT legs) of every transaction up to
+    # and including ``watermark``; written by `manage.py reconcile`
+    wallet = models.OneToOneField(
+        Wallet,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="checkpoint"
+    )
+
+    balance = models.BigIntegerField()  # paise
+    watermark = models.DateTimeField()
+
+    verified_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.wallet_id} @ {self.watermark:%Y-%m-%d %H:%M:%S}"
+
+
+class WalletDailySummary(models.Model):
+    # Per-wallet, per-UTC-day totals of SUCCESS legs up to the rollup
+    # watermark; maintained by `manage.py rollup_wallet_summaries`
+    wallet = models.ForeignKey(
+        Wallet,
+        on_delete=models.CASCADE,
+        related_name="daily_summaries"
+    )
+    day = models.DateField()
+
+    # paise
+    credited = models.BigIntegerField(default=0)
+    debited = models.BigIntegerField(default=0)
+    credit_count = models.PositiveIntegerField(default=0)
+    debit_count = models.PositiveIntegerField(default=0)
+
+    # The part of credited/debited with another wallet as counterparty;
+    # the rest of credited came from top-ups and bulk credits
+    transfers_in = models.BigIntegerField(default=0)
+    transfers_out = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["wallet", "day"],
+                name="unique_wallet_daily_summary"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.wallet_id} {self.day}"
+
+
+class SummaryWatermark(models.Model):
+    # Single row: every transaction created at or before ``watermark`` is
+    # in WalletDailySummary
+    watermark = models.DateTimeField(null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
 class MoneyRequest(models.Model):
     class Status(models.TextChoices):
         PENDING = "PENDING", "Pending"
         ACCEPTED = "ACCEPTED", "Accepted"
         REJECTED = "REJECTED", "Rejected"
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
 
     request_id = models.CharField(max_length=20, unique=True, editable=False)
 
@@ -146,7 +328,102 @@ class MoneyRequest(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     responded_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["to_wallet", "-created_at"],
+                condition=Q(status="PENDING"),
+                name="moneyrequest_in_pending_idx"
+            ),
+            models.Index(
+                fields=["from_wallet", "-created_at"],
+                condition=Q(status="PENDING"),
+                name="moneyrequest_out_pending_idx"
+            ),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.request_id:
-            self.request_id = f"REQ{uuid.uuid4().hex[:12].upper()}"
+            self.request_id = generate_request_id()
         super().save(*args, **kwargs)
+
+
+class IdempotencyKey(models.Model):
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="idempotency_keys"
+    )
+
+    key = models.CharField(max_length=100)
+    # sha256 of the scope + request payload the key was first used with
+    fingerprint = models.CharField(max_length=64)
+
+    status_code = models.PositiveSmallIntegerField()
+    response_body = models.JSONField()
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "key"],
+                name="unique_user_idempotency_key"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.key} ({self.user_id})"
+
+
+class OutboxEvent(models.Model):
+    # Ledger and money-request changes for downstream consumers, written in
+    # the same transaction as the change and delivered by
+    # `manage.py run_outbox_relay` (see wallets.outbox)
+    wallet = models.ForeignKey(
+        Wallet,
+        on_delete=models.CASCADE,
+        related_name="+"
+    )
+
+    # 1, 2, 3... per wallet, in the order the events committed
+    seq = models.BigIntegerField()
+    event_type = models.CharField(max_length=40)
+    payload = models.JSONField()
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    # Set while a relay is sending the event; other relays skip it until then
+    claimed_until = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The relay's claim scan: undelivered events in id order
+            models.Index(
+                fields=["id"],
+                condition=Q(delivered_at__isnull=True),
+                name="outbox_undelivered_idx"
+            ),
+        ]
+        constraints = [
+            # Also serves the relay's check for a wallet's older events
+            models.UniqueConstraint(fields=["wallet", "seq"], name="unique_outbox_wallet_seq"),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} #{self.id}"
+
+
+class OutboxSequence(models.Model):
+    # The last OutboxEvent.seq handed out per wallet. Its row stays locked
+    # until the publishing transaction commits, so a wallet's seqs follow
+    # its commit order without gaps
+    wallet = models.OneToOneField(
+        Wallet,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="+"
+    )
+    last_seq = models.BigIntegerField(default=0)
@@ -0,0 +1,100 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from wallets import balance_cache, ledger, notifications, outbox
+from wallets.models import Wallet, MoneyRequest
+
+
+class RequestNotPending(Exception):
+    pass
+
+
+def _adjust_pending(from_wallet_id, to_wallet_id, delta):
+    # Same id order as the ledger so these UPDATEs cannot deadlock with it
+    updates = sorted([
+        (from_wallet_id, "pending_outgoing_requests"),
+        (to_wallet_id, "pending_incoming_requests"),
+    ])
+    for wallet_id, field in updates:
+        Wallet.objects.filter(id=wallet_id).update(
+            **{field: F(field) + delta},
+            version=F("version") + 1
+        )
+    balance_cache.refresh_on_commit([from_wallet_id, to_wallet_id])
+
+
+def _claim(req, status):
+    # Conditional UPDATE: only one responder can move a request out of PENDING
+    claimed = MoneyRequest.objects.filter(
+        id=req.id,
+        status=MoneyRequest.Status.PENDING
+    ).update(status=status, responded_at=timezone.now())
+
+    if not claimed:
+        raise RequestNotPending()
+    req.status = status
+
+
+def create(from_wallet, to_wallet, amount):
+    with transaction.atomic():
+        req = MoneyRequest.objects.create(
+            from_wallet=from_wallet,
+            to_wallet=to_wallet,
+            amount=amount
+        )
+        _adjust_pending(from_wallet.id, to_wallet.id, 1)
+        outbox.publish_request(req, "created")
+        notifications.money_request_received(req)
+
+    return req
+
+
+def accept(req, idempotency_key):
+    """
+    Pay ``req`` from its to_wallet. Raises RequestNotPending if someone
+    else responded first, or ledger.InsufficientBalance; both roll back.
+    """
+    with transaction.atomic():
+        _claim(req, MoneyRequest.Status.ACCEPTED)
+        # Before the transfer, whose outbox events lock the wallets' outbox
+        # counters: those must stay the last locks taken
+        _adjust_pending(req.from_wallet_id, req.to_wallet_id, -1)
+        ledger.transfer(req.to_wallet, req.from_wallet, req.amount, idempotency_key)
+        outbox.publish_request(req, "accepted")
+
+
+def reject(req):
+    with transaction.atomic():
+        _claim(req, MoneyRequest.Status.REJECTED)
+        _adjust_pending(req.from_wallet_id, req.to_wallet_id, -1)
+        outbox.publish_request(req, "rejected")
+
+
+def pending_incoming(wallet):
+    # Served by the partial (to_wallet, -created_at) WHERE PENDING index
+    return MoneyRequest.objects.filter(
+        to_wallet=wallet, status=MoneyRequest.Status.PENDING
+    ).select_related("from_wallet")
+
+
+def pending_outgoing(wallet):
+    return MoneyRequest.objects.filter(
+        from_wallet=wallet, status=MoneyRequest.Status.PENDING
+    ).select_related("to_wallet")
+
+
+def incoming_item(r):
+    return {
+        "request_id": r.request_id,
+        "from": r.from_wallet.wallet_id,
+        "amount": r.amount / 100,
+    }
+
+
+def outgoing_item(r):
+    return {
+        "request_id": r.request_id,
+        "to": r.to_wallet.wallet_id,
+        "amount": r.amount / 100,
+    }
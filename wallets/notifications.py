@@ -0,0 +1,158 @@
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from config import metrics
+from wallets.outbox import WebhookSink
+
+
+# Best-effort, low-latency notifications to NOTIFICATION_ENDPOINTS. The
+# request path only registers an on_commit hook, which puts the event on
+# a bounded per-endpoint queue; worker threads (the endpoint's
+# "concurrency") batch and POST them, retrying with backoff. A full queue
+# drops the event rather than slowing the request. The durable feed is the
+# outbox (`run_outbox_relay`).
+
+logger = logging.getLogger(__name__)
+
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 30
+
+
+class Endpoint:
+    def __init__(self, url, secret=None, concurrency=4, queue_size=10000,
+                 batch_size=50, batch_wait=0.05, max_retries=5, timeout=5):
+        self.sink = WebhookSink(url, secret=secret, timeout=timeout)
+        self.labels = (("endpoint", urlsplit(url).netloc),)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.max_retries = max_retries
+
+        for i in range(concurrency):
+            threading.Thread(
+                target=self._work,
+                name=f"notify-{urlsplit(url).netloc}-{i}",
+                daemon=True
+            ).start()
+
+    def offer(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            metrics.registry.inc(
+                "wallet_notifications_dropped_total", (*self.labels, ("reason", "queue_full"))
+            )
+
+    def _next_batch(self):
+        # Block for the first event, then take whatever else arrives
+        # within batch_wait, up to batch_size
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _work(self):
+        while True:
+            self._send(self._next_batch())
+
+    def _send(self, batch):
+        for attempt in range(self.max_retries + 1):
+            started = time.perf_counter()
+            try:
+                self.sink.send(batch)
+            except Exception as exc:
+                if attempt == self.max_retries:
+                    logger.warning("Dropping %d notifications for %s: %s",
+                                   len(batch), self.sink.url, exc)
+                    metrics.registry.inc(
+                        "wallet_notifications_dropped_total",
+                        (*self.labels, ("reason", "retries")),
+                        len(batch)
+                    )
+                    return
+                delay = min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt)
+                time.sleep(delay * random.uniform(0.5, 1))
+                continue
+
+            metrics.registry.observe(
+                "wallet_notification_batch_seconds", self.labels, time.perf_counter() - started
+            )
+            metrics.registry.inc("wallet_notifications_sent_total", self.labels, len(batch))
+            return
+
+
+_lock = threading.Lock()
+_endpoints = None
+_pid = None
+
+
+def _get_endpoints():
+    # Started on first use; a forked worker starts its own threads
+    global _endpoints, _pid
+
+    with _lock:
+        if _endpoints is None or _pid != os.getpid():
+            _endpoints = [
+                Endpoint(**{
+                    "queue_size": getattr(settings, "NOTIFICATION_QUEUE_SIZE", 10000),
+                    "batch_size": getattr(settings, "NOTIFICATION_BATCH_SIZE", 50),
+                    "batch_wait": getattr(settings, "NOTIFICATION_BATCH_WAIT", 0.05),
+                    "max_retries": getattr(settings, "NOTIFICATION_MAX_RETRIES", 5),
+                    **config,
+                })
+                for config in getattr(settings, "NOTIFICATION_ENDPOINTS", [])
+            ]
+            _pid = os.getpid()
+        return _endpoints
+
+
+def _dispatch(event):
+    for endpoint in _get_endpoints():
+        endpoint.offer(event)
+
+
+def notify_on_commit(event_type, payload):
+    """Queue a notification for every endpoint once the transaction commits."""
+    if not getattr(settings, "NOTIFICATION_ENDPOINTS", None):
+        return
+
+    event = {
+        "type": event_type,
+        "created_at": timezone.now().isoformat(),
+        "data": payload,
+    }
+    transaction.on_commit(lambda: _dispatch(event))
+
+
+def transfer_received(sender_wallet, receiver_wallet, amount, reference_id):
+    notify_on_commit("transfer.received", {
+        "wallet_id": receiver_wallet.wallet_id,
+        "from_wallet_id": sender_wallet.wallet_id,
+        "amount": amount,
+        "reference_id": str(reference_id),
+    })
+
+
+def money_request_received(req):
+    notify_on_commit("money_request.received", {
+        "wallet_id": req.to_wallet.wallet_id,
+        "from_wallet_id": req.from_wallet.wallet_id,
+        "amount": req.amount,
+        "request_id": req.request_id,
+    })
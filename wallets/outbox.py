@@ -0,0 +1,245 @@
+import hashlib
+import hmac
+import json
+import os
+import time
+import urllib.request
+from collections import Counter
+from datetime import timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import F, Min, Q, prefetch_related_objects
+from django.utils import timezone
+
+from config import metrics
+from wallets.models import OutboxEvent, OutboxSequence, Wallet
+
+
+# Transactional outbox. The ledger and money-request paths add one
+# OutboxEvent per affected wallet inside their own atomic block, so an
+# event exists exactly when its change committed. `run_outbox_relay`
+# claims a batch (a short transaction with SKIP LOCKED that sets
+# claimed_until), hands it to a sink with no transaction open, then marks
+# it delivered: at-least-once, so consumers dedupe on the event id. A
+# relay that dies mid-batch leaves its claim to expire after CLAIM_TIMEOUT.
+#
+# Each wallet's events are delivered in the order they committed. Every
+# event gets the wallet's next ``seq`` from its OutboxSequence row, whose
+# lock is held until commit: seqs have no gaps and follow commit order,
+# even for hot (sharded) wallets whose credits lock only a shard. The
+# relay releases an event only once every lower seq of its wallet has
+# been delivered, or goes out in the same batch ahead of it.
+#
+# Publishing is the last write of its transaction and locks the counters
+# in wallet id order, after every ledger lock, so it cannot deadlock with
+# other writers; it does serialize a hot wallet's credits for the moment
+# between that write and the commit.
+
+DEFAULT_BATCH_SIZE = 500
+# Longer than any sink takes with one batch (the webhook times out at 10s)
+CLAIM_TIMEOUT = timedelta(seconds=60)
+
+
+def _next_seqs(wallet_ids):
+    """
+    Reserve one seq per entry of ``wallet_ids`` (a wallet may repeat).
+    Returns ``{wallet_id: first seq}``; the rest follow consecutively.
+    """
+    counts = sorted(Counter(wallet_ids).items())
+    table = connection.ops.quote_name(OutboxSequence._meta.db_table)
+    # As the backend stores them (hex strings on SQLite), to match RETURNING
+    stored = {Wallet._meta.pk.get_db_prep_value(wallet_id, connection): wallet_id for wallet_id, _ in counts}
+
+    # One upsert in wallet id order; its rows stay locked until commit
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (wallet_id, last_seq) VALUES {', '.join(['(%s, %s)'] * len(counts))} "
+            f"ON CONFLICT (wallet_id) DO UPDATE SET last_seq = {table}.last_seq + excluded.last_seq "
+            f"RETURNING wallet_id, last_seq",
+            [value for key, (_, n) in zip(stored, counts) for value in (key, n)]
+        )
+        last = {stored[key]: seq for key, seq in cursor.fetchall()}
+
+    return {wallet_id: last[wallet_id] - n + 1 for wallet_id, n in counts}
+
+
+def _create(events):
+    # Numbered in list order per wallet
+    seqs = _next_seqs([event.wallet_id for event in events])
+    for event in events:
+        event.seq = seqs[event.wallet_id]
+        seqs[event.wallet_id] += 1
+    OutboxEvent.objects.bulk_create(events, batch_size=1000)
+
+
+def _leg_event(leg):
+    return OutboxEvent(
+        wallet_id=leg.wallet_id,
+        event_type=f"transaction.{leg.type.lower()}",
+        payload={
+            "transaction_id": leg.transaction_id,
+            "wallet_id": leg.wallet.wallet_id,
+            "type": leg.type,
+            "amount": leg.amount,
+            "reference_id": str(leg.reference_id) if leg.reference_id else None,
+            "counterparty_wallet_id": leg.counterparty.wallet_id if leg.counterparty else None,
+            "created_at": leg.created_at.isoformat(),
+        }
+    )
+
+
+def publish_legs(legs):
+    """Add a ``transaction.credit``/``transaction.debit`` event per leg."""
+    _create([_leg_event(leg) for leg in legs])
+
+
+def publish_request(req, status):
+    """Add a ``money_request.<status>`` event for both wallets of ``req``."""
+    payload = {
+        "request_id": req.request_id,
+        "from_wallet_id": req.from_wallet.wallet_id,
+        "to_wallet_id": req.to_wallet.wallet_id,
+        "amount": req.amount,
+        "status": req.status,
+    }
+    _create([
+        OutboxEvent(wallet_id=wallet_id, event_type=f"money_request.{status}", payload=payload)
+        for wallet_id in (req.from_wallet_id, req.to_wallet_id)
+    ])
+
+
+def envelope(event):
+    return {
+        "id": event.id,
+        "wallet_id": event.wallet.wallet_id,
+        "seq": event.seq,
+        "type": event.event_type,
+        "created_at": event.created_at.isoformat(),
+        "data": event.payload,
+    }
+
+
+class DeliveryFailed(Exception):
+    pass
+
+
+class FileSink:
+    """Appends one JSON envelope per line and fsyncs each batch."""
+
+    name = "file"
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def send(self, events):
+        with open(self.path, "a") as out:
+            for event in events:
+                out.write(json.dumps(event, cls=DjangoJSONEncoder) + "\n")
+            out.flush()
+            os.fsync(out.fileno())
+
+
+class WebhookSink:
+    """
+    POSTs ``{"events": [...]}``; any non-2xx answer fails the batch. With
+    a secret, X-Wallet-Signature carries ``sha256=<hex HMAC of the body>``.
+    """
+
+    name = "webhook"
+
+    def __init__(self, url, secret=None, timeout=10):
+        self.url = url
+        self.secret = secret
+        self.timeout = timeout
+
+    def send(self, events):
+        body = json.dumps({"events": events}, cls=DjangoJSONEncoder).encode()
+        headers = {"Content-Type": "application/json"}
+        if self.secret:
+            digest = hmac.new(self.secret.encode(), body, hashlib.sha256).hexdigest()
+            headers["X-Wallet-Signature"] = f"sha256={digest}"
+
+        request = urllib.request.Request(self.url, data=body, headers=headers, method="POST")
+        # urlopen raises HTTPError for 4xx/5xx
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            if not 200 <= response.status < 300:
+                raise DeliveryFailed(f"webhook answered {response.status}")
+
+
+def _claim(batch_size):
+    now = timezone.now()
+    return list(
+        OutboxEvent.objects
+        .select_for_update(skip_locked=True)
+        .filter(delivered_at__isnull=True)
+        .filter(Q(claimed_until__isnull=True) | Q(claimed_until__lt=now))
+        .order_by("id")[:batch_size]
+    )
+
+
+def _deliverable(events):
+    # Per wallet, only the claimed events below its lowest undelivered seq
+    # held elsewhere (another relay's claim, or past our batch): seqs have
+    # no gaps, so everything under it is delivered or in this batch
+    claimed = [event.id for event in events]
+    blocked = dict(
+        OutboxEvent.objects
+        .filter(delivered_at__isnull=True, wallet_id__in={event.wallet_id for event in events})
+        .exclude(id__in=claimed)
+        .values_list("wallet_id")
+        .annotate(first=Min("seq"))
+    )
+    ready = [
+        event for event in events
+        if event.wallet_id not in blocked or event.seq < blocked[event.wallet_id]
+    ]
+    return sorted(ready, key=lambda event: (event.wallet_id, event.seq))
+
+
+def relay_batch(sink, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Deliver up to ``batch_size`` events to ``sink``. Returns the events
+    delivered (possibly none); raises DeliveryFailed if the sink did.
+    """
+    labels = (("sink", sink.name),)
+
+    # Row locks are held only while claiming; the send can take as long
+    # as the sink needs without blocking writers or other relays
+    with transaction.atomic():
+        events = _claim(batch_size)
+        ready = _deliverable(events) if events else []
+        if not ready:
+            return []
+        ids = [event.id for event in ready]
+        OutboxEvent.objects.filter(id__in=ids).update(
+            claimed_until=timezone.now() + CLAIM_TIMEOUT
+        )
+
+    # For the envelopes' public wallet ids; not under the claim's locks
+    prefetch_related_objects(ready, "wallet")
+
+    started = time.perf_counter()
+    try:
+        sink.send([envelope(event) for event in ready])
+    except Exception as exc:
+        # Released at once, so the next attempt does not wait for the claim
+        OutboxEvent.objects.filter(id__in=ids).update(
+            attempts=F("attempts") + 1, claimed_until=None
+        )
+        metrics.registry.observe("wallet_outbox_batch_seconds", labels, time.perf_counter() - started)
+        metrics.registry.inc("wallet_outbox_delivery_failures_total", labels)
+        metrics.registry.maybe_flush()
+        raise DeliveryFailed(str(exc)) from exc
+
+    OutboxEvent.objects.filter(id__in=ids).update(delivered_at=timezone.now(), claimed_until=None)
+    metrics.registry.observe("wallet_outbox_batch_seconds", labels, time.perf_counter() - started)
+    metrics.registry.inc("wallet_outbox_events_delivered_total", labels, len(ready))
+    metrics.registry.maybe_flush()
+    return ready
+
+
+def purge_delivered(before):
+    """Delete events delivered before ``before``. Returns how many."""
+    return OutboxEvent.objects.filter(delivered_at__lt=before).delete()[0]
@@ -0,0 +1,107 @@
+import base64
+import uuid
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+
+def _query_params(request):
+    # DRF Request or a plain Django HttpRequest (async views)
+    return getattr(request, "query_params", request.GET)
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Keyset pagination on (created_at, id), newest first.
+
+    Every page is a single index range scan on (wallet, -created_at), so
+    the cost of fetching a page does not depend on how deep into the
+    history the cursor points.
+    """
+
+    page_size = 50
+    max_page_size = 200
+    cursor_query_param = "cursor"
+    page_size_query_param = "limit"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None, fallback=None):
+        """
+        ``fallback`` continues ``queryset`` with strictly older rows (the
+        transaction archive); it is only read once ``queryset`` runs out.
+        """
+        rows = list(self._page_queryset(queryset, request))
+        if fallback is not None and len(rows) <= self.page_size:
+            rows += list(self._page_queryset(fallback, request)[:self.page_size + 1 - len(rows)])
+        return self._finish_page(rows)
+
+    async def apaginate_queryset(self, queryset, request, fallback=None):
+        rows = [obj async for obj in self._page_queryset(queryset, request)]
+        if fallback is not None and len(rows) <= self.page_size:
+            fallback = self._page_queryset(fallback, request)[:self.page_size + 1 - len(rows)]
+            rows += [obj async for obj in fallback]
+        return self._finish_page(rows)
+
+    def _page_queryset(self, queryset, request):
+        self.page_size = self.get_page_size(request)
+
+        position = self.decode_cursor(request)
+        if position is not None:
+            created_at, pk = position
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) |
+                Q(created_at=created_at, id__lt=pk)
+            )
+
+        # Fetch one extra row to know whether another page exists
+        return queryset.order_by("-created_at", "-id")[:self.page_size + 1]
+
+    def _finish_page(self, rows):
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.next_cursor = (
+            self.encode_cursor(rows[-1]) if self.has_next else None
+        )
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.next_cursor,
+            "results": data,
+        })
+
+    def get_page_size(self, request):
+        try:
+            size = int(_query_params(request)[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, obj):
+        # A model instance or a values() dict
+        if isinstance(obj, dict):
+            created_at, pk = obj["created_at"], obj["id"]
+        else:
+            created_at, pk = obj.created_at, obj.id
+        raw = f"{created_at.isoformat()}|{pk}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = _query_params(request).get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            raw = base64.urlsafe_b64decode(encoded.encode()).decode()
+            created_at, pk = raw.split("|", 1)
+            created_at = parse_datetime(created_at)
+            pk = uuid.UUID(pk)
+        except (ValueError, TypeError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return created_at, pk
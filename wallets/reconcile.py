@@ -0,0 +1,191 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import islice
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import (
+    BigIntegerField, Case, DateTimeField, F, OuterRef, Subquery, Sum, Value, When
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from wallets import archive
+from wallets.models import (
+    BalanceCheckpoint, Transaction, TransactionArchive, Wallet, WalletShard
+)
+
+
+DEFAULT_CHUNK_SIZE = 1000
+REPORT_FIELDS = ("wallet_id", "balance", "ledger_balance", "difference")
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+_signed_amount = Case(
+    When(type=Transaction.TransactionType.CREDIT, then=F("amount")),
+    When(type=Transaction.TransactionType.DEBIT, then=-F("amount")),
+    default=Value(0),
+    output_field=BigIntegerField(),
+)
+
+
+def default_watermark():
+    # Stay behind "now" so transactions still in flight are not checkpointed
+    # before they commit
+    lag = getattr(settings, "RECONCILE_LAG", timedelta(minutes=5))
+    return timezone.now() - lag
+
+
+def _ledger_sum(**filters):
+    # Archived rows all predate archive_floor(), so the archive only needs
+    # probing for wallets checkpointed before that, or never
+    archived = Case(
+        When(since__lt=archive.archive_floor(), then=_net(TransactionArchive, **filters)),
+        default=Value(0),
+        output_field=BigIntegerField(),
+    )
+    return _net(Transaction, **filters) + archived
+
+
+def _net(model, **filters):
+    return Coalesce(
+        Subquery(
+            model.objects
+            .filter(
+                wallet_id=OuterRef("id"),
+                status=Transaction.TransactionStatus.SUCCESS,
+                **filters
+            )
+            .order_by()
+            .values("wallet_id")
+            .annotate(net=Sum(_signed_amount))
+            .values("net")
+        ),
+        Value(0),
+        output_field=BigIntegerField(),
+    )
+
+
+def _shard_sum():
+    return Coalesce(
+        Subquery(
+            WalletShard.objects
+            .filter(wallet_id=OuterRef("id"))
+            .order_by()
+            .values("wallet_id")
+            .annotate(total=Sum("balance"))
+            .values("total")
+        ),
+        Value(0),
+        output_field=BigIntegerField(),
+    )
+
+
+def wallet_ranges(chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield ``(first_id, last_id)`` covering every wallet, ``chunk_size`` at a time."""
+    ids = Wallet.objects.order_by("id").values_list("id", flat=True).iterator()
+    while chunk := list(islice(ids, chunk_size)):
+        yield chunk[0], chunk[-1]
+
+
+def reconcile_range(first_id, last_id, watermark, full=False):
+    """
+    Check wallets with ids in [first_id, last_id] against the ledger.
+
+    Only transactions after each wallet's checkpoint are summed. The
+    live balance and both ledger sums come from one statement, so
+    concurrent transfers cannot make a wallet look out of balance.
+    Returns ``(wallets_checked, mismatches)``.
+    """
+    if full:
+        since, base = Value(_EPOCH), Value(0)
+    else:
+        since = Coalesce("checkpoint__watermark", Value(_EPOCH), output_field=DateTimeField())
+        base = Coalesce("checkpoint__balance", Value(0), output_field=BigIntegerField())
+
+    rows = (
+        Wallet.objects
+        .filter(id__gte=first_id, id__lte=last_id)
+        .annotate(
+            since=since,
+            base=base,
+            shard_total=_shard_sum(),
+            to_watermark=_ledger_sum(created_at__gt=OuterRef("since"), created_at__lte=watermark),
+            to_now=_ledger_sum(created_at__gt=OuterRef("since")),
+        )
+        .values_list(
+            "id", "wallet_id", "balance", "shard_total",
+            "since", "base", "to_watermark", "to_now"
+        )
+    )
+
+    checkpoints = []
+    mismatches = []
+    checked = 0
+
+    for pk, wallet_id, balance, shard_total, since, base, to_watermark, to_now in rows:
+        checked += 1
+
+        live = balance + shard_total
+        ledger_balance = base + to_now
+        if live != ledger_balance:
+            mismatches.append({
+                "wallet_id": wallet_id,
+                "balance": live,
+                "ledger_balance": ledger_balance,
+                "difference": live - ledger_balance,
+            })
+
+        if since < watermark:
+            checkpoints.append(BalanceCheckpoint(
+                wallet_id=pk,
+                balance=base + to_watermark,
+                watermark=watermark
+            ))
+
+    BalanceCheckpoint.objects.bulk_create(
+        checkpoints,
+        update_conflicts=True,
+        unique_fields=["wallet"],
+        update_fields=["balance", "watermark", "verified_at"]
+    )
+    return checked, mismatches
+
+
+def _init_worker():
+    # No-op after fork; sets Django up under spawn/forkserver
+    import django
+    django.setup()
+
+
+def _reconcile_range_worker(args):
+    return reconcile_range(*args)
+
+
+def run(watermark=None, workers=1, chunk_size=DEFAULT_CHUNK_SIZE, full=False):
+    """
+    Reconcile every wallet up to ``watermark``, fanning wallet-id ranges
+    out over ``workers`` processes. Returns ``(wallets_checked, mismatches)``.
+    """
+    watermark = watermark or default_watermark()
+    jobs = [
+        (first, last, watermark, full)
+        for first, last in wallet_ranges(chunk_size)
+    ]
+
+    if workers > 1 and len(jobs) > 1:
+        # Children must open their own connections, not inherit ours. A
+        # psycopg pool keeps sockets and a worker thread of its own that
+        # close_all() leaves alone, and a fork would copy them
+        connections.close_all()
+        for conn in connections.all(initialized_only=True):
+            if conn.vendor == "postgresql":
+                conn.close_pool()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            results = list(pool.map(_reconcile_range_worker, jobs))
+    else:
+        results = [reconcile_range(*job) for job in jobs]
+
+    checked = sum(r[0] for r in results)
+    mismatches = [m for r in results for m in r[1]]
+    return checked, mismatches
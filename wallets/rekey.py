@@ -0,0 +1,74 @@
+from django.db import transaction
+from django.db.models import Case, UUIDField, Value, When
+
+from wallets.models import MoneyRequest, Transaction, Wallet
+from wallets.utils import uuid7_at
+
+
+# Rewrites uuid4 primary keys (rows created before migration 0014) as
+# UUIDv7 keys stamped with each row's created_at, so old rows sort with
+# new ones by time. Foreign keys pointing at a rewritten row follow it in
+# the same transaction; PostgreSQL checks them (deferred) at commit.
+#
+# In-flight requests may hold the old keys, so run it with writes stopped.
+
+MODELS = {
+    "wallet": Wallet,
+    "moneyrequest": MoneyRequest,
+    "transaction": Transaction,
+}
+DEFAULT_BATCH_SIZE = 1000
+
+
+def _stale_batches(model, batch_size):
+    # Keyset walk over the primary key. New keys can land ahead of the
+    # walk; they are version 7 and skipped when reached.
+    last = None
+    while True:
+        rows = model.objects.order_by("id")
+        if last is not None:
+            rows = rows.filter(id__gt=last)
+        rows = list(rows.values_list("id", "created_at")[:batch_size])
+        if not rows:
+            return
+
+        last = rows[-1][0]
+        stale = [(pk, created_at) for pk, created_at in rows if pk.version != 7]
+        if stale:
+            yield stale
+
+
+def _remap(model, column, mapping):
+    return model._base_manager.filter(**{f"{column}__in": mapping}).update(**{
+        column: Case(
+            *[When(**{column: old}, then=Value(new)) for old, new in mapping.items()],
+            output_field=UUIDField()
+        )
+    })
+
+
+def _reverse_relations(model):
+    # include_hidden: related_name="+" foreign keys (TransactionKey) point
+    # here too
+    return [
+        f for f in model._meta.get_fields(include_hidden=True)
+        if f.auto_created and not f.concrete and (f.one_to_many or f.one_to_one)
+    ]
+
+
+def rekey_batch(model, rows):
+    mapping = {pk: uuid7_at(created_at) for pk, created_at in rows}
+
+    with transaction.atomic():
+        updated = _remap(model, "id", mapping)
+        for rel in _reverse_relations(model):
+            _remap(rel.related_model, rel.field.attname, mapping)
+    return updated
+
+
+def rekey(model, batch_size=DEFAULT_BATCH_SIZE):
+    """Rewrite every non-v7 key of ``model``. Returns the rows rewritten."""
+    return sum(
+        rekey_batch(model, rows)
+        for rows in _stale_batches(model, batch_size)
+    )
@@ -8,12 +8,39 @@ class CreditWalletSerializer(serializers.Serializer):
         allow_blank=True
     )
 
-class TransferSerializer(serializers.Serializer):
+class PinAuthSerializer(serializers.Serializer):
+    # Either the raw PIN or a token from /api/users/verify-pin/
+    pin = serializers.CharField(min_length=4, max_length=6, required=False)
+    pin_token = serializers.CharField(required=False)
+
+    def validate(self, attrs):
+        if not attrs.get("pin") and not attrs.get("pin_token"):
+            raise serializers.ValidationError("pin or pin_token is required")
+        return attrs
+
+
+class TransferSerializer(PinAuthSerializer):
     to = serializers.CharField()
     amount = serializers.IntegerField(min_value=1)
-    pin = serializers.CharField(min_length=4, max_length=6)
     idempotency_key = serializers.CharField()
 
+
+class BatchTransferItemSerializer(serializers.Serializer):
+    to = serializers.CharField()
+    amount = serializers.IntegerField(min_value=1)
+    idempotency_key = serializers.CharField(max_length=100)
+
+
+class BatchTransferSerializer(PinAuthSerializer):
+    transfers = BatchTransferItemSerializer(
+        many=True,
+        allow_empty=False,
+        max_length=500
+    )
+    # all-or-nothing by default; False applies every item that can succeed
+    atomic = serializers.BooleanField(default=True)
+
+from django.utils import timezone
 from rest_framework import serializers
 from .models import Transaction
 
@@ -31,11 +58,10 @@ class TransactionHistorySerializer(serializers.ModelSerializer):
         fields = ["reference", "type", "amount", "wallet_id", "timestamp", "counterparty_email"]
 
     def get_amount(self, obj):
-        # Convert paise → rupees with 2 decimal points
-        return f"{obj.amount / 100:.2f}"
+        return format_amount(obj.amount)
     
     def get_reference(self, obj):
-        return f"REF-{str(obj.reference_id).split('-')[0].upper()}"
+        return format_reference(obj.reference_id)
 
     def get_counterparty_email(self, obj):
     # Return counterparty for any transaction that has one
@@ -44,3 +70,40 @@ class TransactionHistorySerializer(serializers.ModelSerializer):
         return None
 
 
+def format_amount(paise):
+    # Convert paise → rupees with 2 decimal points
+    return f"{paise / 100:.2f}"
+
+
+def format_reference(reference_id):
+    return f"REF-{str(reference_id).split('-')[0].upper()}"
+
+
+# Fast path for history pages: dicts built straight from values() rows,
+# same shape as TransactionHistorySerializer, no model instances or
+# serializer fields in between
+HISTORY_VALUES = (
+    "id",
+    "created_at",
+    "reference_id",
+    "type",
+    "amount",
+    "wallet__wallet_id",
+    "counterparty__user__email",
+)
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def history_items(rows):
+    tz = timezone.get_current_timezone()
+    return [
+        {
+            "reference": format_reference(row["reference_id"]),
+            "type": row["type"],
+            "amount": format_amount(row["amount"]),
+            "wallet_id": row["wallet__wallet_id"],
+            "timestamp": row["created_at"].astimezone(tz).strftime(TIMESTAMP_FORMAT),
+            "counterparty_email": row["counterparty__user__email"],
+        }
+        for row in rows
+    ]
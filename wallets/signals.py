@@ -1,18 +1,37 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_migrate, post_save
 from django.dispatch import receiver
 from django.conf import settings
 
+from users.models import TransactionPin
 from wallets.models import Wallet
-from wallets.utils import generate_wallet_id
+from wallets.wallet_ids import next_wallet_id
+from wallets import archive, balance_cache
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_wallet_for_user(sender, instance, created, **kwargs):
     if not created:
         return
 
-    wallet_id = generate_wallet_id()
-
     Wallet.objects.create(
         user=instance,
-        wallet_id=wallet_id
+        wallet_id=next_wallet_id()
     )
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_snapshot_on_profile_change(sender, instance, created, **kwargs):
+    if not created:
+        balance_cache.invalidate_on_commit(instance.pk)
+
+
+@receiver(post_save, sender=TransactionPin)
+def invalidate_snapshot_on_pin_change(sender, instance, created, **kwargs):
+    # has_pin is part of the cached snapshot
+    balance_cache.invalidate_on_commit(instance.user_id)
+
+
+@receiver(post_migrate)
+def create_upcoming_partitions(sender, using, **kwargs):
+    # Every deploy tops up the monthly Transaction partitions (PostgreSQL)
+    if sender.name == "wallets" and using == "default":
+        archive.ensure_partitions()
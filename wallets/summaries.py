@@ -0,0 +1,253 @@
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection, connections, router, transaction
+from django.db.models import Count, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from wallets import archive
+from wallets.models import (
+    SummaryWatermark, Transaction, TransactionArchive, WalletDailySummary
+)
+
+
+# Per-wallet daily rollups. `rollup_wallet_summaries` folds every SUCCESS
+# leg created up to a watermark (now minus SUMMARY_LAG, so in-flight
+# transactions land in the next run) into WalletDailySummary. Reads add
+# the few legs newer than the watermark straight from the ledger, so a
+# year's summary is at most 365 rollup rows plus that tail.
+
+FIELDS = ("credited", "debited", "credit_count", "debit_count", "transfers_in", "transfers_out")
+PERIODS = ("today", "week", "month", "year")
+UPSERT_BATCH = 500
+
+_credit = Q(type=Transaction.TransactionType.CREDIT)
+_debit = Q(type=Transaction.TransactionType.DEBIT)
+_transfer = Q(counterparty__isnull=False)
+
+
+def _totals():
+    return {
+        "credited": Coalesce(Sum("amount", filter=_credit), Value(0)),
+        "debited": Coalesce(Sum("amount", filter=_debit), Value(0)),
+        "credit_count": Count("id", filter=_credit),
+        "debit_count": Count("id", filter=_debit),
+        "transfers_in": Coalesce(Sum("amount", filter=_credit & _transfer), Value(0)),
+        "transfers_out": Coalesce(Sum("amount", filter=_debit & _transfer), Value(0)),
+    }
+
+
+def _by_day(queryset):
+    return (
+        queryset
+        .filter(status=Transaction.TransactionStatus.SUCCESS)
+        .annotate(day=TruncDate("created_at", tzinfo=dt_timezone.utc))
+        .order_by()
+        .values("wallet_id", "day")
+        .annotate(**_totals())
+    )
+
+
+def default_watermark():
+    return timezone.now() - getattr(settings, "SUMMARY_LAG", timedelta(minutes=5))
+
+
+def _upsert(rows):
+    # Adds to existing totals; bulk_create(update_conflicts=...) can only
+    # overwrite them
+    q = connection.ops.quote_name
+    table = q(WalletDailySummary._meta.db_table)
+    columns = ("wallet_id", "day", *FIELDS)
+    wallet_field = WalletDailySummary._meta.get_field("wallet")
+    day_field = WalletDailySummary._meta.get_field("day")
+
+    row_sql = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    params = []
+    for row in rows:
+        params += [
+            wallet_field.get_db_prep_value(row["wallet_id"], connection),
+            day_field.get_db_prep_value(row["day"], connection),
+            *(row[f] for f in FIELDS),
+        ]
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({', '.join(q(c) for c in columns)}) "
+            f"VALUES {', '.join([row_sql] * len(rows))} "
+            f"ON CONFLICT ({q('wallet_id')}, {q('day')}) DO UPDATE SET "
+            + ", ".join(f"{q(f)} = {table}.{q(f)} + excluded.{q(f)}" for f in FIELDS),
+            params
+        )
+
+
+def rollup(until=None):
+    """
+    Fold legs created after the current watermark and up to ``until``
+    into the daily rollups, and move the watermark. Returns the number of
+    (wallet, day) groups written.
+    """
+    until = until or default_watermark()
+
+    with transaction.atomic():
+        SummaryWatermark.objects.get_or_create(pk=1)
+        # Concurrent runs wait here instead of counting a window twice
+        state = SummaryWatermark.objects.select_for_update().get(pk=1)
+        since = state.watermark
+        if since is not None and since >= until:
+            return 0
+
+        sources = [Transaction]
+        if since is None or since < archive.archive_floor():
+            sources.append(TransactionArchive)
+
+        written = 0
+        for model in sources:
+            rows = model.objects.filter(created_at__lte=until)
+            if since is not None:
+                rows = rows.filter(created_at__gt=since)
+
+            groups = _by_day(rows).iterator(chunk_size=2000)
+            while batch := list(islice(groups, UPSERT_BATCH)):
+                _upsert(batch)
+                written += len(batch)
+
+        state.watermark = until
+        state.save()
+    return written
+
+
+def rebuild(until=None):
+    """Drop every rollup and recompute them from the whole ledger."""
+    with transaction.atomic():
+        SummaryWatermark.objects.select_for_update().filter(pk=1).update(watermark=None)
+        WalletDailySummary.objects.all().delete()
+        return rollup(until)
+
+
+class SummaryParams:
+    """Validated ?period=today|week|month|year or ?from=&to= (inclusive), &daily=1"""
+
+    def __init__(self, query_params, today=None):
+        today = today or timezone.now().astimezone(dt_timezone.utc).date()
+        start = self._date(query_params, "from")
+        end = self._date(query_params, "to")
+
+        if start or end:
+            if not (start and end):
+                raise ValueError("from and to must be given together")
+            if start > end:
+                raise ValueError("from must not be after to")
+            self.start, self.end = start, end + timedelta(days=1)
+        else:
+            period = query_params.get("period", "month")
+            if period not in PERIODS:
+                raise ValueError(f"period must be one of: {', '.join(PERIODS)}")
+            self.start, self.end = self._period(period, today)
+
+        self.daily = query_params.get("daily") in ("1", "true")
+
+    @staticmethod
+    def _period(period, today):
+        # [start, end) in UTC days; weeks start on Monday
+        if period == "today":
+            return today, today + timedelta(days=1)
+        if period == "week":
+            start = today - timedelta(days=today.weekday())
+            return start, start + timedelta(days=7)
+        if period == "month":
+            start = today.replace(day=1)
+            return start, (start + timedelta(days=32)).replace(day=1)
+        start = date(today.year, 1, 1)
+        return start, date(today.year + 1, 1, 1)
+
+    @staticmethod
+    def _date(query_params, name):
+        value = query_params.get(name)
+        if not value:
+            return None
+        try:
+            parsed = parse_date(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise ValueError(f"{name} must be a date in YYYY-MM-DD format")
+        return parsed
+
+
+def _midnight(day):
+    return datetime.combine(day, time.min, tzinfo=dt_timezone.utc)
+
+
+@contextmanager
+def _snapshot():
+    # The watermark, rollups and tail must come from one snapshot: a
+    # rollup committing between those reads would count its window twice
+    # (or not at all). PostgreSQL: a REPEATABLE READ transaction, on the
+    # replica the request reads from. SQLite: any transaction, since it
+    # holds off writers. Inside a caller's transaction, its isolation
+    # applies.
+    alias = router.db_for_read(WalletDailySummary)
+    conn = connections[alias]
+    outermost = not conn.in_atomic_block
+
+    with transaction.atomic(using=alias):
+        if outermost and conn.vendor == "postgresql":
+            with conn.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+        yield
+
+
+def summarize(wallet, params):
+    """
+    Totals for ``wallet`` over the period, in paise. Returns
+    ``(totals, days)`` where ``days`` maps each active day to its totals.
+    """
+    with _snapshot():
+        return _summarize(wallet, params)
+
+
+def _summarize(wallet, params):
+    watermark = SummaryWatermark.objects.filter(pk=1).values_list("watermark", flat=True).first()
+    days = {}
+
+    def add(day, row):
+        totals = days.setdefault(day, dict.fromkeys(FIELDS, 0))
+        for f in FIELDS:
+            totals[f] += row[f]
+
+    rollups = (
+        WalletDailySummary.objects
+        .filter(wallet=wallet, day__gte=params.start, day__lt=params.end)
+        .values("day", *FIELDS)
+    )
+    for row in rollups:
+        add(row["day"], row)
+
+    # Legs the rollups do not have yet
+    tail_filters = {
+        "wallet_id": wallet.id,
+        "created_at__gte": _midnight(params.start),
+        "created_at__lt": _midnight(params.end),
+    }
+    if watermark is not None:
+        tail_filters["created_at__gt"] = watermark
+
+    tails = [Transaction.objects.filter(**tail_filters)]
+    if watermark is None or watermark < archive.archive_floor():
+        archived = archive.archived_history(wallet.created_at, **tail_filters)
+        if archived is not None:
+            tails.append(archived)
+
+    for tail in tails:
+        for row in _by_day(tail):
+            add(row["day"], row)
+
+    totals = dict.fromkeys(FIELDS, 0)
+    for row in days.values():
+        for f in FIELDS:
+            totals[f] += row[f]
+    return totals, dict(sorted(days.items()))
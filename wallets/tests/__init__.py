@@ -0,0 +1,41 @@
+from django.test import override_settings
+
+from users.models import TransactionPin, User
+from wallets import idempotency
+from wallets.models import Wallet
+
+
+# Shared by the test modules of both apps: a fast PIN/password hasher and
+# per-process caches, so no test depends on files left by another run
+TEST_SETTINGS = {
+    "PASSWORD_HASHERS": ["django.contrib.auth.hashers.MD5PasswordHasher"],
+    "CACHES": {
+        alias: {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": alias}
+        for alias in ("default", "balances", "auth")
+    },
+}
+
+test_settings = override_settings(**TEST_SETTINGS)
+
+
+def make_user(email, balance=0, pin="1234"):
+    user = User.objects.create_user(email=email, first_name="Test", last_name="User", password="pw")
+    Wallet.objects.filter(user=user).update(balance=balance)
+    if pin:
+        tx_pin = TransactionPin(user=user)
+        tx_pin.set_pin(pin)
+        tx_pin.save()
+    return User.objects.get(pk=user.pk)
+
+
+def wallet_of(user):
+    return Wallet.objects.get(user=user)
+
+
+def total(*users):
+    return sum(wallet_of(u).total_balance for u in users)
+
+
+def reset_process_state():
+    # Replays are cached per (user id, key), and ids repeat across tests
+    idempotency._cache.clear()
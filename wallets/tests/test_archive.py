@@ -0,0 +1,102 @@
+import csv
+import gzip
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from users.models import User
+from wallets import archive, ledger
+from wallets.models import Transaction, TransactionArchive, TransactionKey, Wallet
+from wallets.tests import make_user, test_settings, wallet_of
+
+
+@test_settings
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.alice = make_user("alice@example.com", 10000)
+        self.bob = make_user("bob@example.com")
+        self.this_month = archive.month_start(timezone.now())
+        self.old_month = archive.add_months(self.this_month, -14)
+
+        if archive.is_partitioned():
+            archive._create_partition(self.old_month)
+        for i in range(3):
+            ledger.transfer(wallet_of(self.alice), wallet_of(self.bob), 100, f"old{i}")
+        Transaction.objects.update(created_at=self.old_month + timedelta(days=2))
+        ledger.transfer(wallet_of(self.alice), wallet_of(self.bob), 100, "new")
+
+        # Old enough to have archived rows
+        User.objects.update(created_at=self.old_month)
+        Wallet.objects.update(created_at=self.old_month)
+        # Run the deferred FK checks now, as a commit would: Postgres won't
+        # alter a table with trigger events pending
+        connection.check_constraints()
+
+    def archive_old_months(self):
+        return archive.archive_before(archive.add_months(self.this_month, -12))
+
+    def test_old_months_move_to_the_archive(self):
+        self.assertEqual(self.archive_old_months(), [self.old_month])
+
+        self.assertEqual(Transaction.objects.count(), 2)
+        self.assertEqual(TransactionArchive.objects.count(), 6)
+        self.assertEqual(self.archive_old_months(), [])
+
+    def test_archived_keys_still_count_as_used(self):
+        self.archive_old_months()
+
+        self.assertEqual(TransactionKey.objects.count(), 8)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            ledger.credit(wallet_of(self.alice), 1, "old0")
+
+    def test_history_continues_into_the_archive(self):
+        self.archive_old_months()
+        client = APIClient()
+        client.force_authenticate(User.objects.get(pk=self.alice.pk))
+
+        seen, params = 0, {"limit": 3}
+        while True:
+            page = client.get("/api/wallets/transactions/", params).data
+            seen += len(page["results"])
+            if not page["next"]:
+                break
+            params = {"limit": 3, "cursor": page["next"]}
+
+        self.assertEqual(seen, 4)
+
+    def test_wallet_with_archived_rows_can_be_deleted(self):
+        self.archive_old_months()
+
+        User.objects.filter(pk=self.alice.pk).delete()
+        connection.check_constraints()
+
+        self.assertFalse(TransactionKey.objects.filter(wallet__user=self.alice).exists())
+        self.assertEqual(TransactionArchive.objects.count(), 6)
+
+    def test_export_month_writes_the_archived_rows(self):
+        self.archive_old_months()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = archive.export_month(self.old_month, tmp)
+            with gzip.open(path, "rt") as f:
+                rows = list(csv.DictReader(f))
+
+        self.assertEqual(len(rows), 6)
+        self.assertEqual({r["idempotency_key"] for r in rows}, {"old0", "old1", "old2"})
+
+    def test_command_keeps_the_hot_months(self):
+        with self.assertRaises(CommandError):
+            call_command("archive_transactions", "--older-than", "3", stdout=StringIO())
+
+        with tempfile.TemporaryDirectory() as tmp:
+            out = StringIO()
+            call_command("archive_transactions", "--output-dir", tmp, stdout=out)
+
+        self.assertIn(f"Archived {self.old_month:%Y-%m}", out.getvalue())
+        self.assertEqual(Transaction.objects.count(), 2)
@@ -0,0 +1,102 @@
+from asgiref.sync import sync_to_async
+from django.test import TestCase, override_settings
+from django.urls import include, path
+from rest_framework.test import APIClient
+
+from users import async_views as users_async
+from wallets import async_views as wallets_async
+from wallets import ledger, money_requests
+from wallets.tests import make_user, test_settings, wallet_of
+
+
+# The async twins under /async/, next to the project's sync views, so one
+# test can compare the two answers to the same request
+urlpatterns = [
+    path("async/users/verify-pin/", users_async.verify_pin),
+    path("async/users/balance/", users_async.check_balance),
+    path("async/users/search-users/", users_async.search_users),
+    path("async/wallets/requests/", wallets_async.list_money_requests),
+    path("async/wallets/transactions/", wallets_async.transaction_history),
+    path("", include("config.urls")),
+]
+
+
+@test_settings
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        self.alice = make_user("alice@example.com", 10000)
+        self.bob = make_user("bob@example.com")
+        self.sync_client = APIClient()
+        self.sync_client.force_authenticate(self.alice)
+
+        for i in range(5):
+            ledger.transfer(wallet_of(self.alice), wallet_of(self.bob), 100 + i, f"t{i}")
+        money_requests.create(wallet_of(self.bob), wallet_of(self.alice), 300)
+        money_requests.create(wallet_of(self.alice), wallet_of(self.bob), 200)
+
+    async def get_both(self, path, params=None):
+        await self.async_client.aforce_login(self.alice)
+        response = await self.async_client.get(f"/async{path}", params or {})
+        expected = await sync_to_async(self.sync_client.get)(f"/api{path}", params or {})
+        self.assertEqual(response.status_code, expected.status_code)
+        return response.json(), expected.json()
+
+    async def test_balance_matches_the_sync_view(self):
+        actual, expected = await self.get_both("/users/balance/")
+        self.assertEqual(actual, expected)
+        self.assertEqual(actual["balance"], "94.90")
+
+    async def test_history_pages_match_the_sync_view(self):
+        actual, expected = await self.get_both("/wallets/transactions/", {"limit": 2})
+        self.assertEqual(actual, expected)
+
+        actual, expected = await self.get_both(
+            "/wallets/transactions/", {"limit": 2, "cursor": actual["next"]}
+        )
+        self.assertEqual(actual, expected)
+        self.assertEqual([row["amount"] for row in actual["results"]], ["1.02", "1.01"])
+
+    async def test_money_request_list_matches_the_sync_view(self):
+        actual, expected = await self.get_both("/wallets/requests/")
+        self.assertEqual(actual, expected)
+        self.assertEqual(actual["pending_counts"], {"incoming": 1, "outgoing": 1})
+
+    async def test_search_matches_the_sync_view(self):
+        actual, expected = await self.get_both("/users/search-users/", {"q": "bo"})
+        self.assertEqual(actual, expected)
+        self.assertEqual([u["email"] for u in actual], ["bob@example.com"])
+
+    async def test_bad_cursor_is_404(self):
+        await self.async_client.aforce_login(self.alice)
+        response = await self.async_client.get("/async/wallets/transactions/", {"cursor": "nope"})
+        self.assertEqual(response.status_code, 404)
+
+    async def test_anonymous_requests_are_refused(self):
+        for path_ in ("users/balance/", "users/search-users/", "wallets/requests/", "wallets/transactions/"):
+            response = await self.async_client.get(f"/async/{path_}")
+            self.assertEqual(response.status_code, 403, path_)
+
+    async def test_verify_pin_counts_failures_and_issues_tokens(self):
+        await self.async_client.aforce_login(self.alice)
+
+        wrong = await self.async_client.post(
+            "/async/users/verify-pin/", {"pin": "9999"}, content_type="application/json"
+        )
+        self.assertEqual(wrong.status_code, 400)
+        self.assertEqual(wrong.json()["remaining_attempts"], 2)
+
+        right = await self.async_client.post(
+            "/async/users/verify-pin/", {"pin": "1234", "scope": ["transfer"]},
+            content_type="application/json"
+        )
+        self.assertEqual(right.status_code, 201)
+        self.assertEqual(right.json()["scope"], ["transfer"])
+
+        paid = await sync_to_async(self.sync_client.post)(
+            "/api/wallets/transfer/",
+            {"to": "bob@example.com", "amount": 100, "idempotency_key": "a1",
+             "pin_token": right.json()["pin_token"]},
+            format="json"
+        )
+        self.assertEqual(paid.status_code, 201)
@@ -0,0 +1,115 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from wallets import ledger
+from wallets.models import Transaction, Wallet
+from wallets.tests import make_user, reset_process_state, test_settings, wallet_of
+
+
+@test_settings
+class BatchTransferLedgerTests(TestCase):
+    def setUp(self):
+        self.alice = make_user("alice@example.com", 10000)
+        self.bob = make_user("bob@example.com")
+        self.carol = make_user("carol@example.com")
+
+    def test_partial_mode_skips_what_it_cannot_cover(self):
+        Wallet.objects.filter(user=self.alice).update(balance=500)
+
+        results = ledger.batch_transfer(
+            wallet_of(self.alice),
+            [
+                (wallet_of(self.bob), 200, "k1"),
+                (wallet_of(self.carol), 400, "k2"),
+                (wallet_of(self.carol), 300, "k3"),
+            ],
+            all_or_nothing=False
+        )
+
+        self.assertIsNotNone(results[0])
+        self.assertIsNone(results[1])
+        self.assertIsNotNone(results[2])
+        self.assertEqual(wallet_of(self.alice).balance, 0)
+        self.assertEqual(wallet_of(self.bob).balance, 200)
+        self.assertEqual(wallet_of(self.carol).balance, 300)
+        self.assertEqual(Transaction.objects.count(), 4)
+
+    def test_all_or_nothing_rolls_back(self):
+        with self.assertRaises(ledger.InsufficientBalance):
+            ledger.batch_transfer(
+                wallet_of(self.alice),
+                [(wallet_of(self.bob), 6000, "k1"), (wallet_of(self.carol), 6000, "k2")]
+            )
+
+        self.assertEqual(wallet_of(self.alice).balance, 10000)
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_repeated_recipient_gets_one_balance_write(self):
+        version = wallet_of(self.bob).version
+
+        ledger.batch_transfer(
+            wallet_of(self.alice),
+            [(wallet_of(self.bob), 100, f"k{i}") for i in range(5)]
+        )
+
+        self.assertEqual(wallet_of(self.bob).balance, 500)
+        self.assertEqual(wallet_of(self.bob).version, version + 1)
+        self.assertEqual(Transaction.objects.filter(wallet__user=self.bob).count(), 5)
+
+
+@test_settings
+class BatchTransferAPITests(TestCase):
+    def setUp(self):
+        reset_process_state()
+        self.alice = make_user("alice@example.com", 500)
+        self.bob = make_user("bob@example.com")
+        make_user("carol@example.com")
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+
+    def post(self, transfers, **extra):
+        return self.client.post(
+            "/api/wallets/transfer/batch/",
+            {"pin": "1234", "transfers": transfers, **extra},
+            format="json"
+        )
+
+    def test_partial_mode_reports_each_item(self):
+        response = self.post(
+            [
+                {"to": "bob@example.com", "amount": 300, "idempotency_key": "b1"},
+                {"to": "nobody@example.com", "amount": 10, "idempotency_key": "b2"},
+                {"to": "carol@example.com", "amount": 300, "idempotency_key": "b3"},
+                {"to": "carol@example.com", "amount": 200, "idempotency_key": "b4"},
+            ],
+            atomic=False
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            [r["status"] for r in response.data["results"]],
+            ["SUCCESS", "FAILED", "FAILED", "SUCCESS"]
+        )
+        self.assertEqual(wallet_of(self.alice).balance, 0)
+        self.assertEqual(wallet_of(self.bob).balance, 300)
+
+    def test_rejects_whole_batch_by_default(self):
+        response = self.post([
+            {"to": "bob@example.com", "amount": 300, "idempotency_key": "b1"},
+            {"to": "nobody@example.com", "amount": 10, "idempotency_key": "b2"},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [r["status"] for r in response.data["results"]], ["SKIPPED", "FAILED"]
+        )
+        self.assertEqual(wallet_of(self.alice).balance, 500)
+
+    def test_resubmitted_batch_reports_duplicates(self):
+        items = [{"to": "bob@example.com", "amount": 100, "idempotency_key": "b1"}]
+        self.assertEqual(self.post(items).status_code, 201)
+
+        response = self.post(items)
+
+        self.assertEqual(response.data["results"][0]["status"], "DUPLICATE")
+        self.assertEqual(wallet_of(self.bob).balance, 100)
@@ -0,0 +1,139 @@
+import csv
+import os
+import tempfile
+from io import StringIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from users.models import User
+from wallets import ledger
+from wallets.models import Transaction
+from wallets.tests import make_user, test_settings, wallet_of
+
+
+@test_settings
+class BulkCreditTests(TestCase):
+    def setUp(self):
+        self.bob = make_user("bob@example.com")
+        self.carol = make_user("carol@example.com")
+        self.bob_id = wallet_of(self.bob).wallet_id
+        self.carol_id = wallet_of(self.carol).wallet_id
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self, name, text):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def run_command(self, *args):
+        out = StringIO()
+        call_command("bulk_credit", *args, stdout=out)
+        return out.getvalue()
+
+    def test_ledger_sums_entries_per_wallet(self):
+        ledger.bulk_credit([
+            (wallet_of(self.bob), 100, "b1"),
+            (wallet_of(self.bob), 50, "b2"),
+            (wallet_of(self.carol), 25, "c1"),
+        ])
+
+        self.assertEqual(wallet_of(self.bob).balance, 150)
+        self.assertEqual(wallet_of(self.carol).balance, 25)
+        self.assertEqual(Transaction.objects.filter(type="CREDIT").count(), 3)
+
+    def test_csv_credits_good_lines_and_reports_bad_ones(self):
+        path = self.write("credits.csv", "\n".join([
+            "wallet_id,amount,idempotency_key",
+            f"{self.bob_id},100,k1",
+            f"{self.bob_id},abc,k2",
+            "WLT-NOPE00,100,k3",
+            f"{self.carol_id},250,k4",
+            f"{self.bob_id},100,k1",
+        ]) + "\n")
+
+        out = self.run_command(path, "--chunk-size", "2")
+
+        self.assertIn("Credited 2 lines (3.50), 1 already applied, 2 failed", out)
+        self.assertEqual(wallet_of(self.bob).balance, 100)
+        self.assertEqual(wallet_of(self.carol).balance, 250)
+        with open(f"{path}.failures.csv") as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([(r["line"], r["error"]) for r in rows], [
+            ("3", "amount must be a positive whole number of paise"),
+            ("4", "wallet not found"),
+        ])
+
+    def test_rerun_skips_applied_lines(self):
+        path = self.write("credits.csv", f"wallet_id,amount,idempotency_key\n{self.bob_id},100,k1\n")
+        self.run_command(path)
+
+        out = self.run_command(path)
+
+        self.assertIn("Credited 0 lines (0.00), 1 already applied, 0 failed", out)
+        self.assertEqual(wallet_of(self.bob).balance, 100)
+        self.assertFalse(os.path.exists(f"{path}.failures.csv"))
+
+    def test_jsonl_with_derived_keys(self):
+        path = self.write("credits.jsonl", "\n".join([
+            f'{{"wallet_id": "{self.bob_id}", "amount": 100}}',
+            "not json",
+            f'{{"wallet_id": "{self.carol_id}", "amount": "40"}}',
+        ]) + "\n")
+
+        out = self.run_command(path, "--key-prefix", "promo")
+
+        self.assertIn("Credited 2 lines (1.40), 0 already applied, 1 failed", out)
+        self.assertEqual(
+            sorted(Transaction.objects.values_list("idempotency_key", flat=True)),
+            ["promo-1", "promo-3"]
+        )
+
+    def test_command_rejects_bad_arguments(self):
+        with self.assertRaises(CommandError):
+            self.run_command(os.path.join(self.tmp.name, "missing.csv"))
+        with self.assertRaises(CommandError):
+            self.run_command(self.write("x.csv", ""), "--chunk-size", "0")
+
+
+@test_settings
+class BulkCreditAdminTests(TestCase):
+    url = "/admin/wallets/wallet/bulk-credit/"
+
+    def setUp(self):
+        self.bob = make_user("bob@example.com")
+        self.bob_id = wallet_of(self.bob).wallet_id
+        admin = User.objects.create_superuser("admin@example.com", "Ad", "Min", "pw")
+        self.client.force_login(admin)
+
+    def upload(self, text, **data):
+        return self.client.post(self.url, {
+            "file": SimpleUploadedFile("credits.csv", text.encode()),
+            "format": "csv",
+            **data,
+        })
+
+    def test_upload_credits_and_redirects(self):
+        response = self.upload(f"wallet_id,amount,idempotency_key\n{self.bob_id},300,a1\n")
+
+        self.assertRedirects(response, "/admin/wallets/wallet/", fetch_redirect_response=False)
+        self.assertEqual(wallet_of(self.bob).balance, 300)
+
+    def test_upload_with_failures_returns_them_as_csv(self):
+        response = self.upload(f"wallet_id,amount\n{self.bob_id},300\n{self.bob_id},0\n", key_prefix="adm")
+
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn("credits.csv.failures.csv", response["Content-Disposition"])
+        self.assertIn("amount must be a positive whole number", response.content.decode())
+        self.assertEqual(wallet_of(self.bob).balance, 300)
+
+    def test_staff_without_permission_is_refused(self):
+        staff = User.objects.create_user("staff@example.com", "St", "Aff", "pw")
+        staff.is_staff = True
+        staff.save()
+        self.client.force_login(staff)
+
+        self.assertEqual(self.client.get(self.url).status_code, 403)
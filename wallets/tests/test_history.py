@@ -0,0 +1,64 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from users.models import User
+from wallets import ledger
+from wallets.tests import make_user, test_settings, wallet_of
+
+
+@test_settings
+class TransactionHistoryTests(TestCase):
+    def setUp(self):
+        self.alice = make_user("alice@example.com", 10000)
+        self.bob = make_user("bob@example.com")
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+
+    def get(self, **params):
+        response = self.client.get("/api/wallets/transactions/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_cursor_walks_every_transaction_once(self):
+        for i in range(7):
+            ledger.credit(wallet_of(self.alice), 100 + i, f"c{i}")
+
+        seen = []
+        page = self.get(limit=3)
+        while True:
+            self.assertLessEqual(len(page["results"]), 3)
+            seen += [row["amount"] for row in page["results"]]
+            if not page["next"]:
+                break
+            page = self.get(limit=3, cursor=page["next"])
+
+        # Newest first, nothing repeated or skipped
+        self.assertEqual(seen, [f"{(100 + i) / 100:.2f}" for i in reversed(range(7))])
+
+    def test_rows_carry_counterparty_and_reference(self):
+        reference_id = ledger.transfer(wallet_of(self.alice), wallet_of(self.bob), 250, "t1")
+
+        row = self.get()["results"][0]
+
+        self.assertEqual(row["type"], "DEBIT")
+        self.assertEqual(row["amount"], "2.50")
+        self.assertEqual(row["counterparty_email"], "bob@example.com")
+        self.assertEqual(row["reference"], f"REF-{reference_id.hex[:8].upper()}")
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        def queries(limit):
+            self.client.force_authenticate(User.objects.get(pk=self.alice.pk))
+            with CaptureQueriesContext(connection) as captured:
+                self.assertEqual(len(self.get(limit=limit)["results"]), limit)
+            return len(captured)
+
+        for i in range(30):
+            ledger.transfer(wallet_of(self.alice), wallet_of(self.bob), 10, f"t{i}")
+
+        self.assertEqual(queries(3), queries(30))
+
+    def test_bad_cursor_is_404(self):
+        response = self.client.get("/api/wallets/transactions/", {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 404)
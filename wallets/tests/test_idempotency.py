@@ -0,0 +1,81 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from wallets import idempotency
+from wallets.models import IdempotencyKey
+from wallets.tests import make_user, reset_process_state, test_settings, wallet_of
+
+
+@test_settings
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        reset_process_state()
+        self.alice = make_user("alice@example.com", 10000)
+        self.bob = make_user("bob@example.com")
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+
+    def credit(self, amount, key):
+        return self.client.post("/api/wallets/credit/", {"amount": amount, "idempotency_key": key}, format="json")
+
+    def transfer(self, amount, key, to="bob@example.com"):
+        return self.client.post(
+            "/api/wallets/transfer/",
+            {"to": to, "amount": amount, "pin": "1234", "idempotency_key": key},
+            format="json"
+        )
+
+    def test_credit_replays_a_repeated_key(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.credit(500, "c1")
+        second = self.credit(500, "c1")
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertEqual(second.data["transaction_id"], first.data["transaction_id"])
+        self.assertEqual(wallet_of(self.alice).total_balance, 10500)
+
+    def test_replay_survives_a_cold_process_cache(self):
+        self.assertEqual(self.credit(500, "c1").status_code, 201)
+        reset_process_state()
+
+        response = self.credit(500, "c1")
+
+        self.assertEqual(response["Idempotent-Replayed"], "true")
+        self.assertEqual(wallet_of(self.alice).total_balance, 10500)
+
+    def test_transfer_replays_a_repeated_key(self):
+        first = self.transfer(300, "t1")
+        second = self.transfer(300, "t1")
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(wallet_of(self.alice).balance, 9700)
+        self.assertEqual(wallet_of(self.bob).balance, 300)
+
+    def test_reused_key_with_different_request_is_422(self):
+        self.assertEqual(self.transfer(300, "t1").status_code, 201)
+
+        response = self.transfer(301, "t1")
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(wallet_of(self.alice).balance, 9700)
+
+    def test_sweep_removes_only_expired_keys(self):
+        self.credit(100, "old")
+        self.credit(100, "new")
+        IdempotencyKey.objects.filter(key="old").update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        out = StringIO()
+        call_command("sweep_idempotency_keys", "--batch-size", "1", stdout=out)
+
+        self.assertIn("Removed 1 expired", out.getvalue())
+        self.assertEqual(list(IdempotencyKey.objects.values_list("key", flat=True)), ["new"])
+        self.assertEqual(idempotency.sweep(), 0)
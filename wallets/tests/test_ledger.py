@@ -0,0 +1,54 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from wallets import ledger
+from wallets.models import Transaction
+from wallets.tests import make_user, test_settings, total, wallet_of
+
+
+@test_settings
+class TransferTests(TestCase):
+    def setUp(self):
+        self.alice = make_user("alice@example.com", 10000)
+        self.bob = make_user("bob@example.com", 0)
+
+    def test_transfer_moves_money_and_writes_both_legs(self):
+        reference_id = ledger.transfer(wallet_of(self.alice), wallet_of(self.bob), 2500, "t1")
+
+        self.assertEqual(wallet_of(self.alice).balance, 7500)
+        self.assertEqual(wallet_of(self.bob).balance, 2500)
+        legs = Transaction.objects.filter(reference_id=reference_id)
+        self.assertEqual(
+            sorted(legs.values_list("type", "amount")),
+            [("CREDIT", 2500), ("DEBIT", 2500)]
+        )
+
+    def test_transfers_both_ways_conserve_money(self):
+        version = wallet_of(self.alice).version
+        for i in range(5):
+            ledger.transfer(wallet_of(self.alice), wallet_of(self.bob), 300, f"ab{i}")
+            ledger.transfer(wallet_of(self.bob), wallet_of(self.alice), 100, f"ba{i}")
+
+        self.assertEqual(wallet_of(self.bob).balance, 1000)
+        self.assertEqual(total(self.alice, self.bob), 10000)
+        # Every balance write moves the version
+        self.assertEqual(wallet_of(self.alice).version, version + 10)
+
+    def test_insufficient_balance_changes_nothing(self):
+        with self.assertRaises(ledger.InsufficientBalance):
+            ledger.transfer(wallet_of(self.bob), wallet_of(self.alice), 1, "t1")
+
+        self.assertEqual(total(self.alice, self.bob), 10000)
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_transfer_endpoint_rejects_overdraft(self):
+        client = APIClient()
+        client.force_authenticate(self.bob)
+        response = client.post(
+            "/api/wallets/transfer/",
+            {"to": "alice@example.com", "amount": 1, "pin": "1234", "idempotency_key": "t1"},
+            format="json"
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(total(self.alice, self.bob), 10000)
@@ -0,0 +1,87 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from wallets import ledger, money_requests
+from wallets.models import MoneyRequest
+from wallets.tests import make_user, reset_process_state, test_settings, wallet_of
+
+
+@test_settings
+class MoneyRequestTests(TestCase):
+    def setUp(self):
+        reset_process_state()
+        self.alice = make_user("alice@example.com", 10000)
+        self.bob = make_user("bob@example.com")
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+        self.requester = APIClient()
+        self.requester.force_authenticate(self.bob)
+
+    def ask(self, amount=400):
+        response = self.requester.post(
+            "/api/wallets/request/", {"to": "alice@example.com", "amount": amount}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.data["request_id"]
+
+    def respond(self, request_id, action, **extra):
+        return self.client.post(
+            f"/api/wallets/request/{request_id}/respond/",
+            {"action": action, "pin": "1234", **extra},
+            format="json"
+        )
+
+    def test_request_counts_as_pending_on_both_sides(self):
+        self.ask()
+
+        self.assertEqual(wallet_of(self.alice).pending_incoming_requests, 1)
+        self.assertEqual(wallet_of(self.bob).pending_outgoing_requests, 1)
+
+    def test_accepted_twice_pays_once(self):
+        request_id = self.ask()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.respond(request_id, "ACCEPT")
+        second = self.respond(request_id, "ACCEPT")
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertEqual(wallet_of(self.alice).balance, 9600)
+        self.assertEqual(wallet_of(self.bob).balance, 400)
+        self.assertEqual(MoneyRequest.objects.get().status, MoneyRequest.Status.ACCEPTED)
+        self.assertEqual(wallet_of(self.alice).pending_incoming_requests, 0)
+        self.assertEqual(wallet_of(self.bob).pending_outgoing_requests, 0)
+
+    def test_rejected_request_cannot_be_accepted(self):
+        request_id = self.ask()
+
+        self.assertEqual(self.respond(request_id, "REJECT").status_code, 200)
+
+        self.assertEqual(self.respond(request_id, "ACCEPT").status_code, 404)
+        self.assertEqual(wallet_of(self.alice).balance, 10000)
+        self.assertEqual(wallet_of(self.alice).pending_incoming_requests, 0)
+
+    def test_accept_without_funds_leaves_the_request_pending(self):
+        request_id = self.ask(20000)
+
+        with self.assertRaises(ledger.InsufficientBalance):
+            money_requests.accept(MoneyRequest.objects.select_related("to_wallet", "from_wallet").get(), "k1")
+
+        self.assertEqual(self.respond(request_id, "ACCEPT").status_code, 400)
+        self.assertEqual(MoneyRequest.objects.get().status, MoneyRequest.Status.PENDING)
+        self.assertEqual(wallet_of(self.alice).pending_incoming_requests, 1)
+
+    def test_list_pages_pending_requests(self):
+        for amount in (100, 200, 300):
+            self.ask(amount)
+
+        first = self.client.get("/api/wallets/requests/", {"limit": 2}).data
+        second = self.client.get(
+            "/api/wallets/requests/", {"limit": 2, "incoming_cursor": first["incoming_next"]}
+        ).data
+
+        self.assertEqual([r["amount"] for r in first["incoming"] + second["incoming"]], [3.0, 2.0, 1.0])
+        self.assertIsNone(second["incoming_next"])
+        self.assertEqual(first["outgoing"], [])
+        self.assertEqual(first["pending_counts"], {"incoming": 3, "outgoing": 0})
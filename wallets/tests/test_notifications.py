@@ -0,0 +1,162 @@
+import hashlib
+import hmac
+import json
+import queue
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from config import metrics
+from wallets import ledger, money_requests, notifications
+from wallets.tests import make_user, test_settings, wallet_of
+
+
+class Receiver:
+    """A local webhook: records each POST, answers with ``status``."""
+
+    def __init__(self, status=200):
+        received = self.received = queue.Queue()
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                received.put((self.headers.get("X-Wallet-Signature"), body))
+                self.send_response(status)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = HTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/hook"
+        threading.Thread(target=self.server.serve_forever, args=(0.01,), daemon=True).start()
+
+    def next_batch(self):
+        signature, body = self.received.get(timeout=5)
+        return signature, body, json.loads(body)["events"]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class NotificationTestMixin:
+    def setUp(self):
+        super().setUp()
+        self.receiver = Receiver(getattr(self, "receiver_status", 200))
+        self.addCleanup(self.receiver.close)
+        for patcher in (
+            mock.patch.object(metrics, "registry", metrics.Registry()),
+            # Fresh endpoints (and threads) per test
+            mock.patch.object(notifications, "_endpoints", None),
+            mock.patch.object(notifications, "BACKOFF_BASE", 0),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def counter(self, name, **labels):
+        key = (name, tuple(sorted({"endpoint": f"127.0.0.1:{self.receiver.server.server_port}", **labels}.items())))
+        return {
+            (n, tuple(sorted(l))): value for (n, l), value in metrics.collect().items()
+        }.get(key, 0)
+
+
+@test_settings
+class NotificationTests(NotificationTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.alice = make_user("alice@example.com", 1000)
+        self.bob = make_user("bob@example.com")
+
+    def endpoints(self, **config):
+        return override_settings(NOTIFICATION_ENDPOINTS=[
+            {"url": self.receiver.url, "secret": "s3cret", "concurrency": 1, **config}
+        ])
+
+    def test_transfer_notifies_the_receiver_after_commit(self):
+        with self.endpoints():
+            with self.captureOnCommitCallbacks() as callbacks:
+                reference_id = ledger.transfer(wallet_of(self.alice), wallet_of(self.bob), 300, "t1")
+            # Nothing leaves before the commit
+            self.assertTrue(self.receiver.received.empty())
+            for callback in callbacks:
+                callback()
+
+            signature, body, events = self.receiver.next_batch()
+
+        self.assertEqual(signature, "sha256=" + hmac.new(b"s3cret", body, hashlib.sha256).hexdigest())
+        self.assertEqual(events[0]["type"], "transfer.received")
+        self.assertEqual(events[0]["data"], {
+            "wallet_id": wallet_of(self.bob).wallet_id,
+            "from_wallet_id": wallet_of(self.alice).wallet_id,
+            "amount": 300,
+            "reference_id": str(reference_id),
+        })
+
+    def test_money_request_notifies_the_payer(self):
+        with self.endpoints(), self.captureOnCommitCallbacks(execute=True):
+            req = money_requests.create(wallet_of(self.bob), wallet_of(self.alice), 200)
+        _, _, events = self.receiver.next_batch()
+
+        self.assertEqual(events[0]["type"], "money_request.received")
+        self.assertEqual(events[0]["data"]["wallet_id"], wallet_of(self.alice).wallet_id)
+        self.assertEqual(events[0]["data"]["request_id"], req.request_id)
+
+    def test_rolled_back_transfer_sends_nothing(self):
+        with self.endpoints(), mock.patch.object(notifications, "_dispatch") as dispatch:
+            with self.captureOnCommitCallbacks(execute=True), self.assertRaises(ledger.InsufficientBalance):
+                ledger.transfer(wallet_of(self.alice), wallet_of(self.bob), 5000, "t1")
+
+        dispatch.assert_not_called()
+
+    def test_nothing_is_queued_without_endpoints(self):
+        with override_settings(NOTIFICATION_ENDPOINTS=[]), mock.patch.object(notifications, "_dispatch") as dispatch:
+            with self.captureOnCommitCallbacks(execute=True):
+                ledger.transfer(wallet_of(self.alice), wallet_of(self.bob), 300, "t1")
+
+        dispatch.assert_not_called()
+
+
+class EndpointTests(NotificationTestMixin, SimpleTestCase):
+    receiver_status = 200
+
+    def endpoint(self, **config):
+        # No worker threads: the test drives the queue itself
+        return notifications.Endpoint(self.receiver.url, concurrency=0, **config)
+
+    def test_queued_events_go_out_in_batches(self):
+        endpoint = self.endpoint(batch_size=3)
+        for i in range(5):
+            endpoint.offer({"n": i})
+
+        for expected in ([0, 1, 2], [3, 4]):
+            endpoint._send(endpoint._next_batch())
+            _, _, events = self.receiver.next_batch()
+            self.assertEqual([e["n"] for e in events], expected)
+
+        self.assertEqual(self.counter("wallet_notifications_sent_total"), 5)
+
+    def test_full_queue_drops_the_event(self):
+        endpoint = self.endpoint(queue_size=1)
+
+        endpoint.offer({"n": 1})
+        endpoint.offer({"n": 2})
+
+        self.assertEqual(endpoint.queue.qsize(), 1)
+        self.assertEqual(self.counter("wallet_notifications_dropped_total", reason="queue_full"), 1)
+
+
+class FailingEndpointTests(NotificationTestMixin, SimpleTestCase):
+    receiver_status = 503
+
+    def test_batch_is_dropped_after_its_retries(self):
+        endpoint = notifications.Endpoint(self.receiver.url, concurrency=0, max_retries=2)
+
+        with self.assertLogs("wallets.notifications", "WARNING"):
+            endpoint._send([{"n": 1}, {"n": 2}])
+
+        self.assertEqual(self.receiver.received.qsize(), 3)
+        self.assertEqual(self.counter("wallet_notifications_dropped_total", reason="retries"), 2)
+        self.assertEqual(self.counter("wallet_notifications_sent_total"), 0)
@@ -0,0 +1,189 @@
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import unittest
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from wallets import ledger, money_requests, outbox
+from wallets.models import OutboxEvent
+from wallets.tests import make_user, test_settings, wallet_of
+
+
+class ListSink:
+    name = "list"
+
+    def __init__(self, fail=False, delay=0):
+        self.fail = fail
+        self.delay = delay
+        self.events = []
+        self._lock = threading.Lock()
+
+    def send(self, events):
+        if self.fail:
+            raise OSError("sink down")
+        with self._lock:
+            self.events.extend(events)
+        time.sleep(random.uniform(0, self.delay))
+
+
+def seqs(wallet):
+    return list(OutboxEvent.objects.filter(wallet=wallet).order_by("seq").values_list("event_type", "seq"))
+
+
+@test_settings
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.alice = make_user("alice@example.com", 10000)
+        self.bob = make_user("bob@example.com")
+
+    def test_events_are_numbered_per_wallet(self):
+        ledger.credit(wallet_of(self.alice), 100, "c1")
+        ledger.transfer(wallet_of(self.alice), wallet_of(self.bob), 300, "t1")
+        req = money_requests.create(wallet_of(self.bob), wallet_of(self.alice), 200)
+        money_requests.accept(req, "r1")
+
+        self.assertEqual(seqs(wallet_of(self.alice)), [
+            ("transaction.credit", 1),
+            ("transaction.debit", 2),
+            ("money_request.created", 3),
+            ("transaction.debit", 4),
+            ("money_request.accepted", 5),
+        ])
+        self.assertEqual([seq for _, seq in seqs(wallet_of(self.bob))], [1, 2, 3, 4])
+
+    def test_relay_delivers_once_with_wallet_and_seq(self):
+        ledger.transfer(wallet_of(self.alice), wallet_of(self.bob), 300, "t1")
+        sink = ListSink()
+
+        self.assertEqual(len(outbox.relay_batch(sink)), 2)
+        self.assertEqual(outbox.relay_batch(sink), [])
+
+        by_wallet = {e["wallet_id"]: e for e in sink.events}
+        debit = by_wallet[wallet_of(self.alice).wallet_id]
+        self.assertEqual((debit["type"], debit["seq"]), ("transaction.debit", 1))
+        self.assertEqual(debit["data"]["amount"], 300)
+        self.assertFalse(OutboxEvent.objects.filter(delivered_at__isnull=True).exists())
+
+    def test_a_wallet_waits_for_its_older_event_held_elsewhere(self):
+        for i in range(3):
+            ledger.credit(wallet_of(self.alice), 100, f"a{i}")
+        ledger.credit(wallet_of(self.bob), 100, "b0")
+        # Another relay is sending alice's first event
+        held = OutboxEvent.objects.get(wallet=wallet_of(self.alice), seq=1)
+        OutboxEvent.objects.filter(pk=held.pk).update(claimed_until=timezone.now() + timedelta(minutes=1))
+        sink = ListSink()
+
+        delivered = outbox.relay_batch(sink)
+
+        self.assertEqual([e.wallet_id for e in delivered], [wallet_of(self.bob).id])
+
+        OutboxEvent.objects.filter(pk=held.pk).update(delivered_at=timezone.now(), claimed_until=None)
+        delivered = outbox.relay_batch(sink)
+        self.assertEqual([e.seq for e in delivered], [2, 3])
+
+    def test_failed_batch_is_released_for_a_retry(self):
+        ledger.credit(wallet_of(self.alice), 100, "c1")
+
+        with self.assertRaises(outbox.DeliveryFailed):
+            outbox.relay_batch(ListSink(fail=True))
+
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.attempts, 1)
+        self.assertIsNone(event.claimed_until)
+        self.assertEqual(len(outbox.relay_batch(ListSink())), 1)
+
+    def test_purge_keeps_recent_and_undelivered_events(self):
+        for i in range(3):
+            ledger.credit(wallet_of(self.alice), 100, f"c{i}")
+        outbox.relay_batch(ListSink(), batch_size=2)
+        OutboxEvent.objects.filter(seq=1).update(delivered_at=timezone.now() - timedelta(days=8))
+
+        self.assertEqual(outbox.purge_delivered(timezone.now() - timedelta(days=7)), 1)
+        self.assertEqual(sorted(OutboxEvent.objects.values_list("seq", flat=True)), [2, 3])
+
+    def test_command_writes_jsonl(self):
+        ledger.transfer(wallet_of(self.alice), wallet_of(self.bob), 300, "t1")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "events.jsonl")
+            out = StringIO()
+            # It would close the test's connection, which is mid-transaction
+            with mock.patch("wallets.management.commands.run_outbox_relay.close_old_connections"):
+                call_command("run_outbox_relay", "--once", "--path", path, stdout=out)
+            with open(path) as f:
+                lines = [json.loads(line) for line in f]
+
+        self.assertEqual(sorted(e["type"] for e in lines), ["transaction.credit", "transaction.debit"])
+        self.assertIn("Delivered 2 events", out.getvalue())
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "concurrent writers need a server database")
+@test_settings
+class ConcurrentRelayTests(TransactionTestCase):
+    def run_threads(self, target, args_list):
+        errors = []
+
+        def run(*args):
+            try:
+                target(*args)
+            except Exception as exc:  # reported below, not lost in the thread
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=run, args=args) for args in args_list]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_each_wallet_is_delivered_in_commit_order(self):
+        users = [make_user(f"u{i}@example.com", 10 ** 6) for i in range(4)]
+        # A hot wallet: its credits lock only a shard
+        ledger.set_shard_count(wallet_of(users[0]), 4)
+        sink = ListSink(delay=0.005)
+        writing = threading.Event()
+        writing.set()
+
+        def write(n):
+            rng = random.Random(n)
+            for i in range(50):
+                sender, receiver = rng.sample(users, 2)
+                if rng.random() < 0.5:
+                    ledger.credit(wallet_of(users[0]), 1, f"w{n}-c{i}")
+                else:
+                    ledger.transfer(wallet_of(sender), wallet_of(receiver), 1, f"w{n}-t{i}")
+
+        def relay(n):
+            while writing.is_set() or OutboxEvent.objects.filter(delivered_at__isnull=True).exists():
+                if not outbox.relay_batch(sink, batch_size=7):
+                    time.sleep(0.001)
+
+        # Two writers and two relays: with ours back in it, the whole pool
+        connection.close()
+        relays = threading.Thread(target=self.run_threads, args=(relay, [(n,) for n in range(2)]))
+        relays.start()
+        try:
+            self.run_threads(write, [(n,) for n in range(2)])
+        finally:
+            writing.clear()
+            relays.join()
+
+        delivered = {}
+        for event in sink.events:
+            delivered.setdefault(event["wallet_id"], []).append(event["seq"])
+        for user in users:
+            published = OutboxEvent.objects.filter(wallet=wallet_of(user)).count()
+            self.assertEqual(delivered[wallet_of(user).wallet_id], list(range(1, published + 1)))
+        self.assertEqual(len(sink.events), OutboxEvent.objects.count())
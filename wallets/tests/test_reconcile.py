@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from wallets import ledger, reconcile
+from wallets.models import BalanceCheckpoint, Transaction, Wallet
+from wallets.tests import make_user, test_settings, wallet_of
+
+
+@test_settings
+class ReconcileTests(TestCase):
+    def setUp(self):
+        # Balances set outside the ledger, then booked as an opening credit
+        self.users = [make_user(f"u{i}@example.com") for i in range(5)]
+        for i, user in enumerate(self.users):
+            ledger.credit(wallet_of(user), 1000 * (i + 1), f"open{i}")
+        ledger.transfer(wallet_of(self.users[0]), wallet_of(self.users[1]), 300, "t1")
+        ledger.set_shard_count(wallet_of(self.users[2]), 2)
+        ledger.credit(wallet_of(self.users[2]), 50, "c1")
+
+    def test_balanced_ledger_has_no_mismatches(self):
+        checked, mismatches = reconcile.run(timezone.now() + timedelta(seconds=1), chunk_size=2)
+
+        self.assertEqual(checked, 5)
+        self.assertEqual(mismatches, [])
+        self.assertEqual(BalanceCheckpoint.objects.count(), 5)
+
+    def test_drift_is_reported(self):
+        Wallet.objects.filter(user=self.users[3]).update(balance=1)
+
+        _, mismatches = reconcile.run(timezone.now() + timedelta(seconds=1))
+
+        self.assertEqual(mismatches, [{
+            "wallet_id": wallet_of(self.users[3]).wallet_id,
+            "balance": 1,
+            "ledger_balance": 4000,
+            "difference": -3999,
+        }])
+
+    def test_checkpoints_only_sum_newer_transactions(self):
+        watermark = timezone.now() + timedelta(seconds=1)
+        reconcile.run(watermark)
+        # Rewriting history behind a checkpoint goes unseen...
+        Transaction.objects.filter(idempotency_key="open4").update(amount=1)
+
+        self.assertEqual(reconcile.run(watermark)[1], [])
+        # ...until a full run re-sums the whole ledger
+        self.assertEqual(len(reconcile.run(watermark, full=True)[1]), 1)
+
+    def test_command_writes_a_report_and_fails(self):
+        Wallet.objects.filter(user=self.users[0]).update(balance=0)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            report = os.path.join(tmp, "report.csv")
+            with self.assertRaises(CommandError):
+                call_command("reconcile", "--workers", "1", "--report", report, stdout=StringIO())
+            with open(report) as f:
+                self.assertIn(wallet_of(self.users[0]).wallet_id, f.read())
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "worker processes need a server database")
+@test_settings
+class ParallelReconcileTests(TransactionTestCase):
+    def test_workers_check_every_wallet(self):
+        users = [make_user(f"u{i}@example.com") for i in range(6)]
+        for i, user in enumerate(users):
+            ledger.credit(wallet_of(user), 100 + i, f"open{i}")
+        Wallet.objects.filter(user=users[5]).update(balance=0)
+
+        checked, mismatches = reconcile.run(timezone.now() + timedelta(seconds=1), workers=3, chunk_size=2)
+
+        self.assertEqual(checked, 6)
+        self.assertEqual([m["wallet_id"] for m in mismatches], [wallet_of(users[5]).wallet_id])
+        # The parent's connection still works after the pool was closed
+        self.assertEqual(BalanceCheckpoint.objects.count(), 6)
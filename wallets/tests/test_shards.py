@@ -0,0 +1,80 @@
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db.models import Sum
+from django.test import TestCase
+
+from wallets import ledger
+from wallets.models import WalletShard
+from wallets.tests import make_user, test_settings, total, wallet_of
+
+
+@test_settings
+class ShardedWalletTests(TestCase):
+    def setUp(self):
+        self.alice = make_user("alice@example.com", 10000)
+        self.bob = make_user("bob@example.com")
+        self.carol = make_user("carol@example.com")
+
+    def test_sharded_wallet_conserves_money(self):
+        ledger.set_shard_count(wallet_of(self.bob), 4)
+        for i in range(20):
+            ledger.transfer(wallet_of(self.alice), wallet_of(self.bob), 100, f"in{i}")
+
+        bob = wallet_of(self.bob)
+        self.assertEqual(bob.total_balance, 2000)
+        self.assertGreater(WalletShard.objects.filter(wallet=bob).aggregate(s=Sum("balance"))["s"], 0)
+
+        # More than any one shard holds: taken across the main row and shards
+        ledger.transfer(bob, wallet_of(self.carol), 1900, "out")
+        self.assertEqual(wallet_of(self.bob).total_balance, 100)
+        self.assertEqual(wallet_of(self.carol).balance, 1900)
+        self.assertEqual(total(self.alice, self.bob, self.carol), 10000)
+
+        with self.assertRaises(ledger.InsufficientBalance):
+            ledger.transfer(wallet_of(self.bob), wallet_of(self.carol), 101, "too-much")
+
+    def test_set_shard_count_folds_shards_back(self):
+        ledger.set_shard_count(wallet_of(self.bob), 3)
+        for i in range(6):
+            ledger.credit(wallet_of(self.bob), 50, f"c{i}")
+
+        bob = wallet_of(self.bob)
+        ledger.set_shard_count(bob, 0)
+
+        self.assertEqual(bob.balance, 300)
+        self.assertEqual(bob.shard_count, 0)
+        self.assertFalse(WalletShard.objects.filter(wallet=bob).exists())
+
+    def test_resharding_keeps_the_total(self):
+        ledger.set_shard_count(wallet_of(self.alice), 2)
+        for i in range(4):
+            ledger.credit(wallet_of(self.alice), 25, f"c{i}")
+
+        ledger.set_shard_count(wallet_of(self.alice), 5)
+
+        self.assertEqual(wallet_of(self.alice).total_balance, 10100)
+        self.assertEqual(WalletShard.objects.filter(wallet__user=self.alice).count(), 5)
+
+    def test_stale_shard_count_still_credits_and_debits(self):
+        stale = wallet_of(self.bob)
+        ledger.set_shard_count(wallet_of(self.bob), 2)
+        stale_hot = wallet_of(self.bob)
+        ledger.set_shard_count(wallet_of(self.bob), 0)
+
+        # Read while the wallet was hot: its shards are gone now
+        ledger.credit(stale_hot, 500, "c1")
+        self.assertEqual(wallet_of(self.bob).total_balance, 500)
+
+        ledger.transfer(stale, wallet_of(self.carol), 200, "t1")
+        self.assertEqual(wallet_of(self.bob).total_balance, 300)
+        self.assertEqual(total(self.alice, self.bob, self.carol), 10500)
+
+    def test_shard_wallet_command(self):
+        out = StringIO()
+        call_command("shard_wallet", wallet_of(self.alice).wallet_id, "--shards", "8", stdout=out)
+
+        self.assertEqual(wallet_of(self.alice).shard_count, 8)
+        self.assertIn("8 shards, balance 100.00", out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command("shard_wallet", wallet_of(self.alice).wallet_id, "--shards", "999")
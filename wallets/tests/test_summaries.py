@@ -0,0 +1,134 @@
+import threading
+import unittest
+from datetime import date, timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from wallets import ledger, summaries
+from wallets.models import Transaction, WalletDailySummary
+from wallets.tests import make_user, test_settings, wallet_of
+
+
+def month(**params):
+    return summaries.SummaryParams({"period": "month", **params})
+
+
+@test_settings
+class SummaryTests(TestCase):
+    def setUp(self):
+        self.alice = make_user("alice@example.com", 10000)
+        self.bob = make_user("bob@example.com")
+        ledger.credit(wallet_of(self.alice), 500, "c1")
+        ledger.transfer(wallet_of(self.alice), wallet_of(self.bob), 300, "t1")
+        ledger.transfer(wallet_of(self.bob), wallet_of(self.alice), 100, "t2")
+
+    def expected(self):
+        return {
+            "credited": 600, "debited": 300, "credit_count": 2, "debit_count": 1,
+            "transfers_in": 100, "transfers_out": 300,
+        }
+
+    def test_totals_before_any_rollup_come_from_the_ledger(self):
+        totals, days = summaries.summarize(wallet_of(self.alice), month())
+
+        self.assertEqual(totals, self.expected())
+        self.assertEqual(list(days.values()), [self.expected()])
+
+    def test_rollups_and_tail_add_up(self):
+        summaries.rollup(timezone.now())
+        ledger.credit(wallet_of(self.alice), 50, "c2")
+
+        totals, _ = summaries.summarize(wallet_of(self.alice), month())
+
+        self.assertEqual(totals["credited"], 650)
+        self.assertEqual(totals["credit_count"], 3)
+        self.assertEqual(WalletDailySummary.objects.get(wallet=wallet_of(self.alice)).credited, 600)
+
+    def test_rollup_counts_each_leg_once(self):
+        summaries.rollup(timezone.now())
+        self.assertEqual(summaries.rollup(timezone.now() - timedelta(minutes=1)), 0)
+        summaries.rollup(timezone.now())
+
+        totals, _ = summaries.summarize(wallet_of(self.alice), month())
+        self.assertEqual(totals, self.expected())
+
+    def test_rebuild_command_recomputes_everything(self):
+        summaries.rollup(timezone.now())
+        WalletDailySummary.objects.update(credited=0)
+        Transaction.objects.update(created_at=timezone.now() - timedelta(hours=1))
+
+        out = StringIO()
+        call_command("rollup_wallet_summaries", "--rebuild", stdout=out)
+
+        self.assertIn("Updated 2 wallet-days", out.getvalue())
+        self.assertEqual(WalletDailySummary.objects.get(wallet=wallet_of(self.alice)).credited, 600)
+
+    def test_summary_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.alice)
+
+        response = client.get("/api/wallets/summary/", {"period": "today", "daily": "1"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["credited"], "6.00")
+        self.assertEqual(response.data["net"], "3.00")
+        self.assertEqual(len(response.data["days"]), 1)
+        self.assertEqual(client.get("/api/wallets/summary/", {"period": "decade"}).status_code, 400)
+
+
+class SummaryParamsTests(SimpleTestCase):
+    def test_periods_are_utc_days(self):
+        today = date(2026, 10, 18)  # a Sunday
+
+        week = summaries.SummaryParams({"period": "week"}, today)
+        year = summaries.SummaryParams({"period": "year"}, today)
+
+        self.assertEqual((week.start, week.end), (date(2026, 10, 12), date(2026, 10, 19)))
+        self.assertEqual((year.start, year.end), (date(2026, 1, 1), date(2027, 1, 1)))
+
+    def test_explicit_range_is_inclusive(self):
+        params = summaries.SummaryParams({"from": "2026-10-01", "to": "2026-10-03"})
+
+        self.assertEqual((params.start, params.end), (date(2026, 10, 1), date(2026, 10, 4)))
+
+    def test_bad_ranges_are_rejected(self):
+        for query in ({"from": "2026-10-01"}, {"from": "2026-10-03", "to": "2026-10-01"},
+                      {"from": "yesterday", "to": "2026-10-01"}, {"period": "decade"}):
+            with self.assertRaises(ValueError):
+                summaries.SummaryParams(query)
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "needs a second connection to commit in between")
+@test_settings
+class SummarySnapshotTests(TransactionTestCase):
+    def test_rollup_between_the_reads_is_not_counted_twice(self):
+        alice = make_user("alice@example.com", 10000)
+        ledger.credit(wallet_of(alice), 500, "c1")
+        summaries.rollup(timezone.now())
+        ledger.credit(wallet_of(alice), 200, "c2")
+        rolled = []
+
+        def rollup():
+            rolled.append(summaries.rollup(timezone.now()))
+            connection.close()
+
+        def rollup_after_watermark_read(execute, sql, params, many, context):
+            result = execute(sql, params, many, context)
+            if "wallets_summarywatermark" in sql and not rolled:
+                # Another connection folds c2 in and moves the watermark
+                thread = threading.Thread(target=rollup)
+                thread.start()
+                thread.join()
+            return result
+
+        with connection.execute_wrapper(rollup_after_watermark_read):
+            totals, _ = summaries.summarize(wallet_of(alice), month())
+
+        self.assertEqual(rolled, [1])
+        self.assertEqual(totals["credited"], 700)
+        self.assertEqual(summaries.summarize(wallet_of(alice), month())[0]["credited"], 700)
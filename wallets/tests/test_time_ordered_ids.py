@@ -0,0 +1,104 @@
+import uuid
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from wallets import ledger, money_requests, rekey, utils
+from wallets.models import MoneyRequest, Transaction, TransactionKey, Wallet
+from wallets.tests import make_user, test_settings, total, wallet_of
+
+
+def ms_of(key):
+    return key.int >> 80
+
+
+class TimeOrderedIdTests(SimpleTestCase):
+    def test_keys_are_version_7_and_strictly_increasing(self):
+        keys = [utils.uuid7() for _ in range(5000)]
+
+        self.assertEqual(keys, sorted(set(keys)))
+        self.assertTrue(all(k.version == 7 and k.variant == uuid.RFC_4122 for k in keys))
+
+    def test_clock_stepping_back_keeps_the_order(self):
+        now = utils.uuid7()
+        with mock.patch.object(utils.time, "time_ns", return_value=(ms_of(now) - 5000) * 1_000_000):
+            later = [utils.uuid7() for _ in range(5000)]
+
+        # 5000 keys in one millisecond overflow the counter into the next
+        self.assertEqual([now, *later], sorted(set([now, *later])))
+        self.assertGreater(ms_of(later[-1]), ms_of(now))
+
+    def test_backfilled_keys_carry_their_instant(self):
+        when = timezone.now() - timedelta(days=400)
+
+        first = utils.uuid7_at(when)
+        second = utils.uuid7_at(when + timedelta(microseconds=1))
+
+        self.assertEqual(ms_of(first), int(when.timestamp() * 1000))
+        self.assertLess(first, second)
+        self.assertLess(second, utils.uuid7())
+
+    def test_public_ids_keep_their_format_and_order(self):
+        ids = [utils.generate_transaction_id() for _ in range(1000)]
+
+        self.assertEqual(ids, sorted(set(ids)))
+        self.assertTrue(all(len(i) == 20 and i.startswith("TXN") for i in ids))
+        self.assertTrue(utils.generate_request_id().startswith("REQ"))
+
+
+@test_settings
+class RekeyTests(TestCase):
+    def setUp(self):
+        self.alice = make_user("alice@example.com", 10000)
+        self.bob = make_user("bob@example.com")
+        ledger.transfer(wallet_of(self.alice), wallet_of(self.bob), 300, "t1")
+        money_requests.create(wallet_of(self.bob), wallet_of(self.alice), 200)
+
+        # As rows made before migration 0014 were: random uuid4 keys
+        for model in rekey.MODELS.values():
+            for pk in model.objects.values_list("id", flat=True):
+                self.make_legacy(model, pk)
+
+    def make_legacy(self, model, pk):
+        mapping = {pk: uuid.uuid4()}
+        rekey._remap(model, "id", mapping)
+        for rel in rekey._reverse_relations(model):
+            rekey._remap(rel.related_model, rel.field.attname, mapping)
+
+    def test_new_rows_get_time_ordered_keys(self):
+        carol = make_user("carol@example.com")
+        txn = ledger.credit(wallet_of(carol), 100, "c1")
+
+        self.assertEqual(wallet_of(carol).id.version, 7)
+        self.assertEqual(txn.id.version, 7)
+        self.assertGreater(txn.id, wallet_of(carol).id)
+
+    def test_command_rewrites_every_legacy_key(self):
+        out = StringIO()
+        call_command("rekey_time_ordered_ids", "--batch-size", "2", stdout=out)
+
+        self.assertIn("wallet: 2 keys rewritten", out.getvalue())
+        self.assertIn("transaction: 2 keys rewritten", out.getvalue())
+        for model in (Wallet, MoneyRequest, Transaction):
+            self.assertTrue(all(pk.version == 7 for pk in model.objects.values_list("id", flat=True)))
+
+        alice = wallet_of(self.alice)
+        self.assertEqual(ms_of(alice.id), int(alice.created_at.timestamp() * 1000))
+
+        # Every foreign key followed its row
+        connection.check_constraints()
+        self.assertEqual(total(self.alice, self.bob), 10000)
+        self.assertEqual(Transaction.objects.get(wallet=alice).counterparty, wallet_of(self.bob))
+        self.assertEqual(MoneyRequest.objects.get().from_wallet, wallet_of(self.bob))
+        self.assertEqual(TransactionKey.objects.filter(wallet=alice).count(), 1)
+
+        self.assertEqual(rekey.rekey(Wallet), 0)
+
+    def test_command_rejects_unknown_models(self):
+        with self.assertRaises(CommandError):
+            call_command("rekey_time_ordered_ids", "users", stdout=StringIO())
@@ -0,0 +1,73 @@
+from unittest import mock
+
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from users.models import User
+from wallets import wallet_ids
+from wallets.models import Wallet
+from wallets.tests import make_user, test_settings
+
+
+@test_settings
+class WalletIdTests(TestCase):
+    def test_permutation_is_a_bijection_into_the_id_space(self):
+        keys = wallet_ids._round_keys()
+        numbers = [*range(2000), wallet_ids.SPACE - 1]
+
+        permuted = [wallet_ids.permute(n, keys) for n in numbers]
+
+        self.assertEqual(len(set(permuted)), len(numbers))
+        self.assertTrue(all(0 <= p < wallet_ids.SPACE for p in permuted))
+        self.assertEqual(wallet_ids.encode(0), "WLT-000000")
+        self.assertEqual(wallet_ids.encode(wallet_ids.SPACE - 1), "WLT-ZZZZZZ")
+
+    def test_the_key_changes_the_permutation(self):
+        with override_settings(WALLET_ID_KEY="one"):
+            one = [wallet_ids.permute(n, wallet_ids._round_keys()) for n in range(20)]
+        with override_settings(WALLET_ID_KEY="two"):
+            two = [wallet_ids.permute(n, wallet_ids._round_keys()) for n in range(20)]
+
+        self.assertNotEqual(one, two)
+
+    def test_ids_reserved_in_a_rolled_back_transaction_are_not_kept(self):
+        allocator = wallet_ids.WalletIdAllocator(block_size=10)
+        other = wallet_ids.WalletIdAllocator(block_size=10)
+
+        try:
+            with transaction.atomic():
+                allocator.take(1)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+
+        ids = other.take(5) + allocator.take(5)
+        self.assertEqual(len(set(ids)), 10)
+        self.assertTrue(all(i.startswith(wallet_ids.PREFIX) for i in ids))
+
+    def test_existing_ids_are_skipped(self):
+        allocator = wallet_ids.WalletIdAllocator(block_size=3)
+        keys = wallet_ids._round_keys()
+        legacy = wallet_ids.encode(wallet_ids.permute(1, keys))
+        Wallet.objects.filter(user=make_user("legacy@example.com")).update(wallet_id=legacy)
+
+        with mock.patch.object(wallet_ids, "reserve_numbers", side_effect=[[0, 1, 2], [3, 4, 5]]):
+            ids = allocator.take(3)
+
+        self.assertNotIn(legacy, ids)
+        self.assertEqual(ids, [wallet_ids.encode(wallet_ids.permute(n, keys)) for n in (0, 2, 3)])
+
+    def test_exhausted_space_is_an_error(self):
+        with mock.patch.object(wallet_ids, "SPACE", 1), self.assertRaises(wallet_ids.WalletIdSpaceExhausted):
+            wallet_ids.reserve_numbers(2)
+
+    def test_create_wallets_for_bulk_created_users(self):
+        users = User.objects.bulk_create(
+            [User(email=f"bulk{i}@example.com", first_name="Bulk", last_name=str(i)) for i in range(25)]
+        )
+
+        wallet_ids.create_wallets(users, batch_size=10)
+
+        ids = list(Wallet.objects.filter(user__in=users).values_list("wallet_id", flat=True))
+        self.assertEqual(len(set(ids)), 25)
+        self.assertTrue(all(len(i) == len(wallet_ids.PREFIX) + wallet_ids.LENGTH for i in ids))
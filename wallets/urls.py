@@ -1,15 +1,26 @@
+from django.conf import settings
 from django.urls import path
-from wallets.views import CreditWalletAPIView, TransferAPIView, TransactionHistoryAPIView, CreateMoneyRequestAPIView, ListMoneyRequestsAPIView, RespondMoneyRequestAPIView
+from wallets.views import CreditWalletAPIView, TransferAPIView, BatchTransferAPIView, TransactionHistoryAPIView, TransactionExportAPIView, WalletSummaryAPIView, CreateMoneyRequestAPIView, ListMoneyRequestsAPIView, RespondMoneyRequestAPIView
 
 urlpatterns = [
     path("credit/", CreditWalletAPIView.as_view(), name="credit-wallet"),
     path("transfer/", TransferAPIView.as_view(),   name="wallet-transfer"),
+    path("transfer/batch/", BatchTransferAPIView.as_view(), name="wallet-transfer-batch"),
     path("request/", CreateMoneyRequestAPIView.as_view()),
     path("requests/", ListMoneyRequestsAPIView.as_view()),
     path("request/<str:request_id>/respond/", RespondMoneyRequestAPIView.as_view()),
     path("transactions/", TransactionHistoryAPIView.as_view(), name="transaction-history"),
+    path("transactions/export/", TransactionExportAPIView.as_view(), name="transaction-export"),
+    path("summary/", WalletSummaryAPIView.as_view(), name="wallet-summary"),
 
 ]
 
+if settings.ASYNC_READ_ENDPOINTS:
+    from wallets import async_views
 
-
+    # Listed first so they win over the sync views on the same paths
+    urlpatterns = [
+        path("requests/", async_views.list_money_requests),
+        path("transactions/", async_views.transaction_history),
+        path("transactions/export/", async_views.export_transactions),
+    ] + urlpatterns
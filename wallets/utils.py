@@ -1,10 +1,73 @@
-import random
-import string
+import secrets
+import threading
+import time
+import uuid
 
-def generate_wallet_id():
-    return "WLT-" + "".join(
-        random.choices(string.ascii_uppercase + string.digits, k=6)
-    )
+
+# Time-ordered identifiers (UUIDv7 layout, RFC 9562): 48-bit Unix ms, a
+# 12-bit counter in rand_a, 62 random bits. Rows created later get larger
+# keys, so inserts append to the right edge of their B-tree indexes.
+
+_CROCKFORD = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_COUNTER_MAX = 0xFFF
+
+_tick_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def _tick():
+    # (ms, counter), strictly increasing within the process even if the
+    # clock steps back; a counter overflow borrows the next millisecond
+    global _last_ms, _counter
+
+    with _tick_lock:
+        now = time.time_ns() // 1_000_000
+        if now > _last_ms:
+            # Random start below the midpoint leaves room to count up
+            _last_ms, _counter = now, secrets.randbits(11)
+        elif _counter < _COUNTER_MAX:
+            _counter += 1
+        else:
+            _last_ms, _counter = _last_ms + 1, 0
+        return _last_ms, _counter
+
+
+def _uuid7(ms, counter):
+    rand = secrets.randbits(62)
+    return uuid.UUID(int=ms << 80 | 0x7 << 76 | counter << 64 | 0b10 << 62 | rand)
+
+
+def uuid7():
+    return _uuid7(*_tick())
+
+
+def uuid7_at(when):
+    """
+    A UUIDv7 for a past instant (backfills). rand_a holds the sub-ms
+    fraction instead of the counter, so keys keep microsecond order.
+    """
+    ms, micros = divmod(int(when.timestamp()) * 1_000_000 + when.microsecond, 1000)
+    return _uuid7(ms, micros * 4096 // 1000)
+
+
+def _time_ordered_code(prefix):
+    # prefix + 17 Crockford base-32 characters: ms, counter, 25 random bits
+    ms, counter = _tick()
+    value = ms << 37 | counter << 25 | secrets.randbits(25)
+    chars = []
+    for _ in range(17):
+        value, digit = divmod(value, 32)
+        chars.append(_CROCKFORD[digit])
+    return prefix + "".join(reversed(chars))
+
+
+def generate_transaction_id():
+    return _time_ordered_code("TXN")
+
+
+def generate_request_id():
+    return _time_ordered_code("REQ")
 
 
 # utils.py
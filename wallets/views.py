@@ -1,18 +1,22 @@
-from urllib import request
-from django.shortcuts import render
+import uuid
+from datetime import timedelta
 
-from django.db import transaction
+from django.db import transaction, IntegrityError
+from django.db.models import Q
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 
 from wallets.models import Wallet, Transaction, MoneyRequest
-from wallets.serializers import CreditWalletSerializer, TransferSerializer
-
-import uuid
-from users.models import TransactionPin, User
-
+from wallets.serializers import (
+    CreditWalletSerializer, TransferSerializer, BatchTransferSerializer,
+    HISTORY_VALUES, history_items
+)
+from wallets import ledger, idempotency, money_requests, export, archive, summaries
+from wallets.pagination import KeysetCursorPagination
+
+from users.models import User
 from users.utils import validate_transaction_pin
 
 class CreditWalletAPIView(APIView):
@@ -27,40 +31,44 @@ class CreditWalletAPIView(APIView):
 
         wallet = request.user.wallet
 
-        # 🔒 Idempotency check
+        # 🔒 Idempotency check: one indexed lookup, ledger untouched on retry
+        fingerprint = idempotency.fingerprint("credit", {"amount": amount})
         if idempotency_key:
-            existing_txn = Transaction.objects.filter(
-                idempotency_key=idempotency_key
-            ).first()
-            if existing_txn:
-                return Response(
-                    {
-                        "message": "Already processed",
-                        "transaction_id": existing_txn.transaction_id,
-                        "balance": f"{wallet.balance / 100:.2f}"
-                    }
-                )
+            replayed = idempotency.replay(request.user, idempotency_key, fingerprint)
+            if replayed:
+                return replayed
 
-        # 🔒 Atomic operation
-        with transaction.atomic():
-            wallet.balance += amount
-            wallet.save(update_fields=["balance"])
+        try:
+            with transaction.atomic():
+                txn = ledger.credit(wallet, amount, idempotency_key or uuid.uuid4().hex)
 
-            txn = Transaction.objects.create(
+                body = {
+                    "message": "Wallet credited successfully",
+                    "transaction_id": txn.transaction_id,
+                    "balance": f"{wallet.total_balance / 100:.2f}"
+                }
+                if idempotency_key:
+                    idempotency.remember(
+                        request.user, idempotency_key, fingerprint, 201, body
+                    )
+        except IntegrityError:
+            # A concurrent retry committed first, or the key outlived its TTL
+            replayed = idempotency.replay(request.user, idempotency_key, fingerprint)
+            if replayed:
+                return replayed
+            existing = Transaction.objects.filter(
                 wallet=wallet,
-                amount=amount,
-                type=Transaction.TransactionType.CREDIT,
                 idempotency_key=idempotency_key
-            )
+            ).first()
+            if not existing:
+                raise
+            return Response({
+                "message": "Already processed",
+                "transaction_id": existing.transaction_id,
+                "balance": f"{wallet.total_balance / 100:.2f}"
+            })
 
-        return Response(
-            {
-                "message": "Wallet credited successfully",
-                "transaction_id": txn.transaction_id,
-                "balance": f"{wallet.balance / 100:.2f}"
-            },
-            status=status.HTTP_201_CREATED
-        )
+        return Response(body, status=status.HTTP_201_CREATED)
 
 
 class TransferAPIView(APIView):
@@ -72,114 +80,193 @@ class TransferAPIView(APIView):
 
         amount = serializer.validated_data["amount"]
         to_value = serializer.validated_data["to"]
-        pin = serializer.validated_data["pin"]
+        pin = serializer.validated_data.get("pin")
+        pin_token = serializer.validated_data.get("pin_token")
         idem_key = serializer.validated_data["idempotency_key"]
 
         # 🔒 PIN verification
-        pin_error = validate_transaction_pin(request.user, pin)
+        pin_error = validate_transaction_pin(
+            request.user, pin, pin_token=pin_token, scope="transfer",
+            idempotency_key=idem_key
+        )
         if pin_error:
             return pin_error
 
+        sender_wallet = request.user.wallet
+
+        # 🔁 Idempotency check: one indexed lookup, ledger untouched on retry
+        fingerprint = idempotency.fingerprint(
+            "transfer", {"to": to_value, "amount": amount}
+        )
+        replayed = idempotency.replay(request.user, idem_key, fingerprint)
+        if replayed:
+            return replayed
+
+        # 🎯 Resolve receiver
         try:
-            with transaction.atomic():
+            if "@" in to_value:
+                receiver_user = User.objects.get(email=to_value)
+                receiver_wallet = receiver_user.wallet
+            else:
+                receiver_wallet = Wallet.objects.get(wallet_id=to_value)
+        except (User.DoesNotExist, Wallet.DoesNotExist):
+            return Response({"detail": "Recipient not found"}, status=404)
+
+        # 🚫 Self transfer check
+        if sender_wallet.id == receiver_wallet.id:
+            return Response(
+                {"detail": "Cannot transfer money to your own wallet"},
+                status=400
+            )
 
-                # 🔁 Lock sender wallet
-                sender_wallet = (
-                    Wallet.objects
-                    .select_for_update()
-                    .get(user=request.user)
+        # 💸 Guarded debit + credit, both legs in one insert
+        try:
+            with transaction.atomic():
+                reference_id = ledger.transfer(
+                    sender_wallet, receiver_wallet, amount, idem_key
                 )
 
-                # 🔁 Idempotency check (INSIDE lock)
-                existing = Transaction.objects.filter(
-                    wallet=sender_wallet,
-                    idempotency_key=idem_key
-                ).first()
-
-                if existing:
-                    return Response({
-                        "message": "Transfer already processed",
-                        "transaction_id": existing.transaction_id
-                    })
-
-                # 🎯 Resolve receiver
-                if "@" in to_value:
-                    receiver_user = User.objects.get(email=to_value)
-                    receiver_wallet = receiver_user.wallet
-                else:
-                    receiver_wallet = Wallet.objects.get(wallet_id=to_value)
-
-                # 🚫 Self transfer check
-                if sender_wallet.id == receiver_wallet.id:
-                    return Response(
-                        {"detail": "Cannot transfer money to your own wallet"},
-                        status=400
-                    )
+                body = {
+                    "message": "Transfer successful",
+                    "reference_id": str(reference_id)
+                }
+                idempotency.remember(request.user, idem_key, fingerprint, 201, body)
+        except ledger.InsufficientBalance:
+            return Response(
+                {"detail": "Insufficient balance"},
+                status=400
+            )
+        except IntegrityError:
+            # A concurrent retry committed first, or the key outlived its TTL
+            replayed = idempotency.replay(request.user, idem_key, fingerprint)
+            if replayed:
+                return replayed
+            existing = Transaction.objects.filter(
+                wallet=sender_wallet,
+                idempotency_key=idem_key
+            ).first()
+            if not existing:
+                raise
+            return Response({
+                "message": "Transfer already processed",
+                "transaction_id": existing.transaction_id
+            })
 
-                # 🔒 Lock both wallets in consistent order
-                wallet_ids = sorted([sender_wallet.id, receiver_wallet.id])
+        return Response(body, status=status.HTTP_201_CREATED)
 
-                locked_wallets = (
-                    Wallet.objects
-                    .select_for_update()
-                    .filter(id__in=wallet_ids)
-                    .order_by("id")
-                )
 
-                # Reassign correctly after locking
-                locked_wallets = list(locked_wallets)
-                w1, w2 = locked_wallets
-
-                if w1.id == sender_wallet.id:
-                    sender_wallet = w1
-                    receiver_wallet = w2
-                else:
-                    sender_wallet = w2
-                    receiver_wallet = w1
-
-                # 💰 Balance check (AFTER LOCK)
-                if sender_wallet.balance < amount:
-                    return Response(
-                        {"detail": "Insufficient balance"},
-                        status=400
-                    )
+class BatchTransferAPIView(APIView):
+    permission_classes = [IsAuthenticated]
 
-                reference_id = uuid.uuid4()
+    def post(self, request):
+        serializer = BatchTransferSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
 
-                # 💸 Deduct sender
-                sender_wallet.balance -= amount
-                sender_wallet.save(update_fields=["balance"])
+        items = serializer.validated_data["transfers"]
+        pin = serializer.validated_data.get("pin")
+        pin_token = serializer.validated_data.get("pin_token")
+        all_or_nothing = serializer.validated_data["atomic"]
 
-                Transaction.objects.create(
-                    wallet=sender_wallet,
-                    amount=amount,
-                    type=Transaction.TransactionType.DEBIT,
-                    reference_id=reference_id,
-                    idempotency_key=idem_key,
-                    counterparty=receiver_wallet
-                )
+        # 🔒 PIN verification, once for the whole batch; a PIN token is
+        # spent on this exact set of item keys
+        batch_key = idempotency.fingerprint(
+            "batch", sorted(i["idempotency_key"] for i in items)
+        )
+        pin_error = validate_transaction_pin(
+            request.user, pin, pin_token=pin_token, scope="transfer",
+            idempotency_key=batch_key
+        )
+        if pin_error:
+            return pin_error
 
-                # 💰 Credit receiver
-                receiver_wallet.balance += amount
-                receiver_wallet.save(update_fields=["balance"])
-
-                Transaction.objects.create(
-                    wallet=receiver_wallet,
-                    amount=amount,
-                    type=Transaction.TransactionType.CREDIT,
-                    reference_id=reference_id,
-                    idempotency_key=idem_key,
-                    counterparty=sender_wallet
-                )
-                
+        sender_wallet = request.user.wallet
 
-        except (User.DoesNotExist, Wallet.DoesNotExist):
-            return Response({"detail": "Recipient not found"}, status=404)
+        # 🎯 Resolve every recipient in one query
+        emails = {i["to"] for i in items if "@" in i["to"]}
+        wallet_ids = {i["to"] for i in items if "@" not in i["to"]}
+
+        recipients = {}
+        for w in (
+            Wallet.objects
+            .filter(Q(wallet_id__in=wallet_ids) | Q(user__email__in=emails))
+            .select_related("user")
+        ):
+            recipients[w.wallet_id] = w
+            recipients[w.user.email] = w
+
+        # 🔁 Idempotency check for every key in one query
+        keys = [i["idempotency_key"] for i in items]
+        processed = dict(
+            Transaction.objects
+            .filter(wallet=sender_wallet, idempotency_key__in=keys)
+            .values_list("idempotency_key", "transaction_id")
+        )
+
+        results = []
+        legs = []
+        seen_keys = set()
+
+        for item in items:
+            result = {"to": item["to"], "idempotency_key": item["idempotency_key"]}
+            results.append(result)
+            receiver_wallet = recipients.get(item["to"])
+            key = item["idempotency_key"]
+
+            if key in processed:
+                result["status"] = "DUPLICATE"
+                result["transaction_id"] = processed[key]
+            elif key in seen_keys:
+                result["status"] = "FAILED"
+                result["detail"] = "Duplicate idempotency key in batch"
+            elif receiver_wallet is None:
+                result["status"] = "FAILED"
+                result["detail"] = "Recipient not found"
+            elif receiver_wallet.id == sender_wallet.id:
+                result["status"] = "FAILED"
+                result["detail"] = "Cannot transfer money to your own wallet"
+            else:
+                legs.append((result, (receiver_wallet, item["amount"], key)))
+            seen_keys.add(key)
+
+        failed = any(r.get("status") == "FAILED" for r in results)
+        if failed and all_or_nothing:
+            for result, _ in legs:
+                result["status"] = "SKIPPED"
+            return Response(
+                {"detail": "Batch rejected", "results": results},
+                status=400
+            )
+
+        # 💸 Lock all wallets in id order, one debit, one credit per wallet
+        try:
+            reference_ids = ledger.batch_transfer(
+                sender_wallet,
+                [leg for _, leg in legs],
+                all_or_nothing=all_or_nothing
+            )
+        except ledger.InsufficientBalance:
+            return Response(
+                {"detail": "Insufficient balance"},
+                status=400
+            )
+        except IntegrityError:
+            return Response(
+                {"detail": "Batch conflicts with an existing transaction, retry it"},
+                status=409
+            )
+
+        for (result, _), reference_id in zip(legs, reference_ids):
+            if reference_id is None:
+                result["status"] = "FAILED"
+                result["detail"] = "Insufficient balance"
+            else:
+                result["status"] = "SUCCESS"
+                result["reference_id"] = str(reference_id)
 
         return Response(
             {
-                "message": "Transfer successful",
-                "reference_id": str(reference_id)
+                "message": "Batch transfer processed",
+                "results": results
             },
             status=status.HTTP_201_CREATED
         )
@@ -213,11 +300,7 @@ class CreateMoneyRequestAPIView(APIView):
                 status=400
             )
 
-        req = MoneyRequest.objects.create(
-            from_wallet=sender_wallet,
-            to_wallet=receiver_wallet,
-            amount=amount
-        )
+        req = money_requests.create(sender_wallet, receiver_wallet, amount)
 
         return Response(
             {
@@ -233,36 +316,31 @@ class ListMoneyRequestsAPIView(APIView):
     def get(self, request):
         wallet = request.user.wallet
 
-        incoming = MoneyRequest.objects.filter(
-            to_wallet=wallet, status="PENDING"
+        incoming_pager = KeysetCursorPagination()
+        incoming_pager.cursor_query_param = "incoming_cursor"
+        outgoing_pager = KeysetCursorPagination()
+        outgoing_pager.cursor_query_param = "outgoing_cursor"
+
+        incoming = incoming_pager.paginate_queryset(
+            money_requests.pending_incoming(wallet), request, view=self
         )
-        outgoing = MoneyRequest.objects.filter(
-            from_wallet=wallet, status="PENDING"
+        outgoing = outgoing_pager.paginate_queryset(
+            money_requests.pending_outgoing(wallet), request, view=self
         )
 
-        data = {
-            "incoming": [
-                {
-                    "request_id": r.request_id,
-                    "from": r.from_wallet.wallet_id,
-                    "amount": r.amount / 100,
-                }
-                for r in incoming
-            ],
-            "outgoing": [
-                {
-                    "request_id": r.request_id,
-                    "to": r.to_wallet.wallet_id,
-                    "amount": r.amount / 100,
-                }
-                for r in outgoing
-            ],
-        }
-
-        return Response(data)
-
-from django.db import transaction
-from django.utils import timezone
+        # Not part of the cached principal; one query for both
+        wallet.refresh_from_db(fields=["pending_incoming_requests", "pending_outgoing_requests"])
+
+        return Response({
+            "incoming": [money_requests.incoming_item(r) for r in incoming],
+            "outgoing": [money_requests.outgoing_item(r) for r in outgoing],
+            "incoming_next": incoming_pager.next_cursor,
+            "outgoing_next": outgoing_pager.next_cursor,
+            "pending_counts": {
+                "incoming": wallet.pending_incoming_requests,
+                "outgoing": wallet.pending_outgoing_requests,
+            },
+        })
 
 class RespondMoneyRequestAPIView(APIView):
     permission_classes = [IsAuthenticated]
@@ -270,6 +348,7 @@ class RespondMoneyRequestAPIView(APIView):
     def post(self, request, request_id):
         action = request.data.get("action")
         pin = request.data.get("pin")
+        pin_token = request.data.get("pin_token")
 
         if action not in ["ACCEPT", "REJECT"]:
             return Response({"detail": "Invalid action"}, status=400)
@@ -279,7 +358,7 @@ class RespondMoneyRequestAPIView(APIView):
         # ---------------- REJECT ----------------
         if action == "REJECT":
             try:
-                req = MoneyRequest.objects.get(
+                req = MoneyRequest.objects.select_related("from_wallet").get(
                     request_id=request_id,
                     status="PENDING",
                     to_wallet=receiver_wallet
@@ -287,99 +366,117 @@ class RespondMoneyRequestAPIView(APIView):
             except MoneyRequest.DoesNotExist:
                 return Response({"detail": "Invalid request"}, status=404)
 
-            req.status = "REJECTED"
-            req.responded_at = timezone.now()
-            req.save()
+            req.to_wallet = receiver_wallet
+            try:
+                money_requests.reject(req)
+            except money_requests.RequestNotPending:
+                return Response({"detail": "Invalid request"}, status=404)
             return Response({"message": "Request rejected"})
 
         # ---------------- ACCEPT ----------------
-        pin_error = validate_transaction_pin(request.user, pin)
+        idem_key = f"money-request-{request_id}"
+        pin_error = validate_transaction_pin(
+            request.user, pin, pin_token=pin_token, scope="money_request",
+            idempotency_key=idem_key
+        )
         if pin_error:
             return pin_error
 
-        with transaction.atomic():
-
-            # Lock the request row first
-            try:
-                req = MoneyRequest.objects.select_for_update().get(
-                    request_id=request_id,
-                    status="PENDING",
-                    to_wallet=receiver_wallet
-                )
-            except MoneyRequest.DoesNotExist:
-                return Response({"detail": "Invalid request"}, status=404)
-
-            sender_wallet = req.from_wallet
+        fingerprint = idempotency.fingerprint(
+            "respond", {"request_id": request_id, "action": action}
+        )
+        replayed = idempotency.replay(request.user, idem_key, fingerprint)
+        if replayed:
+            return replayed
 
-            # ---- Consistent wallet locking order ----
-            wallets = sorted(
-                [receiver_wallet, sender_wallet],
-                key=lambda w: w.id
+        try:
+            req = MoneyRequest.objects.select_related("from_wallet").get(
+                request_id=request_id,
+                status="PENDING",
+                to_wallet=receiver_wallet
             )
+        except MoneyRequest.DoesNotExist:
+            return Response({"detail": "Invalid request"}, status=404)
 
-            locked_wallets = (
-                Wallet.objects.select_for_update()
-                .filter(id__in=[w.id for w in wallets])
-            )
+        req.to_wallet = receiver_wallet
+        body = {"message": "Request accepted"}
 
-            locked_wallets_dict = {w.id: w for w in locked_wallets}
+        try:
+            with transaction.atomic():
+                # Claim, pay the requester and update the pending counters
+                money_requests.accept(req, idem_key)
+                idempotency.remember(request.user, idem_key, fingerprint, 200, body)
+        except money_requests.RequestNotPending:
+            return Response({"detail": "Invalid request"}, status=404)
+        except ledger.InsufficientBalance:
+            return Response({"detail": "Insufficient balance"}, status=400)
+
+        return Response(body)
+    
+class TransactionHistoryAPIView(APIView):
+    permission_classes = [IsAuthenticated]
 
-            receiver_wallet = locked_wallets_dict[receiver_wallet.id]
-            sender_wallet = locked_wallets_dict[sender_wallet.id]
+    def get(self, request):
+        wallet = request.user.wallet
+        # ⚡ Plain values() rows, formatted without model instances
+        transactions = wallet.transactions.values(*HISTORY_VALUES)
 
-            # ---- Balance check AFTER locking ----
-            if receiver_wallet.balance < req.amount:
-                return Response({"detail": "Insufficient balance"}, status=400)
+        # 🗄️ Months moved out by archive_transactions continue the history
+        archived = archive.archived_history(wallet.created_at, wallet=wallet)
+        if archived is not None:
+            archived = archived.values(*HISTORY_VALUES)
 
-            # ---- Update balances ----
-            receiver_wallet.balance -= req.amount
-            sender_wallet.balance += req.amount
+        paginator = KeysetCursorPagination()
+        page = paginator.paginate_queryset(
+            transactions, request, view=self, fallback=archived
+        )
+        return paginator.get_paginated_response(history_items(page))
 
-            receiver_wallet.save()
-            sender_wallet.save()
-            idem_key = f"money-request-{req.request_id}"
-            # ---- Create transactions ----
-            reference_id = uuid.uuid4()
 
-            Transaction.objects.create(
-                wallet=receiver_wallet,
-                amount=req.amount,
-                type="DEBIT",
-                reference_id=reference_id,
-                idempotency_key=idem_key,
-                counterparty=sender_wallet
-            )
-            
-            
+class TransactionExportAPIView(APIView):
+    permission_classes = [IsAuthenticated]
 
-            Transaction.objects.create(
-                wallet=sender_wallet,
-                amount=req.amount,
-                type="CREDIT",
-                reference_id=reference_id,
-                idempotency_key=idem_key,
-                counterparty=receiver_wallet
-            )
+    def get(self, request):
+        try:
+            params = export.ExportParams(request.query_params)
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=400)
 
-            # ---- Update request status ----
-            req.status = "ACCEPTED"
-            req.responded_at = timezone.now()
-            req.save()
+        wallet = request.user.wallet
 
-        return Response({"message": "Request accepted"})
-    
-from rest_framework.views import APIView
-from rest_framework.permissions import IsAuthenticated
-from rest_framework.response import Response
-from .models import Transaction
-from .serializers import TransactionHistorySerializer
+        # 📄 Streamed straight from a server-side cursor, no serializer
+        rows = export.statement_rows(wallet, params)
+        return export.response(export.stream(rows, params), wallet.wallet_id, params)
 
-class TransactionHistoryAPIView(APIView):
+
+class WalletSummaryAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        wallet = request.user.wallet
-        transactions = wallet.transactions.all().order_by("-created_at")
-        serializer = TransactionHistorySerializer(transactions, many=True)
-        return Response(serializer.data)
+        try:
+            params = summaries.SummaryParams(request.query_params)
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=400)
+
+        # 📊 Daily rollups plus the few transactions newer than the last rollup
+        totals, days = summaries.summarize(request.user.wallet, params)
+
+        def amounts(row):
+            return {
+                "credited": f"{row['credited'] / 100:.2f}",
+                "debited": f"{row['debited'] / 100:.2f}",
+                "net": f"{(row['credited'] - row['debited']) / 100:.2f}",
+                "transfers_in": f"{row['transfers_in'] / 100:.2f}",
+                "transfers_out": f"{row['transfers_out'] / 100:.2f}",
+                "credit_count": row["credit_count"],
+                "debit_count": row["debit_count"],
+            }
 
+        data = {
+            "from": params.start,
+            "to": params.end - timedelta(days=1),
+            **amounts(totals),
+        }
+        if params.daily:
+            data["days"] = [{"day": day, **amounts(row)} for day, row in days.items()]
+        return Response(data)
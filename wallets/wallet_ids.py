@@ -0,0 +1,177 @@
+import hashlib
+import os
+import string
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+
+from wallets.models import Wallet, WalletIdSequence
+
+
+# Wallet IDs are "WLT-" plus 6 base-36 characters. Each comes from a
+# sequence number pushed through a keyed Feistel permutation of that
+# space, so distinct numbers give distinct, unguessable IDs without any
+# lookup. Numbers are reserved from the database a block at a time.
+#
+# Changing WALLET_ID_KEY changes the permutation; the per-block check
+# against existing wallets (which also skips legacy random IDs) keeps that
+# safe, but IDs stop being collision-free by construction. Set it once.
+
+PREFIX = "WLT-"
+ALPHABET = string.digits + string.ascii_uppercase
+LENGTH = 6
+SPACE = len(ALPHABET) ** LENGTH  # 2,176,782,336
+
+SEQUENCE_NAME = "wallets_wallet_id_seq"
+
+_HALF_BITS = 16
+_HALF_MASK = (1 << _HALF_BITS) - 1
+_ROUNDS = 6
+
+
+class WalletIdSpaceExhausted(Exception):
+    pass
+
+
+def _round_keys():
+    secret = getattr(settings, "WALLET_ID_KEY", None) or settings.SECRET_KEY
+    master = hashlib.sha256(f"wallets.wallet-id:{secret}".encode()).digest()
+    return [
+        hashlib.blake2b(bytes([i]), key=master, digest_size=16).digest()
+        for i in range(_ROUNDS)
+    ]
+
+
+def _feistel(value, keys):
+    # Balanced Feistel over 32 bits: a bijection for any round function
+    left, right = value >> _HALF_BITS, value & _HALF_MASK
+    for key in keys:
+        digest = hashlib.blake2b(right.to_bytes(2, "big"), key=key, digest_size=2).digest()
+        left, right = right, left ^ int.from_bytes(digest, "big")
+    return (left << _HALF_BITS) | right
+
+
+def permute(number, keys):
+    """
+    Map ``number`` in [0, SPACE) to another number in [0, SPACE). 2**32 is
+    bigger than SPACE, so results outside it are fed back in (cycle
+    walking); that keeps the mapping a bijection on [0, SPACE).
+    """
+    value = _feistel(number, keys)
+    while value >= SPACE:
+        value = _feistel(value, keys)
+    return value
+
+
+def encode(number):
+    chars = []
+    for _ in range(LENGTH):
+        number, digit = divmod(number, len(ALPHABET))
+        chars.append(ALPHABET[digit])
+    return PREFIX + "".join(reversed(chars))
+
+
+def reserve_numbers(count):
+    """Reserve ``count`` unused sequence numbers in one round trip."""
+    if connection.vendor == "postgresql":
+        # nextval is not transactional: a rolled back signup only wastes
+        # its number, and concurrent signups never wait on each other
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(%s) FROM generate_series(1, %s)",
+                [SEQUENCE_NAME, count]
+            )
+            numbers = [row[0] for row in cursor.fetchall()]
+    else:
+        # A plain counter row. Inside a caller's transaction it is rolled
+        # back with it, so WalletIdAllocator only keeps such a block once
+        # that transaction commits
+        with transaction.atomic():
+            WalletIdSequence.objects.get_or_create(pk=1)
+            WalletIdSequence.objects.filter(pk=1).update(next_value=F("next_value") + count)
+            end = WalletIdSequence.objects.values_list("next_value", flat=True).get(pk=1)
+        numbers = list(range(end - count, end))
+
+    if numbers[-1] >= SPACE:
+        raise WalletIdSpaceExhausted()
+    return numbers
+
+
+class WalletIdAllocator:
+    """
+    Hands out wallet IDs from a per-process pool refilled ``block_size``
+    at a time. Thread-safe; a forked child starts with an empty pool.
+    """
+
+    def __init__(self, block_size=None):
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._pool = []
+        self._pid = os.getpid()
+        self._keys = None
+
+    def _ids_for(self, numbers):
+        if self._keys is None:
+            self._keys = _round_keys()
+        ids = [encode(permute(n, self._keys)) for n in numbers]
+
+        # Legacy random IDs live in the same space
+        taken = set(Wallet.objects.filter(wallet_id__in=ids).values_list("wallet_id", flat=True))
+        return [i for i in ids if i not in taken]
+
+    def _refill(self, needed):
+        if self._pid != os.getpid():
+            self._pool, self._pid = [], os.getpid()
+
+        block = self.block_size or getattr(settings, "WALLET_ID_BLOCK_SIZE", 100)
+        while len(self._pool) < needed:
+            short = needed - len(self._pool)
+            # Without a sequence the counter row is rolled back with the
+            # caller's transaction, and another process would then reserve
+            # the same numbers: use what this transaction needs, and pool
+            # the rest of the block only once it commits
+            provisional = connection.vendor != "postgresql" and connection.in_atomic_block
+
+            fresh = self._ids_for(reserve_numbers(max(block, short)))
+            if provisional:
+                fresh, spare = fresh[:short], fresh[short:]
+                transaction.on_commit(lambda spare=spare: self._keep(spare))
+            # Pop from the end, so keep reservation order reversed
+            self._pool[:0] = reversed(fresh)
+
+    def _keep(self, ids):
+        with self._lock:
+            if self._pid == os.getpid():
+                self._pool[:0] = reversed(ids)
+
+    def take(self, count):
+        """Return ``count`` fresh wallet IDs, e.g. for a bulk_create."""
+        with self._lock:
+            self._refill(count)
+            ids = self._pool[-count:] if count else []
+            del self._pool[len(self._pool) - len(ids):]
+        return list(reversed(ids))
+
+    def next_id(self):
+        return self.take(1)[0]
+
+
+allocator = WalletIdAllocator()
+
+
+def next_wallet_id():
+    return allocator.next_id()
+
+
+def create_wallets(users, batch_size=1000):
+    """
+    Create wallets for ``users`` that were added with bulk_create (which
+    skips the post_save signal). One reservation per block of IDs.
+    """
+    ids = allocator.take(len(users))
+    return Wallet.objects.bulk_create(
+        [Wallet(user=user, wallet_id=wallet_id) for user, wallet_id in zip(users, ids)],
+        batch_size=batch_size
+    )